@@ -0,0 +1,43 @@
+"""
+Gunicorn configuration for the dashboard (used by the Procfile and render.yaml)
+===============================================================================
+    gunicorn --config gunicorn.conf.py
+
+The app is preloaded: create_server() runs create_app(preload=True) once in the
+master, which loads the county data, the county geometry and the ML summary and
+memory-maps the ML bundle. The workers are forked from the master and share all of
+that copy-on-write. Each worker serves requests on a thread pool (gthread).
+
+Garbage collection follows the CPython recipe for fork-heavy servers. It is
+disabled in the master while the app loads, the loaded objects are frozen before
+each fork and collection is re-enabled in the worker, so worker collections do not
+touch (and copy) the shared pages.
+
+Environment: PORT (default 8050), WEB_CONCURRENCY (worker processes, default one per
+CPU), GUNICORN_THREADS (threads per worker, default 4), GUNICORN_TIMEOUT (default 120).
+"""
+
+import gc
+import os
+
+gc.disable()
+
+wsgi_app = 'interactive_dashboard:create_server()'
+pythonpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'dashboard')
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+# compute_budget splits the cores across the workers by WEB_CONCURRENCY
+os.environ['WEB_CONCURRENCY'] = str(workers)
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark Gradient Boosting against the Random Forest
+=====================================================
+Compares fit time, predict latency (single county and full test set), pickled
+artifact size and test ROC-AUC for the registered models on the same 80/20
+split that run_ml_analysis uses, plus single-county latency and size of the
+array-backed predictors the results bundle stores (results_io.export_model) and
+whether they reproduce scikit-learn's probabilities bit for bit. The large-batch
+columns score every county tiled to the prediction API's largest accepted batch
+(predict_api.MAX_BATCH_ROWS), where the tree predictors hand over to scikit-learn's
+compiled traversal.
+
+Usage:
+    python scripts/benchmark_models.py [--repeats N] [--models NAME ...]
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add src directory to path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(script_dir, '..', 'src')
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+import compute_budget
+from ml_analysis import MODEL_REGISTRY, build_models, engineer_features, create_binary_target, evaluate_models
+from predict_api import MAX_BATCH_ROWS
+from results_io import export_model
+
+
+def load_data():
+    """Load merged_clean.csv with the same cleaning as the dashboard"""
+    data_path = os.path.join(script_dir, '..', 'data', 'processed', 'merged_clean.csv')
+    df = pd.read_csv(data_path)
+    df['county_fips'] = df['county_fips'].astype(str).str.zfill(5)
+    df = df.replace([np.inf, -np.inf], np.nan)
+    return df.dropna(subset=['mobility_score', 'ai_exposure'])
+
+
+def best_time(func, repeats):
+    """Best wall-clock time of func() over several repeats"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark(model_names, repeats=5):
+    """Time and size each model; returns one row per model"""
+    df = load_data()
+    X, _ = engineer_features(df)
+    y = create_binary_target(df)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test = scaler.transform(X_test)
+    X_large = np.resize(scaler.transform(X), (MAX_BATCH_ROWS, X.shape[1]))
+    
+    rows = []
+    for model_name, model in build_models(names=model_names).items():
+        fit_time = best_time(lambda: model.fit(X_train, y_train), repeats)
+        single_latency = best_time(lambda: model.predict_proba(X_test[:1]), repeats * 20)
+        batch_latency = best_time(lambda: model.predict_proba(X_test), repeats * 4)
+        probabilities = model.predict_proba(X_test)[:, 1]
+        exported = export_model(model)
+        arrays_latency = best_time(lambda: exported.predict_proba(X_test[:1]), repeats * 20)
+        large_latency = best_time(lambda: model.predict_proba(X_large), repeats)
+        arrays_large_latency = best_time(lambda: exported.predict_proba(X_large), repeats)
+        rows.append({
+            'model': model_name,
+            'fit_s': fit_time,
+            'predict_1_ms': single_latency * 1e3,
+            f'predict_{len(X_test)}_ms': batch_latency * 1e3,
+            f'predict_{len(X_large)}_ms': large_latency * 1e3,
+            'artifact_kb': len(pickle.dumps(model)) / 1024,
+            'arrays_predict_1_ms': arrays_latency * 1e3,
+            f'arrays_predict_{len(X_large)}_ms': arrays_large_latency * 1e3,
+            'arrays_kb': sum(a.nbytes for a in exported.arrays().values() if isinstance(a, np.ndarray)) / 1024,
+            'arrays_exact': (np.array_equal(exported.predict_proba(X_test), model.predict_proba(X_test))
+                             and np.array_equal(exported.predict_proba(X_large), model.predict_proba(X_large))),
+            'roc_auc': evaluate_models(y_test, probabilities)['roc_auc'][0]
+        })
+    return pd.DataFrame(rows).set_index('model')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark registered models")
+    parser.add_argument('--repeats', type=int, default=5, help='timing repeats per measurement (default: 5)')
+    parser.add_argument('--models', nargs='+', default=['Random Forest', 'Gradient Boosting'],
+                        choices=list(MODEL_REGISTRY), help='models to compare')
+    args = parser.parse_args()
+    
+    print("="*60)
+    print("MODEL BENCHMARK")
+    print("="*60)
+    compute_budget.apply('training')
+    with compute_budget.budget('training'):
+        table = benchmark(args.models, repeats=args.repeats)
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 160,
+                           'display.max_columns', None):
+        print(table)
@@ -22,8 +22,8 @@ def export_static_dashboard():
     print("EXPORTING DASHBOARD TO STATIC HTML")
     print("="*60)
     
-    # Import dashboard app
-    from dashboard.interactive_dashboard import app
+    # Check the dashboard module imports (building the app is not needed for the static page)
+    import dashboard.interactive_dashboard  # noqa: F401
     
     # Create output directory
     output_dir = os.path.join(script_dir, '..', 'docs', 'dashboard')
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Load Test the Prediction API
+============================
+Fires concurrent POST /api/predict requests at a running dashboard and reports
+throughput and latency percentiles (p50/p95/p99). Records are random
+{state_name, mobility_score} pairs drawn from the real states and mobility range.
+
+Usage:
+    python src/dashboard/interactive_dashboard.py &      # start the server first
+    python scripts/load_test_predict.py [--url URL] [--concurrency N] [--requests N] [--batch-size N]
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_payloads(n_requests, batch_size, seed=0):
+    """Random request bodies of batch_size records each"""
+    data_path = os.path.join(script_dir, '..', 'data', 'processed', 'merged_clean.csv')
+    df = pd.read_csv(data_path, usecols=['state_name', 'mobility_score']).dropna()
+    states = df['state_name'].unique()
+    low, high = df['mobility_score'].quantile([0.01, 0.99])
+    rng = np.random.default_rng(seed)
+    return [
+        [{'state_name': str(state), 'mobility_score': float(score)}
+         for state, score in zip(rng.choice(states, batch_size), rng.uniform(low, high, batch_size))]
+        for _ in range(n_requests)
+    ]
+
+
+def load_test(url, concurrency=16, n_requests=2000, batch_size=1):
+    """Send n_requests from concurrency threads; returns latencies (s), errors and wall time"""
+    payloads = make_payloads(n_requests, batch_size)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    next_request = iter(range(n_requests))
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(next_request, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            try:
+                response = session.post(url, json=payloads[i], timeout=30)
+                ok = response.status_code == 200
+                error = None if ok else f'HTTP {response.status_code}: {response.text[:200]}'
+            except requests.RequestException as e:
+                error = str(e)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if error:
+                    errors.append(error)
+                else:
+                    latencies.append(elapsed)
+
+    # Warm up the server (model loading, first batch) outside the measurement
+    requests.post(url, json=payloads[0], timeout=60).raise_for_status()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), errors, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test POST /api/predict")
+    parser.add_argument('--url', default='http://127.0.0.1:8050/api/predict', help='prediction endpoint')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients (default: 16)')
+    parser.add_argument('--requests', type=int, default=2000, help='total requests (default: 2000)')
+    parser.add_argument('--batch-size', type=int, default=1, help='records per request (default: 1)')
+    args = parser.parse_args()
+
+    print("="*60)
+    print("PREDICTION API LOAD TEST")
+    print("="*60)
+    latencies, errors, wall = load_test(args.url, args.concurrency, args.requests, args.batch_size)
+    n_ok = len(latencies)
+    print(f"Requests:    {n_ok} ok, {len(errors)} failed ({args.concurrency} concurrent clients, "
+          f"{args.batch_size} records each)")
+    print(f"Throughput:  {n_ok / wall:,.0f} requests/s, {n_ok * args.batch_size / wall:,.0f} records/s")
+    if n_ok:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+        print(f"Latency:     p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, max {latencies.max() * 1e3:.1f} ms")
+    for error in errors[:5]:
+        print(f"  error: {error}")
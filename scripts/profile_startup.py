@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Profile Dashboard Startup
+=========================
+Measures how long the dashboard takes to become useful, each step in a fresh
+interpreter:
+1. import: `import dashboard.interactive_dashboard` under `python -X importtime`,
+   with the slowest imports and whether heavy optional modules (scikit-learn, scipy,
+   plotly.express, requests, IPython) were pulled in;
+2. first request: building the app (create_app) and serving the first page and
+   layout requests through the Flask test client, timed from interpreter launch to
+   the second response (interpreter shutdown is not counted).
+
+The report is printed and written as JSON (default:
+data/processed/startup_profile.json). With warm artifacts (ml_summary.json current,
+county GeoJSON cached) the time to first request should be well under a second.
+
+Usage:
+    python scripts/profile_startup.py [--top N] [--preload] [--output JSON]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.abspath(os.path.join(script_dir, '..', 'src'))
+
+HEAVY_MODULES = ('sklearn', 'scipy', 'scipy.stats', 'plotly.express', 'requests', 'IPython')
+
+IMPORT_PROBE = f"""
+import json, sys
+import dashboard.interactive_dashboard
+print(json.dumps({{name: name in sys.modules for name in {HEAVY_MODULES!r}}}))
+"""
+
+REQUEST_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import dashboard.interactive_dashboard as dashboard
+imported = time.perf_counter()
+app = dashboard.get_app(preload={preload})
+built = time.perf_counter()
+client = app.server.test_client()
+status = [client.get('/').status_code, client.get('/_dash-layout').status_code]
+served = time.perf_counter()
+print(json.dumps({{'import_s': imported - start, 'create_app_s': built - imported,
+                   'first_requests_s': served - built, 'status': status, 'served_at': time.time()}}))
+"""
+
+
+def _run(code, *flags):
+    """Run code in a fresh interpreter from src/; returns (stdout, stderr, wall seconds)"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *flags, '-c', code], cwd=src_dir, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"startup probe failed:\n{proc.stderr[-2000:]}")
+    return proc.stdout, proc.stderr, wall
+
+
+def parse_importtime(stderr):
+    """(module, self_s, cumulative_s, depth) rows from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return rows
+
+
+def profile_startup(top=15, preload=False):
+    """Import profile and time to first request of the dashboard; returns the report dict"""
+    stdout, stderr, import_wall = _run(IMPORT_PROBE, '-X', 'importtime')
+    imports = parse_importtime(stderr)
+    heavy = json.loads(stdout.strip().splitlines()[-1])
+    dashboard_import = next((row for row in imports if row[0] == 'dashboard.interactive_dashboard'), None)
+
+    launched = time.time()
+    stdout, _, process_wall = _run(REQUEST_PROBE.format(preload=preload))
+    timings = json.loads(stdout.strip().splitlines()[-1])
+    served_at = timings.pop('served_at')
+
+    return {
+        'import': {
+            'wall_s': import_wall,
+            'dashboard_cumulative_s': dashboard_import[2] if dashboard_import else None,
+            'heavy_modules_loaded': heavy,
+            'slowest': [{'module': name, 'self_s': self_s, 'cumulative_s': cumulative_s}
+                        for name, self_s, cumulative_s, depth in
+                        sorted((row for row in imports if row[3] <= 1), key=lambda row: -row[2])[:top]]
+        },
+        'first_request': {
+            'preload': preload,
+            **timings,
+            'time_to_first_request_s': served_at - launched,
+            'process_wall_s': process_wall
+        }
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile dashboard import and time to first request")
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to list (default: 15)')
+    parser.add_argument('--preload', action='store_true', help='build the app as the gunicorn master does')
+    parser.add_argument('--output', help='report JSON (default: data/processed/startup_profile.json)')
+    args = parser.parse_args()
+
+    print("="*60)
+    print("DASHBOARD STARTUP PROFILE")
+    print("="*60)
+    report = profile_startup(top=args.top, preload=args.preload)
+
+    imports, first = report['import'], report['first_request']
+    print(f"\nImport (fresh interpreter): {imports['wall_s']:.3f}s wall, "
+          f"dashboard module {imports['dashboard_cumulative_s']:.3f}s cumulative")
+    print("Heavy modules loaded on import: " +
+          (', '.join(name for name, loaded in imports['heavy_modules_loaded'].items() if loaded) or 'none'))
+    print(f"\nSlowest imports (top {args.top}):")
+    for row in imports['slowest']:
+        print(f"  {row['cumulative_s']:7.3f}s  {row['module']}")
+    print(f"\nFirst request ({'preload' if first['preload'] else 'lazy'}):")
+    print(f"  import {first['import_s']:.3f}s · create_app {first['create_app_s']:.3f}s · "
+          f"first page + layout {first['first_requests_s']:.3f}s (HTTP {first['status']})")
+    print(f"  time to first request (incl. interpreter start): {first['time_to_first_request_s']:.3f}s")
+
+    output_path = args.output or os.path.join(script_dir, '..', 'data', 'processed', 'startup_profile.json')
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"\n✓ Report saved to {output_path}")
@@ -0,0 +1,162 @@
+"""
+Artifact Store
+==============
+Content-addressed on-disk cache for pipeline artifacts (feature matrices, split
+indices, fitted models, evaluation summaries). Every artifact is keyed by a hash of
+the data it was computed from plus a hash of the code/config that produced it, so an
+artifact is recomputed exactly when one of its inputs changes and reused otherwise.
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def _digest(*parts):
+    """SHA-1 hex digest of the string forms of parts"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def hash_frame(frame):
+    """Content hash of a DataFrame/Series: column names, index and values"""
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame()
+    digest = hashlib.sha1(repr(list(frame.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def hash_array(array):
+    """Content hash of a NumPy array's dtype, shape and bytes"""
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1(f'{array.dtype}{array.shape}'.encode())
+    digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def code_hash(*objects):
+    """Hash of the source code of functions/classes (or the repr of config values)"""
+    parts = []
+    for obj in objects:
+        try:
+            parts.append(inspect.getsource(obj))
+        except (TypeError, OSError):
+            parts.append(repr(obj))
+    return _digest(*parts)
+
+
+def file_hash(*paths):
+    """Hash of the contents of one or more files"""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Pickle-backed store of artifacts grouped by kind and addressed by content key
+
+    Layout: <root>/<kind>/<key>.pkl. Writes go through a temporary file and an atomic
+    rename, so concurrent readers never see a partially written artifact. Loading an
+    artifact refreshes its modification time, so mtime records its last use and
+    prune() can evict the least recently used artifacts.
+    """
+
+    # prune() keeps at most this many bytes, dropping anything unused for max_age_days
+    max_bytes = 32 * 2**20
+    max_age_days = 30
+
+    def __init__(self, root):
+        self.root = root
+        self.stats = {'reused': 0, 'computed': 0}
+
+    @staticmethod
+    def key(*parts):
+        """Build an artifact key from data hashes, code hashes and config values"""
+        return _digest(*parts)[:24]
+
+    def path(self, kind, key):
+        return os.path.join(self.root, kind, f'{key}.pkl')
+
+    def exists(self, kind, key):
+        return os.path.exists(self.path(kind, key))
+
+    def load(self, kind, key):
+        path = self.path(kind, key)
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Read-only store or pruned meanwhile: the value is still good
+        return value
+
+    def save(self, kind, key, value):
+        path = self.path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
+
+    def get_or_compute(self, kind, key, compute):
+        """Load the artifact if present, otherwise compute, save and return it"""
+        if self.exists(kind, key):
+            try:
+                value = self.load(kind, key)
+            except Exception:
+                pass  # Corrupt or unreadable entry: recompute and overwrite
+            else:
+                self.stats['reused'] += 1
+                return value
+        value = compute()
+        self.save(kind, key, value)
+        self.stats['computed'] += 1
+        return value
+
+    def prune(self, max_bytes=None, max_age_days=None):
+        """Delete least recently used artifacts until the store fits the size and age limits
+        
+        Returns (artifacts removed, bytes freed). Call it after a run has loaded or saved
+        everything it needs, so the run's own artifacts are the most recently used.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        entries = []
+        for kind in (os.listdir(self.root) if os.path.isdir(self.root) else []):
+            kind_dir = os.path.join(self.root, kind)
+            if not os.path.isdir(kind_dir):
+                continue
+            for name in os.listdir(kind_dir):
+                if name.endswith('.pkl'):
+                    path = os.path.join(kind_dir, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        
+        oldest_kept = time.time() - max_age_days * 86400
+        newer_bytes = removed = freed = 0
+        for mtime, size, path in sorted(entries, reverse=True):
+            newer_bytes += size
+            if mtime >= oldest_kept and newer_bytes <= max_bytes:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
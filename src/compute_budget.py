@@ -0,0 +1,126 @@
+"""
+Compute Budget
+==============
+One place that decides how many threads and processes each kind of work may use, so
+nested parallelism (joblib workers x BLAS threads x web-server workers) never
+oversubscribes the cores.
+
+Contexts:
+- training: offline model building (python src/ml_analysis.py). joblib gets every
+  core; each joblib worker gets cores // n_jobs BLAS threads.
+- serving: a web-server worker answering requests. The cores are split evenly across
+  the server's worker processes (WEB_CONCURRENCY) and all go to BLAS; no joblib.
+- warmup: (re)training inside a serving process, e.g. the dashboard's background
+  rebuild. joblib gets half of the worker's share, leaving the rest to request
+  serving.
+
+apply(context) sets the process-wide BLAS limit and is meant for process start-up;
+budget(context) is a context manager that sets the joblib worker count for the calling
+thread only (joblib configuration is thread-local), so a warm-up thread and the
+request threads of the same process each get their own allocation.
+current_allocation() reports what is in effect.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+CONTEXTS = ('training', 'serving', 'warmup')
+
+_process = {'context': None, 'allocation': None}
+_local = threading.local()
+
+
+def available_cpus():
+    """CPUs this process may run on (COMPUTE_BUDGET_CPUS overrides)"""
+    override = os.environ.get('COMPUTE_BUDGET_CPUS')
+    if override:
+        return max(1, int(override))
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+def server_workers():
+    """Web-server worker processes sharing this machine (WEB_CONCURRENCY, default 1)"""
+    return max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+
+
+def allocation(context, cpus=None, workers=None):
+    """Threads and processes one unit of work in context may use
+
+    Returns a dict with the context, the cpus and server workers it was computed
+    from, n_jobs (joblib processes/threads), blas_threads (for this process) and
+    inner_blas_threads (for each joblib worker).
+    """
+    if context not in CONTEXTS:
+        raise ValueError(f"Unknown compute context {context!r}; expected one of {', '.join(CONTEXTS)}")
+    cpus = available_cpus() if cpus is None else cpus
+    workers = server_workers() if workers is None else workers
+    share = max(1, cpus // workers)
+    if context == 'training':
+        n_jobs, blas_threads = cpus, cpus
+    elif context == 'serving':
+        n_jobs, blas_threads = 1, share
+    else:  # warmup
+        n_jobs, blas_threads = max(1, share // 2), max(1, share // 2)
+    return {
+        'context': context,
+        'cpus': cpus,
+        'workers': workers,
+        'n_jobs': n_jobs,
+        'blas_threads': blas_threads,
+        'inner_blas_threads': max(1, blas_threads // n_jobs)
+    }
+
+
+def apply(context, cpus=None, workers=None):
+    """Set the process-wide BLAS thread limit for context
+
+    Call once at process start-up (or in each forked server worker); returns the
+    allocation.
+    """
+    from threadpoolctl import threadpool_limits
+
+    limits = allocation(context, cpus, workers)
+    threadpool_limits(limits=limits['blas_threads'], user_api='blas')
+    _process.update(context=context, allocation=limits)
+    return limits
+
+
+@contextmanager
+def budget(context, cpus=None, workers=None):
+    """Run the enclosed block under context's joblib limits (calling thread only)
+
+    joblib Parallel calls with n_jobs=None (and scikit-learn estimators with
+    n_jobs=None) use the allocated n_jobs. The backend is left to each call (some
+    prefer threads); joblib's process workers already cap their own BLAS threads at
+    cpus // n_jobs, which is inner_blas_threads. Yields the allocation.
+    """
+    from joblib import parallel_config
+
+    limits = allocation(context, cpus, workers)
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(limits)
+    try:
+        with parallel_config(n_jobs=limits['n_jobs']):
+            yield limits
+    finally:
+        stack.pop()
+
+
+def current_allocation():
+    """The allocation in effect here: this thread's budget, the process-wide one and BLAS pools
+
+    'blas_pools' lists each loaded BLAS/OpenMP library with its current thread count.
+    """
+    from threadpoolctl import threadpool_info
+
+    stack = getattr(_local, 'stack', [])
+    return {
+        'thread': dict(stack[-1]) if stack else None,
+        'process': dict(_process['allocation']) if _process['allocation'] else None,
+        'blas_pools': [{'library': pool.get('internal_api'), 'threads': pool.get('num_threads')}
+                       for pool in threadpool_info()]
+    }
@@ -3,21 +3,39 @@ Interactive Dashboard for Mobility-AI Displacement Analysis
 =============================================================
 A comprehensive dashboard integrating geographic maps, statistical visualizations,
 and interactive KPIs to explore the relationship between economic mobility and AI displacement risk.
+
+Importing this module has no side effects: the data, the county geometry and the ML
+results load when the app is first built (create_app(), or the first access to the
+module's app/server attributes). Heavy libraries that only some figures need
+(plotly.express, scipy.special, requests) are imported on first use, and Dash is
+imported without its Jupyter integration outside IPython.
 """
 
-import dash
+import json
+import os
+import sys
+import threading
+from importlib import metadata
+
+# Dash imports its Jupyter integration (IPython, requests and more; ~0.4s) whenever
+# IPython is installed, and outside an IPython session it is never used.
+# dash/_jupyter.py try-imports IPython, retrying, comm, nest_asyncio and requests in
+# one block and falls back to no-Jupyter stubs on ImportError, so IPython is hidden
+# while dash is imported. That code path was checked against Dash 4 only; other
+# major versions are imported normally.
+_hide_ipython = 'IPython' not in sys.modules and metadata.version('dash').split('.')[0] == '4'
+if _hide_ipython:
+    sys.modules['IPython'] = None
+try:
+    import dash
+finally:
+    if _hide_ipython:
+        del sys.modules['IPython']
 from dash import dcc, html, Input, Output, State
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 import numpy as np
-from scipy import stats
-import requests
-import json
-import pickle
-import os
-import sys
 
 # Add src directory to path for ML analysis
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -29,108 +47,316 @@ if src_dir not in sys.path:
 # DATA LOADING AND PREPARATION
 # =============================================================================
 
-print("Loading data...")
-# Load data from the processed data directory
-import os
-script_dir = os.path.dirname(os.path.abspath(__file__))
+# Data the figure builders read, filled in once per process by load_dashboard_data()
 data_path = os.path.join(script_dir, '..', '..', 'data', 'processed', 'merged_clean.csv')
-merged_data = pd.read_csv(data_path)
-
-# Ensure proper FIPS formatting
-merged_data['county_fips'] = merged_data['county_fips'].astype(str).str.zfill(5)
-
-# Clean data: remove infinite values and NaNs
-merged_data = merged_data.replace([np.inf, -np.inf], np.nan)
-merged_data = merged_data.dropna(subset=['mobility_score', 'ai_exposure'])
-print(f"Clean dataset: {len(merged_data)} counties")
-
-# Create state-level aggregations
-state_summary = merged_data.groupby('state_name').agg({
-    'mobility_score': 'mean',
-    'ai_exposure': 'mean',
-    'county_fips': 'count'
-}).reset_index()
-state_summary.rename(columns={'county_fips': 'num_counties'}, inplace=True)
-
-# Calculate quadrant categories
-mobility_median = merged_data['mobility_score'].median()
-ai_median = merged_data['ai_exposure'].median()
-
-def categorize_county(row):
-    if row['mobility_score'] < mobility_median and row['ai_exposure'] > ai_median:
-        return 'Double Disadvantage'
-    elif row['mobility_score'] >= mobility_median and row['ai_exposure'] <= ai_median:
-        return 'Safe'
-    elif row['mobility_score'] >= mobility_median and row['ai_exposure'] > ai_median:
-        return 'Tech Disruption'
-    else:
-        return 'Stagnant Protected'
+geojson_url = "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
+geojson_cache_path = os.path.join(script_dir, '..', '..', 'data', 'processed', 'cache', 'geojson-counties-fips.json')
+merged_data = None
+state_summary = None
+mobility_median = None
+ai_median = None
+counties_geojson = None
+_correlation = None
+_data_lock = threading.Lock()
+
+
+def categorize_counties(data):
+    """Risk category of every county, split at the national medians
+    
+    Below-median mobility with above-median AI exposure is 'Double Disadvantage',
+    at-or-above-median mobility with at-or-below-median exposure is 'Safe', and
+    at-or-above-median mobility with above-median exposure is 'Tech Disruption'.
+    Everything else (below-median mobility, at-or-below-median exposure) is
+    'Stagnant Protected'.
+    """
+    low_mobility = data['mobility_score'] < mobility_median
+    high_ai = data['ai_exposure'] > ai_median
+    return np.select([low_mobility & high_ai, ~low_mobility & ~high_ai, ~low_mobility & high_ai],
+                     ['Double Disadvantage', 'Safe', 'Tech Disruption'], default='Stagnant Protected')
+
+
+def load_counties_geojson():
+    """County boundaries GeoJSON, downloaded once and then read from the local cache"""
+    if os.path.exists(geojson_cache_path):
+        with open(geojson_cache_path) as f:
+            return json.load(f)
+    import requests
+    geojson = requests.get(geojson_url).json()
+    os.makedirs(os.path.dirname(geojson_cache_path), exist_ok=True)
+    tmp_path = f'{geojson_cache_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(geojson, f)
+    os.replace(tmp_path, geojson_cache_path)
+    return geojson
+
+
+def load_dashboard_data():
+    """Load the county data, state aggregates and county geometry (once)"""
+    global merged_data, state_summary, mobility_median, ai_median, counties_geojson
+    with _data_lock:
+        if merged_data is not None:
+            return
+        print("Loading data...")
+        # Load data from the processed data directory
+        data = pd.read_csv(data_path)
+        
+        # Ensure proper FIPS formatting
+        data['county_fips'] = data['county_fips'].astype(str).str.zfill(5)
+        
+        # Clean data: remove infinite values and NaNs
+        data = data.replace([np.inf, -np.inf], np.nan)
+        data = data.dropna(subset=['mobility_score', 'ai_exposure'])
+        print(f"Clean dataset: {len(data)} counties")
+        
+        # Create state-level aggregations
+        state_summary = data.groupby('state_name').agg({
+            'mobility_score': 'mean',
+            'ai_exposure': 'mean',
+            'county_fips': 'count'
+        }).reset_index()
+        state_summary.rename(columns={'county_fips': 'num_counties'}, inplace=True)
+        
+        # Calculate quadrant categories
+        mobility_median = data['mobility_score'].median()
+        ai_median = data['ai_exposure'].median()
+        data['category'] = categorize_counties(data)
+        
+        # Load GeoJSON for counties
+        print("Loading geographic data...")
+        counties_geojson = load_counties_geojson()
+        merged_data = data
+        print("Data loaded successfully!")
+
+
+# Load the compact ML summary the charts draw from. When it is missing or stale (built
+# from different data or ML code), the ML results are rebuilt on a background thread so
+# the server starts immediately; the ML section polls get_ml_status() and its charts
+# switch to the new summary once training finishes. The fitted models (the pickle-free
+# ml_results bundle) load lazily on first use; reading them needs only NumPy, so
+# scikit-learn is imported only by the training thread. Under a preforking server each
+# worker runs its own training thread, and a file lock lets only one of them train
+# while the others wait and then load its results.
+ml_summary = None
+processed_dir = os.path.join(script_dir, '..', '..', 'data', 'processed')
+ml_results_path = os.path.join(processed_dir, 'ml_results')
+ml_summary_path = os.path.join(processed_dir, 'ml_summary.json')
+_ml_results = None
+_ml_results_lock = threading.Lock()
+ml_status = {'state': 'idle', 'stage': '', 'progress': 0.0, 'message': '', 'version': 0}
+_ml_status_lock = threading.Lock()
+_ml_training_thread = None
+_ml_training_pid = None
+_ml_rebuild = None  # rf_params/rf_search of a rebuild that is due but not yet done in this process
+ml_training_lock_path = os.path.join(processed_dir, '.ml_training.lock')
+try:
+    import fcntl
+except ImportError:  # Windows: single-process serving only, so no cross-process lock
+    fcntl = None
+import compute_budget
+import run_report
+from decision_thresholds import threshold_metrics
+from results_io import load_results, results_are_current
 
-merged_data['category'] = merged_data.apply(categorize_county, axis=1)
 
-# Load GeoJSON for counties
-print("Loading geographic data...")
-url = "https://raw.githubusercontent.com/plotly/datasets/master/geojson-counties-fips.json"
-counties_geojson = requests.get(url).json()
+def _set_ml_status(**fields):
+    with _ml_status_lock:
+        ml_status.update(fields)
 
-# Calculate correlation statistics
-pearson_r, p_value = stats.pearsonr(merged_data['mobility_score'], merged_data['ai_exposure'])
 
-# Load or run ML analysis
-ml_results = None
-ml_results_path = os.path.join(script_dir, '..', '..', 'data', 'processed', 'ml_results.pkl')
-if os.path.exists(ml_results_path):
+def get_ml_status():
+    """Snapshot of the ML training status: state ('idle', 'training', 'ready' or
+    'failed'), current stage, fraction done, message and results version"""
+    with _ml_status_lock:
+        return dict(ml_status)
+
+
+def _read_ml_summary():
+    """ml_summary.json if it exists and was built from the current data and ML code, else None"""
+    if not os.path.exists(ml_summary_path):
+        return None
+    with open(ml_summary_path) as f:
+        summary = json.load(f)
+    return summary if results_are_current(summary, merged_data) else None
+
+
+def _train_ml_results(rf_params=None, rf_search=None):
+    """Rebuild, save and publish the ML results (runs on the training thread)
+    
+    Holds the training file lock throughout. A worker that waited on it finds a
+    current summary written by the worker that trained, and publishes that instead.
+    """
+    global ml_summary, _ml_results, _ml_rebuild
+    os.makedirs(processed_dir, exist_ok=True)
+    with open(ml_training_lock_path, 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            summary = _read_ml_summary()
+        except Exception:
+            summary = None
+        if summary is None:
+            summary = _build_ml_summary(rf_params, rf_search)
+            if summary is None:
+                return
+    # Publish with single rebindings under the results lock, so a request sees either
+    # the previous results or the new ones, never a mix
+    with _ml_results_lock:
+        _ml_results = None
+        ml_summary = summary
+        _ml_rebuild = None
+    with _ml_status_lock:
+        ml_status.update(state='ready', stage='Done', progress=1.0, message='', version=ml_status['version'] + 1)
+    print("ML analysis completed and saved!")
+
+
+def _build_ml_summary(rf_params=None, rf_search=None):
+    """Train, save and summarize the ML results; None (with a failed status) on error
+    
+    rf_search, the Random Forest search that chose rf_params, is saved with the new
+    results so a rebuild keeps its history and summary.
+    """
     try:
-        print("Loading ML analysis results...")
-        with open(ml_results_path, 'rb') as f:
-            ml_results = pickle.load(f)
-        print("ML results loaded successfully!")
-    except Exception as e:
-        print(f"Error loading ML results: {e}")
-        ml_results = None
-else:
-    print("ML results not found. Running ML analysis...")
+        from ml_analysis import build_ml_results, build_ml_summary, save_ml_results
+    except ImportError as ie:
+        print(f"ERROR: Could not import ml_analysis module: {ie}")
+        print("If scikit-learn is missing, please run: pip install scikit-learn")
+        _set_ml_status(state='failed', message=f"ML analysis requires scikit-learn ({ie}). "
+                                               "Install it with: pip install scikit-learn")
+        return None
     try:
-        try:
-            import sklearn
-        except ImportError:
-            print("ERROR: scikit-learn is not installed. Please run: pip install scikit-learn")
-            ml_results = None
-        else:
-            try:
-                from ml_analysis import run_ml_analysis
-            except ImportError as ie:
-                print(f"ERROR: Could not import ml_analysis module: {ie}")
-                ml_results = None
-            else:
-                try:
-                    results_dict, feature_names, X_test, y_test, scaler = run_ml_analysis(merged_data)
-                    ml_results = {
-                        'results': results_dict,
-                        'feature_names': feature_names,
-                        'X_test': X_test,
-                        'y_test': y_test
-                    }
-                    with open(ml_results_path, 'wb') as f:
-                        pickle.dump(ml_results, f)
-                    print("ML analysis completed and saved!")
-                except Exception as e:
-                    import traceback
-                    print(f"Error running ML analysis: {e}")
-                    traceback.print_exc()
-                    ml_results = None
+        # Unchanged stages (features, splits, fitted models) are reused from the artifact store.
+        # Training shares the process with request serving, so it runs on the warm-up budget
+        with compute_budget.budget('warmup'), run_report.recording('dashboard rebuild') as report:
+            ml_results = build_ml_results(merged_data, rf_params=rf_params, rf_search=rf_search,
+                                          progress=lambda stage, done: _set_ml_status(stage=stage, progress=done))
+            save_ml_results(ml_results, processed_dir)
+        report.write(processed_dir)
+        return build_ml_summary(ml_results)
     except Exception as e:
         import traceback
-        print(f"Unexpected error in ML analysis setup: {e}")
+        print(f"Error running ML analysis: {e}")
         traceback.print_exc()
-        ml_results = None
+        _set_ml_status(state='failed', message=f"Error running ML analysis: {e}")
+        return None
+
+
+def start_ml_training(rf_params=None, rf_search=None):
+    """Start rebuilding the ML results on a background thread (no-op if one is running)"""
+    global _ml_training_thread, _ml_training_pid
+    with _ml_status_lock:
+        if (_ml_training_thread is not None and _ml_training_thread.is_alive()
+                and _ml_training_pid == os.getpid()):
+            return _ml_training_thread
+        ml_status.update(state='training', stage='Starting', progress=0.0, message='')
+        _ml_training_thread = threading.Thread(target=_train_ml_results, args=(rf_params, rf_search),
+                                               name='ml-training', daemon=True)
+        _ml_training_pid = os.getpid()
+    _ml_training_thread.start()
+    return _ml_training_thread
+
+
+def ensure_ml_training():
+    """Start a due ML rebuild in this process, once (a before_request hook)
+    
+    Threads do not survive fork, so a rebuild found due in a preforking server's
+    master starts in each worker on its first request.
+    """
+    if _ml_rebuild is not None and _ml_training_pid != os.getpid():
+        start_ml_training(_ml_rebuild.get('rf_params'), _ml_rebuild.get('rf_search'))
+
+
+def _read_rf_search(manifest):
+    """The rf_search saved in the results bundle built from manifest, or None
+    
+    Only bundles trained with searched Random Forest parameters have one.
+    """
+    if not manifest.get('rf_params'):
+        return None
+    try:
+        previous = load_results(ml_results_path, mmap=False)
+    except Exception as e:
+        print(f"Could not read the previous Random Forest search: {e}")
+        return None
+    return previous.get('rf_search') if previous.get('manifest') == manifest else None
+
+
+def load_ml_summary():
+    """Load ml_summary.json, or mark an ML rebuild as due when it is missing or stale"""
+    global ml_summary, _ml_rebuild
+    if ml_summary is not None or _ml_rebuild is not None:
+        return
+    previous_manifest = {}
+    if os.path.exists(ml_summary_path):
+        try:
+            print("Loading ML analysis summary...")
+            with open(ml_summary_path) as f:
+                ml_summary = json.load(f)
+        except Exception as e:
+            print(f"Error loading ML summary: {e}")
+            ml_summary = None
+        if ml_summary is not None and not results_are_current(ml_summary, merged_data):
+            print("ML results are stale (built from different data or ML code). Rebuilding in the background...")
+            previous_manifest = ml_summary.get('manifest') or {}
+            ml_summary = None
+        elif ml_summary is not None:
+            print("ML summary loaded successfully!")
+            _set_ml_status(state='ready', progress=1.0)
+    else:
+        print("ML results not found. Running ML analysis in the background...")
+    
+    if ml_summary is None:
+        _ml_rebuild = {'rf_params': previous_manifest.get('rf_params'),
+                       'rf_search': _read_rf_search(previous_manifest)}
+        _set_ml_status(state='training', stage='Starting', progress=0.0, message='')
+
+
+def get_ml_results():
+    """Full ML results with array-backed models, memory-mapped from the bundle on first use
+    
+    Only features that run inference need this; the charts use ml_summary.
+    """
+    global _ml_results
+    if _ml_results is None and ml_summary is not None:
+        with _ml_results_lock:
+            if _ml_results is None:
+                results = load_results(ml_results_path)
+                if results.get('manifest') != ml_summary.get('manifest'):
+                    raise RuntimeError("ml_results bundle does not match ml_summary.json; re-run src/ml_analysis.py")
+                _ml_results = results
+    return _ml_results
 
-print("Data loaded successfully!")
 
 # =============================================================================
 # VISUALIZATION FUNCTIONS
 # =============================================================================
 
+def linear_fit(x, y):
+    """Least-squares line of y on x with its Pearson correlation
+    
+    Returns (slope, intercept, r, two-sided p-value), the values scipy.stats.linregress
+    gives, computed with NumPy and scipy.special (scipy.stats takes about a second to
+    import, which the first page load would pay).
+    """
+    from scipy.special import stdtr
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    dx, dy = x - x.mean(), y - y.mean()
+    sxx, syy, sxy = dx @ dx, dy @ dy, dx @ dy
+    slope = sxy / sxx
+    r = np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0)
+    dof = len(x) - 2
+    with np.errstate(divide='ignore'):
+        t = r * np.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+    return float(slope), float(y.mean() - slope * x.mean()), float(r), float(2 * stdtr(dof, -abs(t)))
+
+
+def correlation_stats():
+    """Pearson r and p-value of mobility vs AI exposure across counties (computed once)"""
+    global _correlation
+    if _correlation is None:
+        _correlation = linear_fit(merged_data['mobility_score'], merged_data['ai_exposure'])[2:]
+    return _correlation
+
+
 def create_kpi_cards():
     """Create KPI summary cards"""
     
@@ -143,6 +369,7 @@ def create_kpi_cards():
     dd_pct = (double_disadvantage / total_counties) * 100
     
     # Correlation strength
+    pearson_r, p_value = correlation_stats()
     corr_strength = abs(pearson_r)
     
     cards = dbc.Row([
@@ -217,6 +444,7 @@ def create_kpi_cards():
 
 def create_choropleth_map(selected_metric='category'):
     """Create interactive choropleth map"""
+    import plotly.express as px
     
     if selected_metric == 'category':
         color_map = {
@@ -318,6 +546,51 @@ def create_choropleth_map(selected_metric='category'):
             },
             title='Economic Mobility Score by County'
         )
+    elif selected_metric == 'predicted_risk':
+        # Out-of-fold cross-validation probabilities, so no county is colored by a
+        # model that was fit on it; the batch scores (mostly in-sample) are only a
+        # fallback for bundles built without cross-validation
+        ml_results = get_ml_results()
+        if ml_results is None or 'county_scores' not in ml_results:
+            fig = go.Figure()
+            fig.add_annotation(
+                text="Predicted risk will appear once the ML models finish training.",
+                xref="paper", yref="paper", x=0.5, y=0.5,
+                showarrow=False, font=dict(size=12, color="gray")
+            )
+            fig.update_layout(title='Predicted Double Disadvantage Risk')
+        else:
+            cv = ml_results.get('cross_validation')
+            if cv is not None and 'county_fips' in cv.get('oof_predictions', ()):
+                # Color by the model with the best pooled out-of-fold ROC-AUC
+                oof_auc = cv['oof_roc_auc']
+                best_model = max(oof_auc, key=oof_auc.get)
+                scores = cv['oof_predictions'][['county_fips', best_model]]
+                risk_label, source = 'Out-of-fold Risk', 'out-of-fold'
+            else:
+                # Color by the model with the best held-out ROC-AUC
+                best_model = max(ml_summary['models'], key=lambda name: ml_summary['models'][name]['roc_auc'])
+                scores = ml_results['county_scores'][['county_fips', best_model]]
+                risk_label, source = 'Predicted Risk<br>(in-sample)', 'in-sample, no cross-validation results'
+            risk_data = merged_data.merge(scores.rename(columns={best_model: 'predicted_risk'}),
+                                          on='county_fips', how='left')
+            fig = px.choropleth(
+                risk_data,
+                geojson=counties_geojson,
+                locations='county_fips',
+                color='predicted_risk',
+                color_continuous_scale='Reds',
+                range_color=(0, 1),
+                hover_data={
+                    'county_name': True,
+                    'state_name': True,
+                    'predicted_risk': ':.1%',
+                    'category': True,
+                    'county_fips': False
+                },
+                labels={'predicted_risk': risk_label},
+                title=f'Predicted Double Disadvantage Risk ({best_model}, {source})'
+            )
     else:  # ai_exposure
         fig = px.choropleth(
             merged_data,
@@ -363,9 +636,7 @@ def create_scatter_plot(level='state', selected_state=None):
         title = 'State-Level: Mobility vs AI Exposure'
         
         # Calculate regression
-        slope, intercept, r_value, p_val, std_err = stats.linregress(
-            data[x_col], data[y_col]
-        )
+        slope, intercept, r_value, p_val = linear_fit(data[x_col], data[y_col])
         
     else:  # county level
         if selected_state == 'All States' or selected_state is None:
@@ -382,9 +653,7 @@ def create_scatter_plot(level='state', selected_state=None):
             title = f'{selected_state}: County-Level Mobility vs AI Exposure'
         
         if len(data) >= 3:
-            slope, intercept, r_value, p_val, std_err = stats.linregress(
-                data[x_col], data[y_col]
-            )
+            slope, intercept, r_value, p_val = linear_fit(data[x_col], data[y_col])
         else:
             slope = intercept = r_value = p_val = None
     
@@ -633,30 +902,113 @@ def create_category_breakdown():
     return fig
 
 
-def create_ml_model_comparison(selected_model='Logistic Regression'):
-    """Create ML model comparison visualization with toggleable models"""
+# Row of each county in the precomputed explanation arrays, rebuilt when the ML results change
+_explanation_index = {'source': None, 'rows': {}}
+
+
+def _explanation_row(explanations, county_fips):
+    if _explanation_index['source'] is not explanations:
+        _explanation_index['rows'] = {fips: i for i, fips in enumerate(explanations['county_fips'])}
+        _explanation_index['source'] = explanations
+    return _explanation_index['rows'].get(county_fips)
+
+
+def create_county_detail(county_fips, model_name):
+    """County detail panel: inputs, every model's predicted risk and one model's feature contributions
+    
+    Contributions are precomputed for all counties at training time, so this only
+    looks up one row.
+    """
+    if county_fips is None:
+        return html.P("Click a county on the map to see why the models flag it.", className="text-muted mb-0")
+    county = merged_data[merged_data['county_fips'] == county_fips]
+    if county.empty:
+        return html.P(f"No data for county {county_fips}.", className="text-muted mb-0")
+    county = county.iloc[0]
+    details = [
+        html.H6(f"{county['county_name']}, {county['state_name']}", className="fw-bold mb-1"),
+        html.P(f"{county['category']} · mobility {county['mobility_score']:.3f} · "
+               f"AI exposure {county['ai_exposure']:.3f}", className="text-muted mb-2", style={"fontSize": "0.9rem"})
+    ]
+    
+    ml_results = get_ml_results()
+    if ml_results is None or 'explanations' not in ml_results:
+        return details + [html.P("Model explanations will appear once the ML models finish training.",
+                                 className="text-muted mb-0")]
+    
+    scores = ml_results['county_scores']
+    score_row = scores[scores['county_fips'] == county_fips]
+    if not score_row.empty:
+        details.append(html.P(" · ".join(f"{name}: {score_row.iloc[0][name]:.1%}" for name in ml_results['results']),
+                              className="mb-2", style={"fontSize": "0.85rem"}))
+    
+    explanations = ml_results['explanations']
+    row = _explanation_row(explanations, county_fips)
+    if row is None or model_name not in explanations['models']:
+        return details
+    explanation = explanations['models'][model_name]
+    contributions = np.asarray(explanation['contributions'][row])
+    order = np.argsort(np.abs(contributions))
+    log_odds = explanation['units'] == 'log-odds'
+    output = explanation['bias'] + contributions.sum()
+    
+    fig = go.Figure(go.Bar(
+        x=contributions[order],
+        y=[explanations['feature_names'][i] for i in order],
+        orientation='h',
+        marker_color=['#d62728' if value > 0 else '#1f77b4' for value in contributions[order]],
+        hovertemplate='%{y}: %{x:+.3f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=dict(text=f"{model_name}: {'log-odds' if log_odds else 'probability'} "
+                        f"{explanation['bias']:+.3f} (baseline) → {output:+.3f}", font=dict(size=13)),
+        xaxis_title='Contribution (red raises risk, blue lowers it)',
+        height=360,
+        template='plotly_white',
+        margin=dict(l=150, r=20, t=50, b=50),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,1)'
+    )
+    return details + [dcc.Graph(figure=fig, config={'displayModeBar': False})]
+
+
+def create_ml_status_panel(status):
+    """Progress/status panel shown in the ML section while models train in the background"""
+    if status['state'] == 'training':
+        percent = int(round(100 * status['progress']))
+        return dbc.Alert([
+            html.Div([
+                dbc.Spinner(size="sm", spinner_class_name="me-2"),
+                html.Span(f"Training ML models in the background: {status['stage']}...")
+            ], className="d-flex align-items-center mb-2"),
+            dbc.Progress(value=max(percent, 5), label=f"{percent}%", striped=True, animated=True)
+        ], color="info", className="mb-3")
+    if status['state'] == 'failed':
+        return dbc.Alert(status['message'] or "ML analysis failed; check the console for details.",
+                         color="danger", className="mb-3")
+    return None
+
+
+def create_ml_model_comparison(selected_model='Logistic Regression', threshold=0.5):
+    """Create ML model comparison visualization with toggleable models
     
-    if ml_results is None:
-        try:
-            import sklearn
-            sklearn_available = True
-        except ImportError:
-            sklearn_available = False
-        
+    The confusion matrix and the marked ROC/precision-recall operating points are for
+    the given decision threshold, looked up in the model's precomputed threshold table.
+    """
+    
+    if ml_summary is None:
+        status = get_ml_status()
         fig = go.Figure()
-        if not sklearn_available:
+        if status['state'] == 'failed':
             error_msg = (
-                "ML analysis requires scikit-learn.<br><br>" +
-                "Please install it by running:<br>" +
-                "<code>pip install scikit-learn</code><br><br>" +
-                "Then restart the dashboard."
+                "ML analysis results not available.<br><br>" +
+                f"{status['message']}<br><br>" +
+                "Check the console for details, then restart the dashboard."
             )
         else:
             error_msg = (
-                "ML analysis results not available.<br><br>" +
-                "The ML analysis will run automatically when the dashboard loads.<br>" +
-                "This may take a few moments...<br><br>" +
-                "If this message persists, check the console for error messages."
+                "ML models are training in the background.<br><br>" +
+                "This chart will update automatically when they're ready."
             )
         
         fig.add_annotation(
@@ -677,27 +1029,29 @@ def create_ml_model_comparison(selected_model='Logistic Regression'):
         )
         return fig
     
-    results = ml_results['results']
+    results = ml_summary['models']
     
     if selected_model not in results:
         selected_model = 'Logistic Regression'
     
     model_data = results[selected_model]
+    operating_point = threshold_metrics(model_data['threshold_table'], threshold)
     
-    # Create subplot with confusion matrix and ROC curve
+    # Create subplot with confusion matrix, ROC curve and precision-recall curve
     from plotly.subplots import make_subplots
     
     fig = make_subplots(
-        rows=1, cols=2,
-        subplot_titles=('Confusion Matrix', 'ROC Curve'),
-        column_widths=[0.5, 0.5],
-        specs=[[{"type": "heatmap"}, {"type": "scatter"}]],
-        horizontal_spacing=0.2
+        rows=1, cols=3,
+        subplot_titles=(f'Confusion Matrix (threshold {threshold:.2f})', 'ROC Curve', 'Precision-Recall Curve'),
+        column_widths=[0.34, 0.33, 0.33],
+        specs=[[{"type": "heatmap"}, {"type": "scatter"}, {"type": "scatter"}]],
+        horizontal_spacing=0.12
     )
     
     # Confusion Matrix
-    cm = model_data['confusion_matrix']
-    cm_percent = (cm.astype('float') / cm.sum(axis=1)[:, np.newaxis] * 100).round(1)
+    cm = np.array(operating_point['confusion_matrix'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cm_percent = np.nan_to_num(cm.astype('float') / cm.sum(axis=1)[:, np.newaxis] * 100).round(1)
     
     labels = ['Not Double Disadvantage', 'Double Disadvantage']
     
@@ -713,14 +1067,13 @@ def create_ml_model_comparison(selected_model='Logistic Regression'):
             textfont={"size": 13},
             colorscale='Blues',
             showscale=True,
-            colorbar=dict(title="Count", x=0.42, len=0.6)
+            colorbar=dict(title="Count", x=0.27, len=0.6)
         ),
         row=1, col=1
     )
     
-    # ROC Curve
-    from sklearn.metrics import roc_curve
-    fpr, tpr, _ = roc_curve(model_data['true_labels'], model_data['probabilities'])
+    # ROC Curve (precomputed and downsampled at training time)
+    fpr, tpr = model_data['roc']['fpr'], model_data['roc']['tpr']
     auc_score = model_data['roc_auc']
     
     fig.add_trace(
@@ -748,6 +1101,53 @@ def create_ml_model_comparison(selected_model='Logistic Regression'):
         ),
         row=1, col=2
     )
+    fig.add_trace(
+        go.Scatter(
+            x=[operating_point['fpr']],
+            y=[operating_point['recall']],
+            mode='markers',
+            name=f'Threshold {threshold:.2f}',
+            marker=dict(size=12, color='#d62728', line=dict(width=2, color='white')),
+            hovertemplate='FPR = %{x:.3f}<br>TPR = %{y:.3f}<extra></extra>'
+        ),
+        row=1, col=2
+    )
+    
+    # Precision-recall curve (precomputed and downsampled at training time); the
+    # lowest-threshold point predicts every county positive, so its precision is the
+    # share of Double Disadvantage counties, i.e. a random classifier's precision
+    recall, precision = model_data['pr']['recall'], model_data['pr']['precision']
+    fig.add_trace(
+        go.Scatter(
+            x=recall,
+            y=precision,
+            mode='lines',
+            name=f'{selected_model}<br>Precision-Recall',
+            line=dict(width=3, color='#ff7f0e')
+        ),
+        row=1, col=3
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=[0, 1],
+            y=[precision[-1], precision[-1]],
+            mode='lines',
+            name=f'Random<br>Precision = {precision[-1]:.3f}',
+            line=dict(dash='dot', color='gray', width=2)
+        ),
+        row=1, col=3
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=[operating_point['recall']],
+            y=[operating_point['precision']],
+            mode='markers',
+            marker=dict(size=12, color='#d62728', line=dict(width=2, color='white')),
+            showlegend=False,
+            hovertemplate='Recall = %{x:.3f}<br>Precision = %{y:.3f}<extra></extra>'
+        ),
+        row=1, col=3
+    )
     
     # Update layout with better spacing
     fig.update_layout(
@@ -764,6 +1164,8 @@ def create_ml_model_comparison(selected_model='Logistic Regression'):
     fig.update_yaxes(title_text="True Label", row=1, col=1, title_font=dict(size=12))
     fig.update_xaxes(title_text="False Positive Rate", row=1, col=2, title_font=dict(size=12))
     fig.update_yaxes(title_text="True Positive Rate", row=1, col=2, title_font=dict(size=12))
+    fig.update_xaxes(title_text="Recall", row=1, col=3, title_font=dict(size=12))
+    fig.update_yaxes(title_text="Precision", row=1, col=3, range=[0, 1.05], title_font=dict(size=12))
     
     # Update subplot titles with better spacing
     fig.update_annotations(font_size=13, yshift=15)
@@ -772,12 +1174,16 @@ def create_ml_model_comparison(selected_model='Logistic Regression'):
 
 
 def create_ml_performance_comparison():
-    """Create performance metrics comparison across all models"""
+    """Create performance metrics comparison across all models, with 95% bootstrap CIs as error bars"""
     
-    if ml_results is None:
-        return None
+    if ml_summary is None:
+        # Blank until the background training publishes results
+        fig = go.Figure()
+        fig.update_layout(height=500, xaxis=dict(visible=False), yaxis=dict(visible=False),
+                          paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        return fig
     
-    results = ml_results['results']
+    results = ml_summary['models']
     
     # Extract metrics for all models
     models = list(results.keys())
@@ -804,13 +1210,24 @@ def create_ml_performance_comparison():
         'ROC-AUC': '#9467bd'         # Purple
     }
     
+    metric_keys = {'Accuracy': 'accuracy', 'Precision': 'precision', 'Recall': 'recall',
+                   'F1-Score': 'f1', 'ROC-AUC': 'roc_auc'}
+    
     for metric in ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC']:
+        # Asymmetric error bars from the percentile bootstrap interval [low, high]
+        intervals = np.array([results[m].get('confidence_intervals', {}).get(metric_keys[metric], [np.nan, np.nan])
+                              for m in models], dtype=float)
         fig.add_trace(go.Bar(
             name=metric,
             x=df['Model'],
             y=df[metric],
             marker_color=metric_colors[metric],  # Same color for all bars of this metric
-            opacity=0.8
+            opacity=0.8,
+            error_y=dict(type='data', symmetric=False, array=intervals[:, 1] - df[metric],
+                         arrayminus=df[metric] - intervals[:, 0], thickness=1, width=2),
+            customdata=intervals,
+            hovertemplate=f'<b>%{{x}}</b><br>{metric} = %{{y:.3f}}<br>95% CI [%{{customdata[0]:.3f}}, '
+                          f'%{{customdata[1]:.3f}}]<extra></extra>'
         ))
     
     fig.update_layout(
@@ -846,6 +1263,224 @@ def create_ml_performance_comparison():
     return fig
 
 
+def create_spatial_cv_chart():
+    """Create side-by-side in-sample vs out-of-state cross-validation metrics per model"""
+    
+    if ml_summary is None or 'spatial_cross_validation' not in ml_summary or 'cross_validation' not in ml_summary:
+        fig = go.Figure()
+        fig.add_annotation(
+            text="Spatial cross-validation not available.<br><br>" +
+                 "Re-run <code>python src/ml_analysis.py</code> to compute it.",
+            xref="paper", yref="paper",
+            x=0.5, y=0.5,
+            showarrow=False,
+            font=dict(size=12, color="gray")
+        )
+        fig.update_layout(
+            title='In-Sample vs Out-of-State Performance',
+            height=450,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,1)'
+        )
+        return fig
+    
+    from plotly.subplots import make_subplots
+    
+    evaluations = [
+        ('In-sample states (stratified CV)', ml_summary['cross_validation'], '#1f77b4'),
+        ('Out-of-state (leave-states-out CV)', ml_summary['spatial_cross_validation'], '#d62728')
+    ]
+    models = list(ml_summary['cross_validation']['metrics'])
+    metrics = [('roc_auc', 'ROC-AUC'), ('f1', 'F1-Score')]
+    
+    fig = make_subplots(rows=1, cols=2, subplot_titles=[label for _, label in metrics], horizontal_spacing=0.08)
+    for col, (metric, label) in enumerate(metrics, start=1):
+        for name, cv, color in evaluations:
+            fig.add_trace(go.Bar(
+                name=name,
+                x=models,
+                y=[cv['metrics'][m][metric]['mean'] for m in models],
+                error_y=dict(type='data', array=[cv['metrics'][m][metric]['std'] for m in models],
+                             visible=True, thickness=1),
+                marker_color=color,
+                opacity=0.85,
+                showlegend=col == 1,
+                legendgroup=name,
+                hovertemplate=f'<b>%{{x}}</b><br>{name}<br>{label} = %{{y:.3f}}<extra></extra>'
+            ), row=1, col=col)
+    
+    spatial = ml_summary['spatial_cross_validation']
+    fig.update_layout(
+        title=f'In-Sample vs Out-of-State Performance ({spatial["n_states"]} states in {spatial["n_splits"]} folds)',
+        barmode='group',
+        height=450,
+        template='plotly_white',
+        legend=dict(orientation='h', yanchor='bottom', y=1.08, xanchor='right', x=1),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,1)',
+        margin=dict(t=110)
+    )
+    fig.update_yaxes(range=[0, 1], title_text='Score (mean ± std over folds)', row=1, col=1)
+    fig.update_yaxes(range=[0, 1], row=1, col=2)
+    fig.update_xaxes(tickangle=-20)
+    return fig
+
+
+def create_permutation_importance_chart():
+    """Create grouped bar chart of permutation importance (ROC-AUC drop) per model"""
+    
+    importance = ml_summary.get('permutation_importance') if ml_summary is not None else None
+    if importance is None:
+        fig = go.Figure()
+        fig.add_annotation(
+            text="Permutation importance not available.<br><br>" +
+                 "Re-run <code>python src/ml_analysis.py</code> to compute it.",
+            xref="paper", yref="paper",
+            x=0.5, y=0.5,
+            showarrow=False,
+            font=dict(size=12, color="gray")
+        )
+        fig.update_layout(
+            title='Permutation Feature Importance',
+            height=450,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,1)'
+        )
+        return fig
+    
+    features = importance['feature_names']
+    models = importance['models']
+    # Most important features (averaged over models) first
+    order = np.argsort(-np.mean([models[name]['mean'] for name in models], axis=0))
+    
+    fig = go.Figure()
+    for name, values in models.items():
+        mean, std = np.asarray(values['mean'])[order], np.asarray(values['std'])[order]
+        fig.add_trace(go.Bar(
+            name=name,
+            x=[features[i] for i in order],
+            y=mean,
+            error_y=dict(type='data', array=std, visible=True, thickness=1),
+            hovertemplate=f'<b>{name}</b><br>%{{x}}<br>ROC-AUC drop = %{{y:.3f}}<extra></extra>'
+        ))
+    
+    fig.update_layout(
+        title=f'Permutation Feature Importance (test set, {importance["n_repeats"]} repeats)',
+        barmode='group',
+        xaxis_title='Feature',
+        yaxis_title='Drop in ROC-AUC when permuted',
+        height=450,
+        template='plotly_white',
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,1)',
+        margin=dict(t=100)
+    )
+    return fig
+
+
+def create_regularization_path_chart(penalty='l1'):
+    """Create coefficient path and CV score chart for the L1/L2 logistic models"""
+    
+    from plotly.subplots import make_subplots
+    
+    path = ml_summary.get('regularization_path') if ml_summary is not None else None
+    if path is None or penalty not in path['paths']:
+        fig = go.Figure()
+        fig.add_annotation(
+            text="Regularization path not available.<br><br>" +
+                 "Re-run <code>python src/ml_analysis.py</code> to compute it.",
+            xref="paper", yref="paper",
+            x=0.5, y=0.5,
+            showarrow=False,
+            font=dict(size=12, color="gray")
+        )
+        fig.update_layout(
+            title='Regularization Path',
+            height=500,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,1)'
+        )
+        return fig
+    
+    Cs = np.asarray(path['Cs'])
+    info = {name: np.asarray(value) if isinstance(value, list) else value
+            for name, value in path['paths'][penalty].items()}
+    label = 'Lasso (L1)' if penalty == 'l1' else 'Ridge (L2)'
+    
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        row_heights=[0.7, 0.3],
+        vertical_spacing=0.08,
+        subplot_titles=('Coefficient Path', 'Cross-Validated ROC-AUC')
+    )
+    
+    for j, feature in enumerate(path['feature_names']):
+        fig.add_trace(
+            go.Scatter(
+                x=Cs,
+                y=info['coef_path'][:, j],
+                mode='lines',
+                name=feature,
+                hovertemplate=f'<b>{feature}</b><br>C = %{{x:.3g}}<br>Coefficient = %{{y:.3f}}<extra></extra>'
+            ),
+            row=1, col=1
+        )
+    
+    # Mean CV score with a ±1 std band across folds
+    mean_score = info['mean_cv_score']
+    std_score = info['cv_scores'].std(axis=0)
+    fig.add_trace(
+        go.Scatter(
+            x=np.concatenate([Cs, Cs[::-1]]),
+            y=np.concatenate([mean_score + std_score, (mean_score - std_score)[::-1]]),
+            fill='toself',
+            fillcolor='rgba(148,103,189,0.2)',
+            line=dict(color='rgba(148,103,189,0)'),
+            hoverinfo='skip',
+            showlegend=False
+        ),
+        row=2, col=1
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=Cs,
+            y=mean_score,
+            mode='lines+markers',
+            name='CV ROC-AUC',
+            line=dict(color='#9467bd', width=2),
+            showlegend=False,
+            hovertemplate='C = %{x:.3g}<br>ROC-AUC = %{y:.3f}<extra></extra>'
+        ),
+        row=2, col=1
+    )
+    fig.add_vline(x=info['best_C'], line_dash="dash", line_color="gray")
+    
+    fig.update_layout(
+        title=dict(text=f'{label}: best C = {info["best_C"]:.3g}', font=dict(size=14)),
+        height=500,
+        template='plotly_white',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,1)',
+        legend=dict(font=dict(size=10)),
+        margin=dict(l=70, r=30, t=80, b=60)
+    )
+    fig.update_xaxes(type='log', row=1, col=1)
+    fig.update_xaxes(type='log', title_text="Inverse Regularization Strength C", row=2, col=1)
+    fig.update_yaxes(title_text="Coefficient", row=1, col=1)
+    fig.update_yaxes(title_text="ROC-AUC", row=2, col=1)
+    fig.update_annotations(font_size=13)
+    
+    return fig
+
+
 def create_ranking_table(level='state', metric='mobility_score', ranking_type='top', state_filter='all', top_n=10):
     """Create state or county ranking table"""
     
@@ -948,384 +1583,629 @@ def create_ranking_table(level='state', metric='mobility_score', ranking_type='t
 
 
 # =============================================================================
-# DASH APP INITIALIZATION
+# APP LAYOUT
 # =============================================================================
 
-app = dash.Dash(
-    __name__,
-    external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.FONT_AWESOME],
-    suppress_callback_exceptions=True
-)
+def create_layout():
+    """Page layout; every figure is drawn by a callback when the page loads"""
+    return dbc.Container([
+        dcc.Location(id='url'),
 
-app.title = "Mobility-AI Displacement Dashboard"
+        # Header
+        dbc.Row([
+            dbc.Col([
+                html.H1("Socioeconomic Mobility & AI Displacement Analysis", 
+                       className="text-primary mb-2"),
+                html.P("Interactive dashboard exploring the relationship between economic mobility and AI-driven job displacement risk across U.S. counties",
+                      className="lead text-muted"),
+                html.Div([
+                    html.P([
+                        html.Strong("Hypothesis: ", className="text-dark"),
+                        html.Span("Counties with historically low intergenerational economic mobility will exhibit significantly higher AI job displacement risk creating a 'double disadvantage' where technology reinforces existing patterns of limited economic opportunity.",
+                                 className="text-muted")
+                    ], className="mb-2", style={"fontStyle": "italic", "fontSize": "0.95rem"})
+                ]),
+                html.P("Created by Cesar Monagas and London Chamberlain",
+                      className="text-muted mb-3", style={"fontStyle": "italic"}),
+                html.Hr()
+            ])
+        ], className="mt-4 mb-3"),
 
-# =============================================================================
-# APP LAYOUT
-# =============================================================================
+        # KPI Cards
+        html.Div(id='kpi-cards'),
 
-app.layout = dbc.Container([
-    # Header
-    dbc.Row([
-        dbc.Col([
-            html.H1("Socioeconomic Mobility & AI Displacement Analysis", 
-                   className="text-primary mb-2"),
-            html.P("Interactive dashboard exploring the relationship between economic mobility and AI-driven job displacement risk across U.S. counties",
-                  className="lead text-muted"),
-            html.Div([
-                html.P([
-                    html.Strong("Hypothesis: ", className="text-dark"),
-                    html.Span("Counties with historically low intergenerational economic mobility will exhibit significantly higher AI job displacement risk creating a 'double disadvantage' where technology reinforces existing patterns of limited economic opportunity.",
-                             className="text-muted")
-                ], className="mb-2", style={"fontStyle": "italic", "fontSize": "0.95rem"})
-            ]),
-            html.P("Created by Cesar Monagas and London Chamberlain",
-                  className="text-muted mb-3", style={"fontStyle": "italic"}),
-            html.Hr()
-        ])
-    ], className="mt-4 mb-3"),
-    
-    # KPI Cards
-    html.Div(id='kpi-cards'),
-    
-    # Main Content - Row 1: Map and Controls
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5("Geographic Visualization", className="mb-0"),
-                ]),
-                dbc.CardBody([
-                    dbc.Row([
-                        dbc.Col([
-                            html.Label("Select Metric:", className="fw-bold"),
+        # Main Content - Row 1: Map and Controls
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Geographic Visualization", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                html.Label("Select Metric:", className="fw-bold"),
+                                dcc.Dropdown(
+                                    id='map-metric-dropdown',
+                                    options=[
+                                        {'label': 'County Classification', 'value': 'category'},
+                                        {'label': 'County Classification (Intensity)', 'value': 'category_intensity'},
+                                        {'label': 'Mobility Score', 'value': 'mobility_score'},
+                                        {'label': 'AI Exposure', 'value': 'ai_exposure'},
+                                        {'label': 'Predicted Double Disadvantage Risk', 'value': 'predicted_risk'}
+                                    ],
+                                    value='category',
+                                    clearable=False
+                                )
+                            ], width=12)
+                        ], className="mb-2"),
+
+                        # Classification Legend (shown only for County Classification view)
+                        html.Div(id='classification-legend', children=[
+                            html.Div([
+                                html.Strong("Classification Guide: ", style={'fontSize': '0.9rem'}),
+                                html.Span([
+                                    html.Span("● ", style={'color': '#d62728', 'fontSize': '1.2rem', 'fontWeight': 'bold'}),
+                                    html.Span("Double Disadvantage", style={'fontWeight': 'bold', 'color': '#d62728'}),
+                                    html.Span(" - Low mobility + High AI risk", style={'fontSize': '0.85rem', 'color': '#666'})
+                                ], style={'marginRight': '15px', 'display': 'inline-block'}),
+                                html.Span([
+                                    html.Span("● ", style={'color': '#ff7f0e', 'fontSize': '1.2rem', 'fontWeight': 'bold'}),
+                                    html.Span("Tech Disruption", style={'fontWeight': 'bold', 'color': '#ff7f0e'}),
+                                    html.Span(" - High mobility + High AI risk", style={'fontSize': '0.85rem', 'color': '#666'})
+                                ], style={'marginRight': '15px', 'display': 'inline-block'}),
+                                html.Span([
+                                    html.Span("● ", style={'color': '#2ca02c', 'fontSize': '1.2rem', 'fontWeight': 'bold'}),
+                                    html.Span("Safe", style={'fontWeight': 'bold', 'color': '#2ca02c'}),
+                                    html.Span(" - High mobility + Low AI risk", style={'fontSize': '0.85rem', 'color': '#666'})
+                                ], style={'marginRight': '15px', 'display': 'inline-block'}),
+                                html.Span([
+                                    html.Span("● ", style={'color': '#1f77b4', 'fontSize': '1.2rem', 'fontWeight': 'bold'}),
+                                    html.Span("Stagnant Protected", style={'fontWeight': 'bold', 'color': '#1f77b4'}),
+                                    html.Span(" - Low mobility + Low AI risk", style={'fontSize': '0.85rem', 'color': '#666'})
+                                ], style={'display': 'inline-block'})
+                            ], style={'display': 'flex', 'flexWrap': 'wrap', 'alignItems': 'center', 'gap': '8px', 'lineHeight': '1.8'})
+                        ]),
+
+                        dcc.Graph(id='choropleth-map', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12, lg=8),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Rankings", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        html.Label("Level:", className="fw-bold"),
+                        dcc.RadioItems(
+                            id='ranking-level-radio',
+                            options=[
+                                {'label': ' State', 'value': 'state'},
+                                {'label': ' County', 'value': 'county'}
+                            ],
+                            value='state',
+                            inline=True,
+                            className="mb-2",
+                            style={'display': 'flex', 'gap': '15px'}
+                        ),
+                        html.Div(id='state-filter-container', children=[
+                            html.Label("Filter by State:", className="fw-bold"),
                             dcc.Dropdown(
-                                id='map-metric-dropdown',
-                                options=[
-                                    {'label': 'County Classification', 'value': 'category'},
-                                    {'label': 'County Classification (Intensity)', 'value': 'category_intensity'},
-                                    {'label': 'Mobility Score', 'value': 'mobility_score'},
-                                    {'label': 'AI Exposure', 'value': 'ai_exposure'}
-                                ],
-                                value='category',
-                                clearable=False
-                            )
-                        ], width=12)
-                    ], className="mb-2"),
-                    
-                    # Classification Legend (shown only for County Classification view)
-                    html.Div(id='classification-legend', children=[
-                        html.Div([
-                            html.Strong("Classification Guide: ", style={'fontSize': '0.9rem'}),
-                            html.Span([
-                                html.Span("● ", style={'color': '#d62728', 'fontSize': '1.2rem', 'fontWeight': 'bold'}),
-                                html.Span("Double Disadvantage", style={'fontWeight': 'bold', 'color': '#d62728'}),
-                                html.Span(" - Low mobility + High AI risk", style={'fontSize': '0.85rem', 'color': '#666'})
-                            ], style={'marginRight': '15px', 'display': 'inline-block'}),
-                            html.Span([
-                                html.Span("● ", style={'color': '#ff7f0e', 'fontSize': '1.2rem', 'fontWeight': 'bold'}),
-                                html.Span("Tech Disruption", style={'fontWeight': 'bold', 'color': '#ff7f0e'}),
-                                html.Span(" - High mobility + High AI risk", style={'fontSize': '0.85rem', 'color': '#666'})
-                            ], style={'marginRight': '15px', 'display': 'inline-block'}),
-                            html.Span([
-                                html.Span("● ", style={'color': '#2ca02c', 'fontSize': '1.2rem', 'fontWeight': 'bold'}),
-                                html.Span("Safe", style={'fontWeight': 'bold', 'color': '#2ca02c'}),
-                                html.Span(" - High mobility + Low AI risk", style={'fontSize': '0.85rem', 'color': '#666'})
-                            ], style={'marginRight': '15px', 'display': 'inline-block'}),
-                            html.Span([
-                                html.Span("● ", style={'color': '#1f77b4', 'fontSize': '1.2rem', 'fontWeight': 'bold'}),
-                                html.Span("Stagnant Protected", style={'fontWeight': 'bold', 'color': '#1f77b4'}),
-                                html.Span(" - Low mobility + Low AI risk", style={'fontSize': '0.85rem', 'color': '#666'})
-                            ], style={'display': 'inline-block'})
-                        ], style={'display': 'flex', 'flexWrap': 'wrap', 'alignItems': 'center', 'gap': '8px', 'lineHeight': '1.8'})
+                                id='ranking-state-dropdown',
+                                options=[{'label': 'All Counties', 'value': 'all'}] + 
+                                        [{'label': state, 'value': state} 
+                                         for state in sorted(merged_data['state_name'].unique())],
+                                value='all',
+                                clearable=False,
+                                className="mb-2"
+                            ),
+                        ], style={'display': 'none'}),
+                        html.Label("Ranking Type:", className="fw-bold"),
+                        dcc.RadioItems(
+                            id='ranking-type-radio',
+                            options=[
+                                {'label': ' Top Performers', 'value': 'top'},
+                                {'label': ' Worst Performers', 'value': 'bottom'}
+                            ],
+                            value='top',
+                            inline=True,
+                            className="mb-2",
+                            style={'display': 'flex', 'gap': '15px'}
+                        ),
+                        html.Label("Metric:", className="fw-bold"),
+                        dcc.Dropdown(
+                            id='ranking-metric-dropdown',
+                            options=[
+                                {'label': 'By Mobility Score', 'value': 'mobility_score'},
+                                {'label': 'By AI Exposure', 'value': 'ai_exposure'}
+                            ],
+                            value='mobility_score',
+                            clearable=False,
+                            className="mb-3"
+                        ),
+                        dcc.Graph(id='ranking-table', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12, lg=4)
+        ], className="mb-4"),
+
+        # Main Content - Row 1.5: County Detail (precomputed model explanations)
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("County Detail", className="mb-0"),
                     ]),
-                    
-                    dcc.Graph(id='choropleth-map', config={'displayModeBar': False})
-                ])
-            ], className="shadow-sm")
-        ], width=12, lg=8),
-        
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5("Rankings", className="mb-0"),
-                ]),
-                dbc.CardBody([
-                    html.Label("Level:", className="fw-bold"),
-                    dcc.RadioItems(
-                        id='ranking-level-radio',
-                        options=[
-                            {'label': ' State', 'value': 'state'},
-                            {'label': ' County', 'value': 'county'}
-                        ],
-                        value='state',
-                        inline=True,
-                        className="mb-2",
-                        style={'display': 'flex', 'gap': '15px'}
-                    ),
-                    html.Div(id='state-filter-container', children=[
-                        html.Label("Filter by State:", className="fw-bold"),
+                    dbc.CardBody([
+                        html.Label("Explain Model:", className="fw-bold"),
                         dcc.Dropdown(
-                            id='ranking-state-dropdown',
-                            options=[{'label': 'All Counties', 'value': 'all'}] + 
-                                    [{'label': state, 'value': state} 
-                                     for state in sorted(merged_data['state_name'].unique())],
-                            value='all',
+                            id='explanation-model-dropdown',
+                            # Filled with the models that have explanations by update_county_detail
+                            options=[],
+                            value='Logistic Regression',
                             clearable=False,
-                            className="mb-2"
+                            className="mb-3"
                         ),
-                    ], style={'display': 'none'}),
-                    html.Label("Ranking Type:", className="fw-bold"),
-                    dcc.RadioItems(
-                        id='ranking-type-radio',
-                        options=[
-                            {'label': ' Top Performers', 'value': 'top'},
-                            {'label': ' Worst Performers', 'value': 'bottom'}
-                        ],
-                        value='top',
-                        inline=True,
-                        className="mb-2",
-                        style={'display': 'flex', 'gap': '15px'}
-                    ),
-                    html.Label("Metric:", className="fw-bold"),
-                    dcc.Dropdown(
-                        id='ranking-metric-dropdown',
-                        options=[
-                            {'label': 'By Mobility Score', 'value': 'mobility_score'},
-                            {'label': 'By AI Exposure', 'value': 'ai_exposure'}
-                        ],
-                        value='mobility_score',
-                        clearable=False,
-                        className="mb-3"
-                    ),
-                    dcc.Graph(id='ranking-table', config={'displayModeBar': False})
-                ])
-            ], className="shadow-sm")
-        ], width=12, lg=4)
-    ], className="mb-4"),
-    
-    # Main Content - Row 2: Scatter Plot
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5("Correlation Analysis", className="mb-0"),
-                ]),
-                dbc.CardBody([
-                    dbc.Row([
-                        dbc.Col([
-                            html.Label("Analysis Level:", className="fw-bold"),
-                            dcc.RadioItems(
-                                id='scatter-level-radio',
-                                options=[
-                                    {'label': ' State-Level', 'value': 'state'},
-                                    {'label': ' County-Level', 'value': 'county'}
-                                ],
-                                value='county',
-                                inline=True,
-                                className="mb-2",
-                                style={'display': 'flex', 'gap': '15px'}
-                            )
-                        ], width=6),
-                        dbc.Col([
-                            html.Div(id='state-dropdown-container', children=[
-                                html.Label("Select State (County-Level only):", className="fw-bold"),
-                                dcc.Dropdown(
-                                    id='state-dropdown',
-                                    options=[{'label': 'All States', 'value': 'All States'}] + 
-                                            [{'label': state, 'value': state} 
-                                             for state in sorted(merged_data['state_name'].unique())],
-                                    value='All States',
-                                    clearable=False,
-                                    disabled=False
+                        html.Div(id='county-detail-panel')
+                    ])
+                ], className="shadow-sm")
+            ], width=12)
+        ], className="mb-4"),
+
+        # Main Content - Row 2: Scatter Plot
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Correlation Analysis", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                html.Label("Analysis Level:", className="fw-bold"),
+                                dcc.RadioItems(
+                                    id='scatter-level-radio',
+                                    options=[
+                                        {'label': ' State-Level', 'value': 'state'},
+                                        {'label': ' County-Level', 'value': 'county'}
+                                    ],
+                                    value='county',
+                                    inline=True,
+                                    className="mb-2",
+                                    style={'display': 'flex', 'gap': '15px'}
                                 )
-                            ])
-                        ], width=6)
+                            ], width=6),
+                            dbc.Col([
+                                html.Div(id='state-dropdown-container', children=[
+                                    html.Label("Select State (County-Level only):", className="fw-bold"),
+                                    dcc.Dropdown(
+                                        id='state-dropdown',
+                                        options=[{'label': 'All States', 'value': 'All States'}] + 
+                                                [{'label': state, 'value': state} 
+                                                 for state in sorted(merged_data['state_name'].unique())],
+                                        value='All States',
+                                        clearable=False,
+                                        disabled=False
+                                    )
+                                ])
+                            ], width=6)
+                        ]),
+                        dcc.Graph(id='scatter-plot')
+                    ])
+                ], className="shadow-sm")
+            ], width=12)
+        ], className="mb-4"),
+
+        # Main Content - Row 2.5: Machine Learning Model Comparison
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Machine Learning Model Comparison", className="mb-0"),
                     ]),
-                    dcc.Graph(id='scatter-plot')
-                ])
-            ], className="shadow-sm")
-        ], width=12)
-    ], className="mb-4"),
-    
-    # Main Content - Row 2.5: Machine Learning Model Comparison
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5("Machine Learning Model Comparison", className="mb-0"),
-                ]),
-                dbc.CardBody([
-                    html.P("Testing core hypothesis: Can mobility patterns predict Double Disadvantage counties? Models use only mobility and regional features to predict counties with low mobility AND high AI risk.",
-                          className="text-muted mb-3", style={"fontSize": "0.9rem"}),
-                    html.Label("Select Model:", className="fw-bold"),
-                    dcc.Dropdown(
-                        id='ml-model-dropdown',
-                        options=[
-                            {'label': 'Logistic Regression', 'value': 'Logistic Regression'},
-                            {'label': 'Lasso Regression', 'value': 'Lasso Regression'},
-                            {'label': 'Ridge Regression', 'value': 'Ridge Regression'},
-                            {'label': 'Random Forest', 'value': 'Random Forest'}
-                        ],
-                        value='Logistic Regression',
-                        clearable=False,
-                        className="mb-3"
-                    ),
-                    dcc.Graph(id='ml-model-comparison', config={'displayModeBar': False})
-                ])
-            ], className="shadow-sm")
-        ], width=12, lg=8),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5("Performance Metrics", className="mb-0"),
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='ml-performance-comparison', figure=create_ml_performance_comparison(),
-                             config={'displayModeBar': False})
-                ])
-            ], className="shadow-sm")
-        ], width=12, lg=4)
-    ], className="mb-4"),
-    
-    # Main Content - Row 3: Distribution Charts
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5("Mobility Distribution", className="mb-0"),
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='mobility-distribution', figure=create_distribution_plots(),
-                             config={'displayModeBar': False})
-                ])
-            ], className="shadow-sm")
-        ], width=12, md=4),
-        
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5("AI Exposure Distribution", className="mb-0"),
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='ai-distribution', figure=create_ai_distribution_plot(),
-                             config={'displayModeBar': False})
-                ])
-            ], className="shadow-sm")
-        ], width=12, md=4),
-        
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5("Category Breakdown", className="mb-0"),
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='category-breakdown', figure=create_category_breakdown(),
-                             config={'displayModeBar': False})
-                ])
-            ], className="shadow-sm")
-        ], width=12, md=4)
-    ], className="mb-4"),
-    
-    # Footer
-    dbc.Row([
-        dbc.Col([
-            html.Hr(),
-            html.P([
-                "Data Sources: Opportunity Insights (County Trends) & Economic Census (AIOE Data) | ",
-                html.A("GitHub", href="https://github.com/cesarmonagas15/mobility-ai-displacement-analysis", 
-                      className="text-decoration-none", target="_blank"),
-            ], className="text-center text-muted small")
-        ])
-    ], className="mb-4")
-    
-], fluid=True, style={'backgroundColor': '#f8f9fa'})
+                    dbc.CardBody([
+                        html.P("Testing core hypothesis: Can mobility patterns predict Double Disadvantage counties? Models use only mobility and regional features to predict counties with low mobility AND high AI risk.",
+                              className="text-muted mb-3", style={"fontSize": "0.9rem"}),
+                        # Training status, polled until background training finishes; the
+                        # store holds the results version the ML charts were drawn from
+                        html.Div(id='ml-status-panel'),
+                        dcc.Interval(id='ml-status-interval', interval=2000),
+                        dcc.Store(id='ml-results-version'),
+                        html.Label("Select Model:", className="fw-bold"),
+                        dcc.Dropdown(
+                            id='ml-model-dropdown',
+                            # Filled with one option per trained model by update_ml_results_views
+                            options=[],
+                            value='Logistic Regression',
+                            clearable=False,
+                            className="mb-3"
+                        ),
+                        html.Label("Decision Threshold:", className="fw-bold"),
+                        dcc.Slider(
+                            id='ml-threshold-slider',
+                            min=0, max=1, step=0.01, value=0.5,
+                            marks={v / 10: f'{v / 10:.1f}' for v in range(11)},
+                            tooltip={'placement': 'bottom'},
+                            updatemode='drag'
+                        ),
+                        html.Div(id='ml-threshold-metrics', className="text-muted mb-2", style={"fontSize": "0.9rem"}),
+                        dcc.Graph(id='ml-model-comparison', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12, lg=8),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Performance Metrics", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='ml-performance-comparison', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12, lg=4)
+        ], className="mb-4"),
+
+        # Main Content - Row 2.55: Permutation Feature Importance
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Feature Importance", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        html.P("How much each model's test ROC-AUC drops when one feature is randomly shuffled (mean ± std over repeats). Comparable across model types, unlike coefficients or impurity importances.",
+                              className="text-muted mb-3", style={"fontSize": "0.9rem"}),
+                        dcc.Graph(id='permutation-importance-chart', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12)
+        ], className="mb-4"),
+
+        # Main Content - Row 2.57: Spatial (leave-states-out) cross-validation
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Generalization to Unseen States", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        html.P("Stratified CV mixes counties of the same state across train and test folds; leave-states-out CV holds out whole states and recomputes the state mobility features inside each fold. The gap shows how much of the in-sample score comes from knowing the state.",
+                              className="text-muted mb-3", style={"fontSize": "0.9rem"}),
+                        dcc.Graph(id='spatial-cv-chart', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12)
+        ], className="mb-4"),
+
+        # Main Content - Row 2.6: Regularization Path
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Regularization Path", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        html.P("How each coefficient shrinks as regularization strengthens (smaller C), with the cross-validated ROC-AUC at every strength.",
+                              className="text-muted mb-3", style={"fontSize": "0.9rem"}),
+                        dcc.RadioItems(
+                            id='regpath-penalty-radio',
+                            options=[
+                                {'label': ' Lasso (L1)', 'value': 'l1'},
+                                {'label': ' Ridge (L2)', 'value': 'l2'}
+                            ],
+                            value='l1',
+                            inline=True,
+                            className="mb-2",
+                            style={'display': 'flex', 'gap': '15px'}
+                        ),
+                        dcc.Graph(id='regpath-chart', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12)
+        ], className="mb-4"),
+
+        # Main Content - Row 3: Distribution Charts
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Mobility Distribution", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='mobility-distribution', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12, md=4),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("AI Exposure Distribution", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='ai-distribution', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12, md=4),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Category Breakdown", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='category-breakdown', config={'displayModeBar': False})
+                    ])
+                ], className="shadow-sm")
+            ], width=12, md=4)
+        ], className="mb-4"),
+
+        # Footer
+        dbc.Row([
+            dbc.Col([
+                html.Hr(),
+                html.P([
+                    "Data Sources: Opportunity Insights (County Trends) & Economic Census (AIOE Data) | ",
+                    html.A("GitHub", href="https://github.com/cesarmonagas15/mobility-ai-displacement-analysis", 
+                          className="text-decoration-none", target="_blank"),
+                ], className="text-center text-muted small")
+            ])
+        ], className="mb-4")
+
+    ], fluid=True, style={'backgroundColor': '#f8f9fa'})
 
 
 # =============================================================================
 # CALLBACKS
 # =============================================================================
 
-@app.callback(
-    Output('kpi-cards', 'children'),
-    Input('map-metric-dropdown', 'value')
-)
-def update_kpis(metric):
-    return create_kpi_cards()
-
-
-@app.callback(
-    Output('choropleth-map', 'figure'),
-    Input('map-metric-dropdown', 'value')
-)
-def update_map(selected_metric):
-    return create_choropleth_map(selected_metric)
-
-
-@app.callback(
-    Output('classification-legend', 'style'),
-    Input('map-metric-dropdown', 'value')
-)
-def toggle_legend(selected_metric):
-    """Show legend when a classification view is active"""
-    if selected_metric in ('category', 'category_intensity'):
-        return {'padding': '10px', 'backgroundColor': '#f8f9fa', 'borderRadius': '5px', 'marginBottom': '1rem'}
-    else:
-        return {'display': 'none'}
+def register_callbacks(app):
+    """Register the dashboard's Dash callbacks on app"""
+    
+    @app.callback(
+        Output('kpi-cards', 'children'),
+        Input('map-metric-dropdown', 'value')
+    )
+    def update_kpis(metric):
+        return create_kpi_cards()
 
 
-@app.callback(
-    Output('scatter-plot', 'figure'),
-    [Input('scatter-level-radio', 'value'),
-     Input('state-dropdown', 'value')]
-)
-def update_scatter(level, selected_state):
-    if level == 'state':
-        return create_scatter_plot(level='state')
-    else:
-        return create_scatter_plot(level='county', selected_state=selected_state)
+    @app.callback(
+        Output('choropleth-map', 'figure'),
+        Input('map-metric-dropdown', 'value')
+    )
+    def update_map(selected_metric):
+        return create_choropleth_map(selected_metric)
 
 
-@app.callback(
-    Output('state-dropdown-container', 'style'),
-    Input('scatter-level-radio', 'value')
-)
-def toggle_state_dropdown(level):
-    """Hide state dropdown when state-level is selected"""
-    if level == 'state':
-        return {'display': 'none'}
-    else:
-        return {'display': 'block'}
+    @app.callback(
+        Output('mobility-distribution', 'figure'),
+        Output('ai-distribution', 'figure'),
+        Output('category-breakdown', 'figure'),
+        Input('url', 'pathname')
+    )
+    def update_distribution_charts(pathname):
+        return create_distribution_plots(), create_ai_distribution_plot(), create_category_breakdown()
 
 
-@app.callback(
-    Output('state-filter-container', 'style'),
-    Input('ranking-level-radio', 'value')
-)
-def toggle_state_filter(level):
-    """Show state filter only when county level is selected"""
-    if level == 'county':
-        return {'display': 'block', 'marginBottom': '0.5rem'}
-    else:
-        return {'display': 'none'}
+    @app.callback(
+        Output('county-detail-panel', 'children'),
+        Output('explanation-model-dropdown', 'options'),
+        Input('choropleth-map', 'clickData'),
+        Input('explanation-model-dropdown', 'value'),
+        Input('ml-results-version', 'data')
+    )
+    def update_county_detail(click_data, model_name, version):
+        county_fips = click_data['points'][0].get('location') if click_data else None
+        ml_results = get_ml_results() if ml_summary is not None else None
+        names = list(ml_results['explanations']['models']) if ml_results and 'explanations' in ml_results else []
+        return create_county_detail(county_fips, model_name), [{'label': name, 'value': name} for name in names]
+
+
+    @app.callback(
+        Output('classification-legend', 'style'),
+        Input('map-metric-dropdown', 'value')
+    )
+    def toggle_legend(selected_metric):
+        """Show legend when a classification view is active"""
+        if selected_metric in ('category', 'category_intensity'):
+            return {'padding': '10px', 'backgroundColor': '#f8f9fa', 'borderRadius': '5px', 'marginBottom': '1rem'}
+        else:
+            return {'display': 'none'}
+
+
+    @app.callback(
+        Output('scatter-plot', 'figure'),
+        [Input('scatter-level-radio', 'value'),
+         Input('state-dropdown', 'value')]
+    )
+    def update_scatter(level, selected_state):
+        if level == 'state':
+            return create_scatter_plot(level='state')
+        else:
+            return create_scatter_plot(level='county', selected_state=selected_state)
+
+
+    @app.callback(
+        Output('state-dropdown-container', 'style'),
+        Input('scatter-level-radio', 'value')
+    )
+    def toggle_state_dropdown(level):
+        """Hide state dropdown when state-level is selected"""
+        if level == 'state':
+            return {'display': 'none'}
+        else:
+            return {'display': 'block'}
+
+
+    @app.callback(
+        Output('state-filter-container', 'style'),
+        Input('ranking-level-radio', 'value')
+    )
+    def toggle_state_filter(level):
+        """Show state filter only when county level is selected"""
+        if level == 'county':
+            return {'display': 'block', 'marginBottom': '0.5rem'}
+        else:
+            return {'display': 'none'}
+
+
+    @app.callback(
+        Output('ranking-table', 'figure'),
+        [Input('ranking-level-radio', 'value'),
+         Input('ranking-metric-dropdown', 'value'),
+         Input('ranking-type-radio', 'value'),
+         Input('ranking-state-dropdown', 'value')]
+    )
+    def update_ranking_table(level, metric, ranking_type, state_filter):
+        return create_ranking_table(level=level, metric=metric, ranking_type=ranking_type, state_filter=state_filter)
+
+
+    @app.callback(
+        Output('ml-status-panel', 'children'),
+        Output('ml-status-interval', 'disabled'),
+        Output('ml-results-version', 'data'),
+        Input('ml-status-interval', 'n_intervals'),
+        State('ml-results-version', 'data')
+    )
+    def poll_ml_status(n_intervals, version):
+        status = get_ml_status()
+        # Stop polling once training has finished; bumping the version redraws the ML charts
+        finished = status['state'] in ('ready', 'failed', 'idle')
+        new_version = status['version'] if status['state'] == 'ready' else None
+        return (create_ml_status_panel(status), finished,
+                new_version if new_version != version else dash.no_update)
+
+
+    @app.callback(
+        Output('ml-model-dropdown', 'options'),
+        Output('ml-performance-comparison', 'figure'),
+        Output('permutation-importance-chart', 'figure'),
+        Output('spatial-cv-chart', 'figure'),
+        Input('ml-results-version', 'data')
+    )
+    def update_ml_results_views(version):
+        # One option per trained model, so newly registered models appear automatically
+        names = ml_summary['models'] if ml_summary is not None else ['Logistic Regression']
+        return ([{'label': name, 'value': name} for name in names], create_ml_performance_comparison(),
+                create_permutation_importance_chart(), create_spatial_cv_chart())
+
+
+    @app.callback(
+        Output('ml-model-comparison', 'figure'),
+        Output('ml-threshold-metrics', 'children'),
+        Input('ml-model-dropdown', 'value'),
+        Input('ml-threshold-slider', 'value'),
+        Input('ml-results-version', 'data')
+    )
+    def update_ml_model_comparison(selected_model, threshold, version):
+        # Threshold changes are table lookups (no re-prediction), so the slider updates while dragging
+        figure = create_ml_model_comparison(selected_model=selected_model, threshold=threshold)
+        if ml_summary is None or selected_model not in ml_summary['models']:
+            return figure, ""
+        metrics = threshold_metrics(ml_summary['models'][selected_model]['threshold_table'], threshold)
+        return figure, (f"At threshold {threshold:.2f}: precision {metrics['precision']:.3f} · "
+                        f"recall {metrics['recall']:.3f} · F1 {metrics['f1']:.3f} · "
+                        f"accuracy {metrics['accuracy']:.3f}")
+
+
+    @app.callback(
+        Output('regpath-chart', 'figure'),
+        Input('regpath-penalty-radio', 'value'),
+        Input('ml-results-version', 'data')
+    )
+    def update_regularization_path(penalty, version):
+        return create_regularization_path_chart(penalty=penalty)
+
+
+# =============================================================================
+# APP FACTORY
+# =============================================================================
+
+def api_compute_budget():
+    """GET /api/compute-budget: the thread allocation in effect in this worker"""
+    from flask import jsonify
+    return jsonify(compute_budget.current_allocation())
+
+
+def create_app(preload=False):
+    """Build the dashboard app: load the data once, then lay out the page and register
+    the callbacks and JSON APIs
+    
+    Safe to call in the master of a preforking server (gunicorn --preload, see
+    gunicorn.conf.py). The data, the county geometry and the ML summary load once
+    there, and the workers share them copy-on-write. Per-process machinery starts on
+    first use in each worker: the prediction batcher thread and any pending ML rebuild.
+    
+    Without preload, everything that only some requests need is deferred to first
+    use, for the fastest time to first request. This covers the ML bundle, the
+    correlation statistics and the plotly.express/scipy imports. With preload it is
+    all loaded up front, so that forked workers share it and none pays for it on its
+    first request. The ML bundle is memory-mapped, so its pages are shared through the
+    page cache.
+    """
+    load_dashboard_data()
+    load_ml_summary()
+    if preload:
+        import plotly.express  # noqa: F401
+        correlation_stats()
+        if ml_summary is not None:
+            try:
+                get_ml_results()
+            except Exception as e:
+                print(f"Could not preload the ML results bundle: {e}")
+    
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.FONT_AWESOME],
+        suppress_callback_exceptions=True
+    )
+    app.title = "Mobility-AI Displacement Dashboard"
+    app.layout = create_layout()
+    register_callbacks(app)
+    
+    # JSON prediction endpoint (POST /api/predict) on the underlying Flask server. New
+    # records are featurized against the training counties' state aggregates stored in
+    # the ML results, as in batch scoring.
+    from predict_api import register_predict_api
+    app.server.extensions['predict_batcher'] = register_predict_api(app.server, get_ml_results)
+    
+    # Request serving gets this worker's share of the cores as BLAS threads; the background
+    # rebuild narrows itself to the warm-up budget. GET /api/compute-budget reports both.
+    compute_budget.apply('serving')
+    app.server.add_url_rule('/api/compute-budget', 'api_compute_budget', api_compute_budget)
+    app.server.before_request(ensure_ml_training)
+    return app
+
+
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_app(preload=False):
+    """The process's dashboard app, built by create_app() on first call"""
+    global _app
+    with _app_lock:
+        if _app is None:
+            _app = create_app(preload=preload)
+        return _app
 
 
-@app.callback(
-    Output('ranking-table', 'figure'),
-    [Input('ranking-level-radio', 'value'),
-     Input('ranking-metric-dropdown', 'value'),
-     Input('ranking-type-radio', 'value'),
-     Input('ranking-state-dropdown', 'value')]
-)
-def update_ranking_table(level, metric, ranking_type, state_filter):
-    return create_ranking_table(level=level, metric=metric, ranking_type=ranking_type, state_filter=state_filter)
+def create_server(preload=True):
+    """WSGI entry point for production servers (gunicorn.conf.py serves
+    interactive_dashboard:create_server() with several preforked worker processes)"""
+    return get_app(preload=preload).server
 
 
-@app.callback(
-    Output('ml-model-comparison', 'figure'),
-    Input('ml-model-dropdown', 'value')
-)
-def update_ml_model_comparison(selected_model):
-    return create_ml_model_comparison(selected_model=selected_model)
+def __getattr__(name):
+    # app and server are built on first access, so importing the module stays cheap
+    if name == 'app':
+        return get_app()
+    if name == 'server':
+        return get_app().server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # =============================================================================
@@ -1360,7 +2240,10 @@ if __name__ == '__main__':
         print(f"   URL: http://127.0.0.1:{port}/")
     
     print("   Press CTRL+C to stop the server")
+    print("   (Production: gunicorn --config gunicorn.conf.py)")
     print("="*70 + "\n")
     
+    app = get_app()
+    ensure_ml_training()
     app.run(debug=False, host=host, port=port)
 
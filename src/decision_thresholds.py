@@ -0,0 +1,54 @@
+"""
+Decision Thresholds
+===================
+Threshold tables: each model's cumulative TP/FP counts over its sorted test-set
+probabilities, built once at training time. Any decision threshold's confusion
+matrix, precision, recall and F1 is then a binary search into the table rather than
+a re-prediction, which is what lets the dashboard's threshold slider respond
+instantly. Pure Python/NumPy, so the dashboard can use it without scikit-learn.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+
+def threshold_table(sorted_scores, tps, fps):
+    """Threshold table of one model from its descending sorted cumulative counts
+
+    sorted_scores, tps and fps are one row of _sorted_cumulative_counts (ml_analysis).
+    Returns the distinct scores in ascending order as 'thresholds' and, in 'tp'/'fp',
+    the true/false positives when every sample scoring at least thresholds[k] is
+    predicted positive, with a trailing 0 for "nothing predicted positive".
+    """
+    # Last index of each run of tied scores (the counts after the whole run)
+    distinct = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    return {
+        'thresholds': sorted_scores[distinct][::-1].copy(),
+        'tp': np.r_[tps[distinct][::-1], 0],
+        'fp': np.r_[fps[distinct][::-1], 0],
+        'n_pos': int(tps[-1]),
+        'n_neg': int(fps[-1])
+    }
+
+
+def threshold_metrics(table, threshold):
+    """Confusion matrix, precision, recall and F1 at a decision threshold
+
+    A sample is predicted positive when its probability is strictly greater than the
+    threshold, matching evaluate_models and predict. table is a threshold_table (or
+    its JSON form, with lists); the lookup is one binary search over the thresholds.
+    """
+    k = bisect_right(table['thresholds'], threshold)
+    tp, fp = int(table['tp'][k]), int(table['fp'][k])
+    fn, tn = table['n_pos'] - tp, table['n_neg'] - fp
+    n = table['n_pos'] + table['n_neg']
+    return {
+        'threshold': threshold,
+        'confusion_matrix': [[tn, fp], [fn, tp]],
+        'accuracy': (tp + tn) / n if n else 0.0,
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / table['n_pos'] if table['n_pos'] else 0.0,
+        'f1': 2 * tp / (2 * tp + fp + fn) if 2 * tp + fp + fn else 0.0,
+        'fpr': fp / table['n_neg'] if table['n_neg'] else 0.0
+    }
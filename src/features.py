@@ -0,0 +1,179 @@
+"""
+Feature Engineering
+===================
+Feature construction shared by model training (ml_analysis) and scoring (scoring,
+the prediction API): census regions, polynomial mobility terms and state-level
+mobility aggregates. Depends only on pandas/NumPy, so scoring never imports
+scikit-learn.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import ArtifactStore, code_hash, hash_frame
+
+
+# Census regions by state; anything unmapped falls into 'Other'
+REGION_MAPPING = {
+    'Northeast': ['Maine', 'New Hampshire', 'Vermont', 'Massachusetts', 'Rhode Island', 
+                  'Connecticut', 'New York', 'New Jersey', 'Pennsylvania'],
+    'South': ['Delaware', 'Maryland', 'Virginia', 'West Virginia', 'Kentucky', 'Tennessee',
+              'North Carolina', 'South Carolina', 'Georgia', 'Florida', 'Alabama',
+              'Mississippi', 'Arkansas', 'Louisiana', 'Oklahoma', 'Texas'],
+    'Midwest': ['Ohio', 'Indiana', 'Illinois', 'Michigan', 'Wisconsin', 'Minnesota',
+                'Iowa', 'Missouri', 'North Dakota', 'South Dakota', 'Nebraska', 'Kansas'],
+    'West': ['Montana', 'Idaho', 'Wyoming', 'Colorado', 'New Mexico', 'Arizona', 'Utah',
+             'Nevada', 'Washington', 'Oregon', 'California', 'Alaska', 'Hawaii'],
+    'Other': ['Puerto Rico']
+}
+STATE_TO_REGION = {state: region for region, states in REGION_MAPPING.items() for state in states}
+# Fixed, sorted region categories so the dummy columns never depend on which regions a dataset contains
+REGIONS = sorted(REGION_MAPPING)
+
+# Features, splits, fitted models and evaluations are cached in a content-addressed
+# artifact store, keyed by a hash of their input data plus the code/config that made them
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'processed', 'cache')
+DEFAULT_STORE = ArtifactStore(ARTIFACT_DIR)
+
+
+def _cached_transform(name, inputs, compute, code, store=DEFAULT_STORE):
+    """Return compute(), reusing the stored result while the inputs and code are unchanged"""
+    if store is None:
+        return compute()
+    key = store.key(name, code_hash(*code), hash_frame(inputs))
+    return store.get_or_compute('features', key, compute)
+
+
+def create_regions(df):
+    """Create regional dummy variables"""
+    # Map each distinct state once, then broadcast through the categorical codes
+    state_codes, states = pd.factorize(df['state_name'])
+    state_regions = pd.Categorical(pd.Index(states).map(STATE_TO_REGION).fillna('Other'), categories=REGIONS)
+    # Missing state names (code -1) pick up the trailing 'Other' entry
+    region_codes = np.append(state_regions.codes, REGIONS.index('Other'))[state_codes]
+    
+    df = df.assign(region=pd.Categorical.from_codes(region_codes, REGIONS))
+    
+    # Create dummy variables
+    region_dummies = pd.DataFrame(
+        np.eye(len(REGIONS), dtype=bool)[region_codes],
+        index=df.index,
+        columns=[f'region_{region}' for region in REGIONS]
+    )
+    return df, region_dummies
+
+
+def _state_mobility_stats(df):
+    """State mean/std of mobility broadcast back to every county via group transforms"""
+    grouped = df.groupby(pd.factorize(df['state_name'])[0], sort=False)['mobility_score']
+    return pd.DataFrame({
+        'state_mobility_mean': grouped.transform('mean'),
+        'state_mobility_std': grouped.transform('std').fillna(0)
+    }, index=df.index)
+
+
+def _polynomial_terms(mobility):
+    """Quadratic and absolute-value terms of the mobility score"""
+    return pd.DataFrame({
+        'mobility_score_sq': mobility['mobility_score'] ** 2,
+        'mobility_abs': np.abs(mobility['mobility_score'])
+    }, index=mobility.index)
+
+
+def _build_features(df):
+    """Assemble the feature matrix from the region, polynomial and state transformers"""
+    
+    # Start with base features - ONLY use mobility_score, NOT ai_exposure
+    # (ai_exposure is what we're trying to predict, so it would cause data leakage)
+    mobility = df[['mobility_score']]
+    
+    # Create regions
+    regions, region_dummies = create_regions(df[['state_name']])
+    
+    # Quadratic terms (only for mobility since we don't have ai_exposure)
+    # and absolute values (capture magnitude)
+    polynomial = _polynomial_terms(mobility)
+    
+    # Add state-level features (aggregated mobility by state)
+    state_stats = _state_mobility_stats(df[['state_name', 'mobility_score']])
+    
+    features_df = pd.concat([mobility, region_dummies, polynomial, state_stats], axis=1)
+    return features_df, pd.concat([regions[['region']], state_stats], axis=1)
+
+
+def engineer_features(df, store=DEFAULT_STORE, state_stats=None):
+    """Create feature engineering: regions, quadratic terms, interactions
+    
+    Results are cached in the artifact store keyed by a hash of the input columns and
+    the feature code, so re-running on unchanged data skips feature construction
+    entirely. Pass store=None to disable caching.
+    
+    By default the state aggregates are computed from df itself. Pass state_stats (a
+    StateMobilityStats) to take them from another dataset instead, e.g. to featurize a
+    chunk of a larger dataset or new records against the counties' state aggregates.
+    """
+    inputs = df[['state_name', 'mobility_score']]
+    features_df, derived = _cached_transform(
+        'features', inputs, lambda: _build_features(inputs),
+        [_build_features, create_regions, REGION_MAPPING, _polynomial_terms, _state_mobility_stats], store)
+    if state_stats is not None:
+        state_mean, state_std = state_stats.lookup(inputs['state_name'])
+        features_df = features_df.assign(state_mobility_mean=state_mean, state_mobility_std=state_std)
+        derived = derived.assign(state_mobility_mean=state_mean, state_mobility_std=state_std)
+    df_with_regions = df.assign(**{column: derived[column] for column in derived.columns})
+    return features_df, df_with_regions
+
+
+class StateMobilityStats:
+    """Per-state count/mean/M2 of mobility, merged chunk by chunk (Chan et al.)
+    
+    Lets chunked scoring and new records use whole-dataset state aggregates (see
+    engineer_features(state_stats=...)). A single update reproduces
+    _state_mobility_stats exactly. Missing state names form their own group, as they
+    do in _state_mobility_stats.
+    """
+    
+    def __init__(self):
+        self.stats = None
+    
+    def update(self, chunk):
+        grouped = chunk['mobility_score'].groupby(chunk['state_name'], dropna=False, sort=False)
+        stats = grouped.agg(['count', 'mean', 'var'])
+        stats = pd.DataFrame({'n': stats['count'].astype(float), 'mean': stats['mean'],
+                              'm2': stats['var'].fillna(0) * (stats['count'] - 1)})
+        if self.stats is None:
+            self.stats = stats
+            return
+        a, b = self.stats.align(stats, join='outer', fill_value=0.0)
+        n = a['n'] + b['n']
+        delta = b['mean'] - a['mean']
+        self.stats = pd.DataFrame({
+            'n': n,
+            'mean': a['mean'] + delta * b['n'] / n,
+            'm2': a['m2'] + b['m2'] + delta ** 2 * a['n'] * b['n'] / n
+        })
+    
+    @classmethod
+    def from_frame(cls, df):
+        stats = cls()
+        stats.update(df)
+        return stats
+    
+    @classmethod
+    def from_table(cls, table):
+        """Rebuild from a saved stats table (n/mean/m2 columns indexed by state_name)"""
+        stats = cls()
+        stats.stats = table[['n', 'mean', 'm2']]
+        return stats
+    
+    @property
+    def states(self):
+        return self.stats.index
+    
+    def lookup(self, states):
+        """state_mobility_mean/std for each entry of states"""
+        stats = self.stats.reindex(states.to_numpy())
+        return (stats['mean'].to_numpy(),
+                np.sqrt(stats['m2'] / (stats['n'] - 1)).fillna(0).to_numpy())
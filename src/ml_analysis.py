@@ -2,196 +2,1046 @@
 Machine Learning Analysis Module
 ================================
 Comprehensive ML analysis with Logistic Regression, Regularized Regression (Lasso/Ridge),
-and Random Forest models for predicting AI displacement risk.
+Random Forest and Histogram Gradient Boosting models for predicting AI displacement risk.
+New models are added by registering a factory with @register_model.
 """
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression, Lasso, Ridge
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split, GroupKFold, RepeatedStratifiedKFold
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import (
-    confusion_matrix, classification_report, roc_auc_score, 
-    roc_curve, accuracy_score, precision_score, recall_score, f1_score
-)
+from joblib import Parallel, delayed
+import sklearn
+from scipy import sparse
+from artifact_store import code_hash, hash_array, hash_frame
+import compute_budget
+import run_report
+from decision_thresholds import threshold_table
+# Feature engineering and scoring live in sklearn-free modules
+from features import DEFAULT_STORE, StateMobilityStats, engineer_features
+from results_io import results_manifest, save_results
+from scoring import _iter_chunks, score_counties, score_dataset
+import heapq
+import json
+import os
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
 
-def create_regions(df):
-    """Create regional dummy variables"""
-    # Define regions based on state
-    region_mapping = {
-        'Northeast': ['Maine', 'New Hampshire', 'Vermont', 'Massachusetts', 'Rhode Island', 
-                      'Connecticut', 'New York', 'New Jersey', 'Pennsylvania'],
-        'South': ['Delaware', 'Maryland', 'Virginia', 'West Virginia', 'Kentucky', 'Tennessee',
-                  'North Carolina', 'South Carolina', 'Georgia', 'Florida', 'Alabama',
-                  'Mississippi', 'Arkansas', 'Louisiana', 'Oklahoma', 'Texas'],
-        'Midwest': ['Ohio', 'Indiana', 'Illinois', 'Michigan', 'Wisconsin', 'Minnesota',
-                    'Iowa', 'Missouri', 'North Dakota', 'South Dakota', 'Nebraska', 'Kansas'],
-        'West': ['Montana', 'Idaho', 'Wyoming', 'Colorado', 'New Mexico', 'Arizona', 'Utah',
-                 'Nevada', 'Washington', 'Oregon', 'California', 'Alaska', 'Hawaii'],
-        'Other': ['Puerto Rico']
-    }
+def create_binary_target(df, mobility_quantile=0.5, ai_quantile=0.5):
+    """Create binary target: Double Disadvantage (1) vs Not (0)
     
-    # Create reverse mapping
-    state_to_region = {}
-    for region, states in region_mapping.items():
-        for state in states:
-            state_to_region[state] = region
+    By default low/high means below/above the median; the quantile arguments move the
+    cutoffs (e.g. 0.25 and 0.75 for the bottom mobility and top AI-exposure quartiles).
+    """
+    # Double Disadvantage = Low mobility AND High AI risk
+    # This tests our core hypothesis: can we predict double disadvantage from mobility patterns?
+    mobility_cutoff = df['mobility_score'].quantile(mobility_quantile)
+    ai_cutoff = df['ai_exposure'].quantile(ai_quantile)
     
-    df['region'] = df['state_name'].map(state_to_region).fillna('Other')
+    # 1 = Double Disadvantage (low mobility + high AI risk)
+    # 0 = All other categories (Safe, Tech Disruption, Stagnant Protected)
+    y = ((df['mobility_score'] < mobility_cutoff) & (df['ai_exposure'] > ai_cutoff)).astype(int)
+    return y
+
+
+def _sorted_cumulative_counts(y_true, probabilities):
+    """Sort each model's probabilities once (descending) and accumulate TP/FP counts
+
+    probabilities is an (n_models, n_samples) array. Returns the sorted scores and the
+    cumulative true/false positive counts, each (n_models, n_samples), where column k
+    holds the counts when the top k+1 scores are predicted positive.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    probabilities = np.atleast_2d(np.asarray(probabilities, dtype=float))
+    order = np.argsort(-probabilities, axis=1, kind='mergesort')
+    sorted_scores = np.take_along_axis(probabilities, order, axis=1)
+    tps = np.cumsum(y_true[order], axis=1)
+    fps = np.arange(1, probabilities.shape[1] + 1) - tps
+    return sorted_scores, tps, fps
+
+
+def _roc_from_counts(sorted_scores, tps, fps, n_pos, n_neg):
+    """ROC curve points and AUC for one model from its sorted cumulative counts"""
+    # Keep only the last index of each run of tied scores (one point per distinct threshold)
+    distinct = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    tpr = np.r_[0.0, tps[distinct] / max(n_pos, 1)]
+    fpr = np.r_[0.0, fps[distinct] / max(n_neg, 1)]
+    thresholds = np.r_[np.inf, sorted_scores[distinct]]
+    auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2) if n_pos and n_neg else float('nan')
+    return fpr, tpr, thresholds, auc
+
+
+def _pr_from_counts(sorted_scores, tps, fps, n_pos):
+    """Precision-recall curve points for one model from its sorted cumulative counts
     
-    # Create dummy variables
-    region_dummies = pd.get_dummies(df['region'], prefix='region')
-    return df, region_dummies
+    Ordered by decreasing threshold and starting at (recall 0, precision 1), as
+    scikit-learn's precision_recall_curve does (reversed).
+    """
+    distinct = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    recall = np.r_[0.0, tps[distinct] / max(n_pos, 1)]
+    precision = np.r_[1.0, tps[distinct] / (tps[distinct] + fps[distinct])]
+    thresholds = np.r_[np.inf, sorted_scores[distinct]]
+    return recall, precision, thresholds
 
 
-def engineer_features(df):
-    """Create feature engineering: regions, quadratic terms, interactions"""
+def downsample_curve(x, y, max_points=200, tolerance=2e-3):
+    """Indices of at most max_points curve points that keep the curve within tolerance
     
-    # Start with base features - ONLY use mobility_score, NOT ai_exposure
-    # (ai_exposure is what we're trying to predict, so it would cause data leakage)
-    features_df = df[['mobility_score']].copy()
+    Greedy top-down Douglas-Peucker: starting from the two endpoints, repeatedly keep
+    the point farthest (perpendicular distance) from the simplified curve until every
+    dropped point lies within tolerance of it or max_points are kept. Dropped points
+    are invisible at plotting resolution, unlike uniform thinning, which can cut
+    corners of the curve.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= 2:
+        return np.arange(n)
     
-    # Create regions
-    df_with_regions, region_dummies = create_regions(df)
-    features_df = pd.concat([features_df, region_dummies], axis=1)
+    def farthest(start, end):
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        px, py = x[start + 1:end] - x[start], y[start + 1:end] - y[start]
+        norm = np.hypot(dx, dy)
+        distance = np.abs(dx * py - dy * px) / norm if norm > 0 else np.hypot(px, py)
+        k = int(np.argmax(distance))
+        return -distance[k], start, end, start + 1 + k
     
-    # Quadratic terms (only for mobility since we don't have ai_exposure)
-    features_df['mobility_score_sq'] = features_df['mobility_score'] ** 2
+    keep = [0, n - 1]
+    heap = [farthest(0, n - 1)]
+    while heap and len(keep) < max_points:
+        neg_distance, start, end, k = heapq.heappop(heap)
+        if -neg_distance <= tolerance:
+            break
+        keep.append(k)
+        for segment in ((start, k), (k, end)):
+            if segment[1] - segment[0] > 1:
+                heapq.heappush(heap, farthest(*segment))
+    return np.sort(keep)
+
+
+def evaluate_models(y_true, probabilities, thresholds=(0.5,)):
+    """Evaluate many models at many decision thresholds in one batched pass
+
+    Every threshold metric is derived from a single confusion-matrix computation
+    (cumulative TP/FP counts over one sort of the probabilities), and the ROC curve
+    and AUC come from the same sort. A sample is predicted positive when its
+    probability is strictly greater than the threshold, matching ``predict``.
+
+    Returns a dict of arrays shaped (n_models, n_thresholds) for the threshold
+    metrics, (n_models, n_thresholds, 2, 2) for confusion matrices, (n_models,)
+    for ROC-AUC, plus lists of per-model (fpr, tpr, thresholds) ROC curves,
+    (recall, precision, thresholds) precision-recall curves and threshold tables
+    (see decision_thresholds) for looking up any other threshold later.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+    sorted_scores, tps, fps = _sorted_cumulative_counts(y_true, probabilities)
+    n_models, n_samples = sorted_scores.shape
+    n_pos = int(y_true.sum())
+    n_neg = n_samples - n_pos
+
+    # Number of samples scoring strictly above each threshold, per model
+    n_predicted = np.empty((n_models, len(thresholds)), dtype=np.int64)
+    for i in range(n_models):
+        ascending = sorted_scores[i, ::-1]
+        n_predicted[i] = n_samples - np.searchsorted(ascending, thresholds, side='right')
+
+    # Prepend a zero column so that "nothing predicted positive" indexes column 0
+    zeros = np.zeros((n_models, 1), dtype=tps.dtype)
+    tp = np.take_along_axis(np.hstack([zeros, tps]), n_predicted, axis=1)
+    fp = np.take_along_axis(np.hstack([zeros, fps]), n_predicted, axis=1)
+    fn = n_pos - tp
+    tn = n_neg - fp
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(n_pos > 0, tp / max(n_pos, 1), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+    accuracy = (tp + tn) / n_samples
+
+    roc_curves = []
+    pr_curves = []
+    roc_auc = np.empty(n_models)
+    for i in range(n_models):
+        fpr, tpr, roc_thresholds, roc_auc[i] = _roc_from_counts(
+            sorted_scores[i], tps[i], fps[i], n_pos, n_neg
+        )
+        roc_curves.append((fpr, tpr, roc_thresholds))
+        pr_curves.append(_pr_from_counts(sorted_scores[i], tps[i], fps[i], n_pos))
+    threshold_tables = [threshold_table(sorted_scores[i], tps[i], fps[i]) for i in range(n_models)]
+
+    return {
+        'thresholds': thresholds,
+        'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+        'accuracy': accuracy,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'confusion_matrix': np.stack([np.stack([tn, fp], axis=-1),
+                                      np.stack([fn, tp], axis=-1)], axis=-2),
+        'roc_auc': roc_auc,
+        'roc_curves': roc_curves,
+        'pr_curves': pr_curves,
+        'threshold_tables': threshold_tables
+    }
+
+
+def _batched_roc_auc(scores, labels):
+    """ROC-AUC of every row of (..., n) score and boolean label arrays at once
+    
+    Mann-Whitney form with tied scores sharing their mid-rank, which equals the
+    trapezoidal AUC of evaluate_models. Rows without both classes give NaN.
+    """
+    order = np.argsort(scores, axis=-1, kind='mergesort')
+    sorted_scores = np.take_along_axis(scores, order, axis=-1)
+    sorted_labels = np.take_along_axis(labels, order, axis=-1)
+    n = scores.shape[-1]
+    positions = np.broadcast_to(np.arange(n), scores.shape)
+    changes = np.diff(sorted_scores, axis=-1) != 0
+    # First and last position of each run of tied scores, broadcast to every member of the run
+    starts = np.concatenate([np.ones(scores.shape[:-1] + (1,), dtype=bool), changes], axis=-1)
+    ends = np.concatenate([changes, np.ones(scores.shape[:-1] + (1,), dtype=bool)], axis=-1)
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=-1)
+    last = np.minimum.accumulate(np.where(ends, positions, n)[..., ::-1], axis=-1)[..., ::-1]
+    mid_ranks = (first + last) / 2 + 1
+    n_pos = sorted_labels.sum(axis=-1)
+    n_neg = n - n_pos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((mid_ranks * sorted_labels).sum(axis=-1) - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+
+def bootstrap_metrics(y_true, probabilities, n_boot=1000, chunk_size=100, threshold=0.5, confidence=0.95,
+                      random_state=42):
+    """Percentile bootstrap confidence intervals of every metric for many models
     
-    # Absolute values (capture magnitude)
-    features_df['mobility_abs'] = np.abs(features_df['mobility_score'])
+    Draws one (n_boot, n_samples) matrix of resample indices, shared by all models so
+    their intervals are paired, and evaluates it chunk_size resamples at a time: each
+    chunk is one fancy-indexing gather plus batched confusion counts and mid-rank
+    ROC-AUC, bounding memory at (n_models, chunk_size, n_samples).
     
-    # Add state-level features (aggregated mobility by state)
-    state_mobility = df_with_regions.groupby('state_name')['mobility_score'].agg(['mean', 'std']).reset_index()
-    state_mobility.columns = ['state_name', 'state_mobility_mean', 'state_mobility_std']
-    df_with_regions = df_with_regions.merge(state_mobility, on='state_name', how='left')
-    features_df['state_mobility_mean'] = df_with_regions['state_mobility_mean'].values
-    features_df['state_mobility_std'] = df_with_regions['state_mobility_std'].fillna(0).values
+    Returns {metric: (n_models, 2) array of [low, high]} for accuracy, precision,
+    recall, f1 and roc_auc, plus n_boot and confidence.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    probabilities = np.atleast_2d(np.asarray(probabilities, dtype=float))
+    n = len(y_true)
+    indices = np.random.default_rng(random_state).integers(0, n, size=(n_boot, n), dtype=np.int32)
     
-    return features_df, df_with_regions
+    samples = {metric: np.empty((len(probabilities), n_boot)) for metric in ['accuracy', 'precision', 'recall', 'f1', 'roc_auc']}
+    for start in range(0, n_boot, chunk_size):
+        chunk = indices[start:start + chunk_size]
+        labels = y_true[chunk]                                  # (chunk, n)
+        scores = probabilities[:, chunk]                        # (models, chunk, n)
+        predicted = scores > threshold
+        tp = (predicted & labels).sum(axis=-1)
+        fp = predicted.sum(axis=-1) - tp
+        n_pos = labels.sum(axis=-1)
+        fn = n_pos - tp
+        with np.errstate(divide='ignore', invalid='ignore'):
+            samples['accuracy'][:, start:start + len(chunk)] = (n - fp - fn) / n
+            samples['precision'][:, start:start + len(chunk)] = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+            samples['recall'][:, start:start + len(chunk)] = np.where(n_pos > 0, tp / np.maximum(n_pos, 1), 0.0)
+            samples['f1'][:, start:start + len(chunk)] = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+        samples['roc_auc'][:, start:start + len(chunk)] = _batched_roc_auc(scores, np.broadcast_to(labels, scores.shape))
+    
+    tail = (1 - confidence) / 2 * 100
+    intervals = {metric: np.nanpercentile(values, [tail, 100 - tail], axis=1).T for metric, values in samples.items()}
+    return {'n_boot': n_boot, 'confidence': confidence, **intervals}
 
 
-def create_binary_target(df):
-    """Create binary target: Double Disadvantage (1) vs Not (0)"""
-    # Double Disadvantage = Low mobility AND High AI risk
-    # This tests our core hypothesis: can we predict double disadvantage from mobility patterns?
-    mobility_median = df['mobility_score'].median()
-    ai_median = df['ai_exposure'].median()
+# Hand-picked Random Forest configuration; run_rf_search can propose a replacement
+RF_PARAMS = {
+    'n_estimators': 200,
+    'max_depth': 15,
+    'min_samples_split': 10,
+    'min_samples_leaf': 5,
+    'max_features': 'sqrt',
+    'class_weight': 'balanced'  # Handle class imbalance
+}
+
+
+# Model registry: display name -> factory returning an unfitted estimator.
+# Registration order is the order models are trained and shown in the dashboard.
+MODEL_REGISTRY = {}
+
+
+def register_model(name):
+    """Register a model factory under a display name"""
+    def decorator(factory):
+        MODEL_REGISTRY[name] = factory
+        return factory
+    return decorator
+
+
+# 1. Logistic Regression (baseline, no regularization)
+@register_model('Logistic Regression')
+def _logistic_regression():
+    return LogisticRegression(penalty=None, max_iter=1000, random_state=42, solver='lbfgs')
+
+
+# 2. Regularized Logistic Regression (L1 and L2) - Different regularization strengths
+# Lasso (L1 regularization) - Strong regularization for feature selection
+@register_model('Lasso Regression')
+def _lasso_regression():
+    return LogisticRegression(penalty='l1', C=0.01, solver='liblinear', max_iter=1000, random_state=42)
+
+
+# Ridge (L2 regularization) - Moderate regularization
+@register_model('Ridge Regression')
+def _ridge_regression():
+    return LogisticRegression(penalty='l2', C=0.1, max_iter=1000, random_state=42)
+
+
+# 3. Random Forest - Different hyperparameters to capture non-linearities
+@register_model('Random Forest')
+def _random_forest():
+    # n_jobs=None: the forest gets the joblib workers of the current compute budget
+    return RandomForestClassifier(**RF_PARAMS, random_state=42, n_jobs=None)
+
+
+# 4. Histogram Gradient Boosting - binned features and early stopping, much cheaper than the forest
+@register_model('Gradient Boosting')
+def _gradient_boosting():
+    return HistGradientBoostingClassifier(
+        learning_rate=0.05,
+        max_iter=500,
+        max_leaf_nodes=15,
+        min_samples_leaf=20,
+        early_stopping=True,
+        validation_fraction=0.1,
+        n_iter_no_change=20,
+        class_weight='balanced',
+        random_state=42
+    )
+
+
+def build_models(rf_params=None, names=None):
+    """Build the (unfitted) model suite from the registry, keyed by display name"""
+    models = {name: factory() for name, factory in MODEL_REGISTRY.items()
+              if names is None or name in names}
+    if rf_params and 'Random Forest' in models:
+        models['Random Forest'].set_params(**rf_params)
+    return models
+
+
+def model_config_hash(model):
+    """Hash of an estimator's class, hyperparameters and scikit-learn version"""
+    return code_hash(type(model).__name__, sorted(model.get_params().items()), sklearn.__version__)
+
+
+def _curve_points(x, y, thresholds, x_name, y_name):
+    """A curve downsampled for plotting, with the thresholds of the kept points"""
+    keep = downsample_curve(x, y)
+    return {x_name: x[keep], y_name: y[keep], 'thresholds': thresholds[keep]}
+
+
+def _summarize_models(model_names, probabilities, y_test):
+    """Per-model results entries (everything except the fitted model itself)
     
-    # 1 = Double Disadvantage (low mobility + high AI risk)
-    # 0 = All other categories (Safe, Tech Disruption, Stagnant Protected)
-    y = ((df['mobility_score'] < mobility_median) & (df['ai_exposure'] > ai_median)).astype(int)
-    return y
+    Includes ROC and precision-recall curves computed once here and downsampled for
+    plotting, so the dashboard never recomputes them, the full threshold table
+    behind the dashboard's decision-threshold slider, and 95% bootstrap confidence
+    intervals of every metric.
+    """
+    # Evaluate every model in one batched pass at the default 0.5 cutoff
+    evaluation = evaluate_models(y_test, probabilities, thresholds=[0.5])
+    bootstrap = bootstrap_metrics(y_test, probabilities)
+    
+    summary = {}
+    for i, model_name in enumerate(model_names):
+        fpr, tpr, roc_thresholds = evaluation['roc_curves'][i]
+        recall, precision, pr_thresholds = evaluation['pr_curves'][i]
+        summary[model_name] = {
+            'predictions': (probabilities[i] > 0.5).astype(int),
+            'probabilities': probabilities[i],
+            'true_labels': y_test,
+            'accuracy': float(evaluation['accuracy'][i, 0]),
+            'precision': float(evaluation['precision'][i, 0]),
+            'recall': float(evaluation['recall'][i, 0]),
+            'f1': float(evaluation['f1'][i, 0]),
+            'roc_auc': float(evaluation['roc_auc'][i]),
+            'confusion_matrix': evaluation['confusion_matrix'][i, 0],
+            'confidence_intervals': {metric: bootstrap[metric][i]
+                                     for metric in ['accuracy', 'precision', 'recall', 'f1', 'roc_auc']},
+            'curves': {
+                'roc': _curve_points(fpr, tpr, roc_thresholds, 'fpr', 'tpr'),
+                'pr': _curve_points(recall, precision, pr_thresholds, 'recall', 'precision')
+            },
+            'threshold_table': evaluation['threshold_tables'][i]
+        }
+    return summary
 
 
-def train_models(X_train, X_test, y_train, y_test, scaler=None):
-    """Train all three model types"""
+def train_models(X_train, X_test, y_train, y_test, scaler=None, rf_params=None, store=None, data_key=''):
+    """Train every registered model
+    
+    With an artifact store, each fitted model is cached under data_key (which must
+    identify the training data) plus its hyperparameters, and the evaluation summary
+    under the model keys, the test labels and the evaluation code.
+    """
+    
+    models = build_models(rf_params)
+    model_keys = {}
+    for model_name, model in models.items():
+        if store is None:
+            print(f"Training {model_name}...")
+            with run_report.stage(f'fit {model_name}', cached=False):
+                model.fit(X_train, y_train)
+            continue
+        key = store.key(data_key, model_name, model_config_hash(model))
+        model_keys[model_name] = key
+        cached = store.exists('models', key)
+        print(f"{'Loading cached' if cached else 'Training'} {model_name}...")
+        with run_report.stage(f'fit {model_name}', cached=cached):
+            models[model_name] = store.get_or_compute('models', key, lambda: model.fit(X_train, y_train))
+    
+    def summarize():
+        probabilities = []
+        for model_name, model in models.items():
+            with run_report.stage(f'predict {model_name}'):
+                probabilities.append(model.predict_proba(X_test)[:, 1])
+        with run_report.stage('evaluate'):
+            return _summarize_models(list(models), np.vstack(probabilities), y_test)
+    
+    if store is None:
+        with run_report.stage('evaluation', cached=False):
+            summary = summarize()
+    else:
+        eval_key = store.key(*model_keys.values(), hash_array(X_test), hash_frame(pd.Series(y_test)),
+                             code_hash(_summarize_models, evaluate_models, _sorted_cumulative_counts, _roc_from_counts,
+                                       _pr_from_counts, _curve_points, downsample_curve, threshold_table,
+                                       bootstrap_metrics, _batched_roc_auc))
+        with run_report.stage('evaluation', cached=store.exists('evaluations', eval_key)):
+            summary = store.get_or_compute('evaluations', eval_key, summarize)
     
     results = {}
+    for model_name, model in models.items():
+        results[model_name] = {'model': model, **summary[model_name]}
+        if hasattr(model, 'coef_'):
+            results[model_name]['coefficients'] = model.coef_[0]
+        if hasattr(model, 'feature_importances_'):
+            results[model_name]['feature_importances'] = model.feature_importances_
     
-    # 1. Logistic Regression (baseline, no regularization)
-    print("Training Logistic Regression...")
-    lr = LogisticRegression(penalty=None, max_iter=1000, random_state=42, solver='lbfgs')
-    lr.fit(X_train, y_train)
-    lr_pred = lr.predict(X_test)
-    lr_pred_proba = lr.predict_proba(X_test)[:, 1]
-    
-    results['Logistic Regression'] = {
-        'model': lr,
-        'predictions': lr_pred,
-        'probabilities': lr_pred_proba,
-        'true_labels': y_test,
-        'accuracy': accuracy_score(y_test, lr_pred),
-        'precision': precision_score(y_test, lr_pred, zero_division=0),
-        'recall': recall_score(y_test, lr_pred, zero_division=0),
-        'f1': f1_score(y_test, lr_pred, zero_division=0),
-        'roc_auc': roc_auc_score(y_test, lr_pred_proba),
-        'confusion_matrix': confusion_matrix(y_test, lr_pred),
-        'coefficients': lr.coef_[0] if hasattr(lr, 'coef_') else None
-    }
+    return results
+
+
+def holdout_split(y, test_size=0.2, random_state=42):
+    """Stratified train/test split as positional indices"""
+    return train_test_split(np.arange(len(y)), test_size=test_size, random_state=random_state, stratify=y)
+
+
+# Fold indices keyed by (label hash, n_splits, n_repeats, random_state), shared by every model
+_FOLD_CACHE = {}
+
+
+def make_cv_folds(y, n_splits=5, n_repeats=1, random_state=42):
+    """Stratified (repeated) k-fold indices, computed once per label vector and cached
+    
+    Returns a list of (repeat, train_idx, test_idx) tuples of positional indices.
+    """
+    y = np.asarray(y)
+    key = (hash(y.tobytes()), len(y), n_splits, n_repeats, random_state)
+    if key not in _FOLD_CACHE:
+        splitter = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=random_state)
+        _FOLD_CACHE[key] = [
+            (i // n_splits, train_idx, test_idx)
+            for i, (train_idx, test_idx) in enumerate(splitter.split(np.zeros(len(y)), y))
+        ]
+    return _FOLD_CACHE[key]
+
+
+def _fit_fold(model, X, y, train_idx, test_idx):
+    """Scale on the training fold only, fit one model and return test-fold probabilities"""
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+    model.fit(X_train, y[train_idx])
+    return model.predict_proba(X_test)[:, 1]
+
+
+def cross_validate_models(X, y, n_splits=5, n_repeats=1, n_jobs=None, random_state=42, rf_params=None):
+    """Stratified k-fold (optionally repeated) cross-validation of the whole model suite
+    
+    Every (model, fold) fit runs as an independent job in parallel over the same cached
+    fold indices. Out-of-fold probabilities are averaged over repeats so that every
+    sample gets one held-out prediction per model.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y).astype(int)
+    folds = make_cv_folds(y, n_splits=n_splits, n_repeats=n_repeats, random_state=random_state)
+    models = build_models(rf_params)
+    model_names = list(models.keys())
     
-    # 2. Regularized Logistic Regression (L1 and L2) - Different regularization strengths
-    print("Training Regularized Logistic Regression (L1/L2)...")
-    
-    # Lasso (L1 regularization) - Strong regularization for feature selection
-    lasso_lr = LogisticRegression(penalty='l1', C=0.01, solver='liblinear', max_iter=1000, random_state=42)
-    lasso_lr.fit(X_train, y_train)
-    lasso_pred = lasso_lr.predict(X_test)
-    lasso_pred_proba = lasso_lr.predict_proba(X_test)[:, 1]
-    
-    results['Lasso Regression'] = {
-        'model': lasso_lr,
-        'predictions': lasso_pred,
-        'probabilities': lasso_pred_proba,
-        'true_labels': y_test,
-        'accuracy': accuracy_score(y_test, lasso_pred),
-        'precision': precision_score(y_test, lasso_pred, zero_division=0),
-        'recall': recall_score(y_test, lasso_pred, zero_division=0),
-        'f1': f1_score(y_test, lasso_pred, zero_division=0),
-        'roc_auc': roc_auc_score(y_test, lasso_pred_proba),
-        'confusion_matrix': confusion_matrix(y_test, lasso_pred),
-        'coefficients': lasso_lr.coef_[0] if hasattr(lasso_lr, 'coef_') else None
+    jobs = []
+    for model_name in model_names:
+        for _, train_idx, test_idx in folds:
+            # Parallelism lives at the fold level, so each fit stays single-threaded
+            model = clone(models[model_name])
+            if 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=1)
+            jobs.append(delayed(_fit_fold)(model, X, y, train_idx, test_idx))
+    fold_probabilities = Parallel(n_jobs=n_jobs)(jobs)
+    
+    # Scatter fold predictions back into (model, repeat, sample) order
+    oof = np.zeros((len(model_names), n_repeats, len(y)))
+    fold_rows = []
+    for m, model_name in enumerate(model_names):
+        for f, (repeat, _, test_idx) in enumerate(folds):
+            oof[m, repeat, test_idx] = fold_probabilities[m * len(folds) + f]
+    for f, (repeat, _, test_idx) in enumerate(folds):
+        evaluation = evaluate_models(y[test_idx], oof[:, repeat, test_idx])
+        for m, model_name in enumerate(model_names):
+            fold_rows.append({
+                'model': model_name,
+                'repeat': repeat,
+                'fold': f % n_splits,
+                'accuracy': evaluation['accuracy'][m, 0],
+                'precision': evaluation['precision'][m, 0],
+                'recall': evaluation['recall'][m, 0],
+                'f1': evaluation['f1'][m, 0],
+                'roc_auc': evaluation['roc_auc'][m]
+            })
+    fold_metrics = pd.DataFrame(fold_rows)
+    
+    oof_probabilities = oof.mean(axis=1)
+    pooled = evaluate_models(y, oof_probabilities)
+    summary = fold_metrics.groupby('model', sort=False)[['accuracy', 'precision', 'recall', 'f1', 'roc_auc']].agg(['mean', 'std'])
+    
+    return {
+        'n_splits': n_splits,
+        'n_repeats': n_repeats,
+        'folds': folds,
+        'fold_metrics': fold_metrics,
+        'summary': summary,
+        'oof_probabilities': {name: oof_probabilities[m] for m, name in enumerate(model_names)},
+        'oof_roc_auc': {name: float(pooled['roc_auc'][m]) for m, name in enumerate(model_names)}
     }
+
+
+def run_cross_validation(df, n_splits=5, n_repeats=1, n_jobs=None, rf_params=None, store=DEFAULT_STORE):
+    """Cross-validate the model suite and return out-of-fold risk for every county"""
+    
+    print("\n[CV] Stratified {}-fold cross-validation ({} repeat{})...".format(
+        n_splits, n_repeats, 's' if n_repeats != 1 else ''))
+    X, _ = engineer_features(df, store=store)
+    y = create_binary_target(df)
+    
+    def compute():
+        return cross_validate_models(X.values, y.values, n_splits=n_splits, n_repeats=n_repeats, n_jobs=n_jobs,
+                                     rf_params=rf_params)
     
-    # Ridge (L2 regularization) - Moderate regularization
-    ridge_lr = LogisticRegression(penalty='l2', C=0.1, max_iter=1000, random_state=42)
-    ridge_lr.fit(X_train, y_train)
-    ridge_pred = ridge_lr.predict(X_test)
-    ridge_pred_proba = ridge_lr.predict_proba(X_test)[:, 1]
-    
-    results['Ridge Regression'] = {
-        'model': ridge_lr,
-        'predictions': ridge_pred,
-        'probabilities': ridge_pred_proba,
-        'true_labels': y_test,
-        'accuracy': accuracy_score(y_test, ridge_pred),
-        'precision': precision_score(y_test, ridge_pred, zero_division=0),
-        'recall': recall_score(y_test, ridge_pred, zero_division=0),
-        'f1': f1_score(y_test, ridge_pred, zero_division=0),
-        'roc_auc': roc_auc_score(y_test, ridge_pred_proba),
-        'confusion_matrix': confusion_matrix(y_test, ridge_pred),
-        'coefficients': ridge_lr.coef_[0] if hasattr(ridge_lr, 'coef_') else None
+    if store is None:
+        cv = compute()
+    else:
+        key = store.key(hash_frame(X), hash_frame(y), n_splits, n_repeats,
+                        *(model_config_hash(model) for model in build_models(rf_params).values()),
+                        code_hash(cross_validate_models, _fit_fold, make_cv_folds, evaluate_models))
+        cv = store.get_or_compute('cross_validation', key, compute)
+    
+    # Per-county out-of-fold probabilities, ready to join onto the map by FIPS
+    oof_df = pd.DataFrame(cv['oof_probabilities'], index=df.index)
+    if 'county_fips' in df.columns:
+        oof_df.insert(0, 'county_fips', df['county_fips'].values)
+    oof_df['true_label'] = y.values
+    cv['oof_predictions'] = oof_df
+    
+    print("  {:<22s} {:>16s} {:>16s}".format('Model', 'ROC-AUC', 'F1-Score'))
+    for model_name, row in cv['summary'].iterrows():
+        print("  {:<22s} {:>8.3f} ± {:.3f} {:>8.3f} ± {:.3f}".format(
+            model_name, row[('roc_auc', 'mean')], row[('roc_auc', 'std')],
+            row[('f1', 'mean')], row[('f1', 'std')]))
+    print(f"  Out-of-fold predictions cover all {len(oof_df)} counties")
+    
+    return cv
+
+
+def _fit_state_fold(model, inputs, y, train_idx, test_idx):
+    """Fit one model on a leave-states-out fold and return test-fold probabilities
+    
+    Features are engineered inside the fold: the state aggregates of the training rows
+    come from the training rows only, and the held-out states' from their own counties,
+    so no statistic crosses the train/test boundary. The scaler is fit on the training
+    fold only.
+    """
+    train, test = inputs.iloc[train_idx], inputs.iloc[test_idx]
+    X_train, _ = engineer_features(train, store=None, state_stats=StateMobilityStats.from_frame(train))
+    X_test, _ = engineer_features(test, store=None, state_stats=StateMobilityStats.from_frame(test))
+    scaler = StandardScaler()
+    model.fit(scaler.fit_transform(X_train.to_numpy(dtype=float)), y[train_idx])
+    return model.predict_proba(scaler.transform(X_test.to_numpy(dtype=float)))[:, 1]
+
+
+def spatial_cross_validate_models(df, y, n_splits=5, n_jobs=None, rf_params=None):
+    """Leave-states-out (GroupKFold by state) cross-validation of the whole model suite
+    
+    Every county of a state lands in the same fold, so each model is scored only on
+    states it never saw in training, and state features are recomputed per fold (see
+    _fit_state_fold). Every (model, fold) fit runs in parallel, as in
+    cross_validate_models, and the result has the same layout (without repeats) plus
+    the held-out states of each fold.
+    """
+    inputs = df[['state_name', 'mobility_score']].reset_index(drop=True)
+    y = np.asarray(y).astype(int)
+    groups = pd.factorize(inputs['state_name'])[0]
+    folds = list(GroupKFold(n_splits=n_splits).split(inputs, y, groups))
+    models = build_models(rf_params)
+    model_names = list(models.keys())
+    
+    jobs = []
+    for model_name in model_names:
+        for train_idx, test_idx in folds:
+            model = clone(models[model_name])
+            if 'n_jobs' in model.get_params():
+                model.set_params(n_jobs=1)
+            jobs.append(delayed(_fit_state_fold)(model, inputs, y, train_idx, test_idx))
+    fold_probabilities = Parallel(n_jobs=n_jobs)(jobs)
+    
+    oof = np.zeros((len(model_names), len(y)))
+    for m in range(len(model_names)):
+        for f, (_, test_idx) in enumerate(folds):
+            oof[m, test_idx] = fold_probabilities[m * len(folds) + f]
+    fold_rows = []
+    for f, (_, test_idx) in enumerate(folds):
+        evaluation = evaluate_models(y[test_idx], oof[:, test_idx])
+        for m, model_name in enumerate(model_names):
+            fold_rows.append({
+                'model': model_name,
+                'fold': f,
+                'accuracy': evaluation['accuracy'][m, 0],
+                'precision': evaluation['precision'][m, 0],
+                'recall': evaluation['recall'][m, 0],
+                'f1': evaluation['f1'][m, 0],
+                'roc_auc': evaluation['roc_auc'][m]
+            })
+    fold_metrics = pd.DataFrame(fold_rows)
+    
+    pooled = evaluate_models(y, oof)
+    summary = fold_metrics.groupby('model', sort=False)[['accuracy', 'precision', 'recall', 'f1', 'roc_auc']].agg(['mean', 'std'])
+    
+    return {
+        'n_splits': n_splits,
+        'n_states': int(groups.max()) + 1,
+        'folds': [(train_idx, test_idx) for train_idx, test_idx in folds],
+        'held_out_states': [sorted(inputs['state_name'].iloc[test_idx].dropna().unique()) for _, test_idx in folds],
+        'fold_metrics': fold_metrics,
+        'summary': summary,
+        'oof_probabilities': {name: oof[m] for m, name in enumerate(model_names)},
+        'oof_roc_auc': {name: float(pooled['roc_auc'][m]) for m, name in enumerate(model_names)}
     }
+
+
+def run_spatial_cross_validation(df, n_splits=5, n_jobs=None, rf_params=None, store=DEFAULT_STORE):
+    """Leave-states-out cross-validation, compared with the stratified (mixed-state) CV"""
+    
+    print(f"\n[SPATIAL CV] Leave-states-out {n_splits}-fold cross-validation...")
+    y = create_binary_target(df)
+    
+    def compute():
+        return spatial_cross_validate_models(df, y.values, n_splits=n_splits, n_jobs=n_jobs, rf_params=rf_params)
+    
+    if store is None:
+        cv = compute()
+    else:
+        key = store.key(hash_frame(df[['state_name', 'mobility_score']]), hash_frame(y), n_splits,
+                        *(model_config_hash(model) for model in build_models(rf_params).values()),
+                        code_hash(spatial_cross_validate_models, _fit_state_fold, engineer_features,
+                                  StateMobilityStats, evaluate_models))
+        cv = store.get_or_compute('spatial_cross_validation', key, compute)
+    
+    print(f"  {cv['n_states']} states in {n_splits} folds")
+    print("  {:<22s} {:>16s} {:>16s}".format('Model', 'ROC-AUC', 'F1-Score'))
+    for model_name, row in cv['summary'].iterrows():
+        print("  {:<22s} {:>8.3f} ± {:.3f} {:>8.3f} ± {:.3f}".format(
+            model_name, row[('roc_auc', 'mean')], row[('roc_auc', 'std')],
+            row[('f1', 'mean')], row[('f1', 'std')]))
+    
+    return cv
+
+
+def _warm_path(penalty, Cs, X_train, y_train, X_test=None, y_test=None):
+    """Fit one logistic model along a grid of C values, warm-starting each fit
+    
+    Returns the coefficient path (n_C, n_features), intercepts and, when a test
+    fold is given, the ROC-AUC at every C from one batched evaluation.
+    """
+    # liblinear ignores warm_start, so the L1 path uses saga instead. newton-cholesky
+    # solves the L2 fits exactly and is the cheapest L2 solver on this few features
+    solver = 'saga' if penalty == 'l1' else 'newton-cholesky'
+    model = LogisticRegression(penalty=penalty, solver=solver, warm_start=True, max_iter=1000, random_state=42)
+    coefs, intercepts, probabilities = [], [], []
+    for C in Cs:
+        model.set_params(C=C)
+        model.fit(X_train, y_train)
+        coefs.append(model.coef_[0].copy())
+        intercepts.append(model.intercept_[0])
+        if X_test is not None:
+            probabilities.append(model.predict_proba(X_test)[:, 1])
+    scores = evaluate_models(y_test, np.vstack(probabilities))['roc_auc'] if X_test is not None else None
+    return np.array(coefs), np.array(intercepts), scores
+
+
+def _warm_path_fold(penalty, Cs, X, y, train_idx, test_idx):
+    """Scale on the training fold only and run a warm-started path on it"""
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+    return _warm_path(penalty, Cs, X_train, y[train_idx], X_test, y[test_idx])[2]
+
+
+def regularization_path(X, y, Cs=None, penalties=('l1', 'l2'), n_splits=5, n_jobs=None):
+    """Warm-started L1/L2 logistic regularization paths with CV scores per C
+    
+    C is swept from strongest to weakest regularization, each fit starting from the
+    previous solution. Warm starting mainly pays off for L1: the 20-point saga path
+    costs about 4.5 single saga fits (12.6 cold), and the L1 paths are most of the
+    stage's time. An L2 path still costs about 14 single fits, so L2 uses the cheap
+    newton-cholesky solver (roughly 50 ms per path against 70 ms with warm lbfgs and
+    95 ms with cold lbfgs). The full-data paths and every (penalty, fold) CV path run
+    as independent jobs in parallel, reusing the cached CV fold indices.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y).astype(int)
+    Cs = np.sort(np.logspace(-3, 2, 20) if Cs is None else np.asarray(Cs, dtype=float))
+    folds = make_cv_folds(y, n_splits=n_splits)
+    X_scaled = StandardScaler().fit_transform(X)
+    
+    jobs = [delayed(_warm_path)(penalty, Cs, X_scaled, y) for penalty in penalties]
+    for penalty in penalties:
+        jobs += [delayed(_warm_path_fold)(penalty, Cs, X, y, train_idx, test_idx)
+                 for _, train_idx, test_idx in folds]
+    outputs = Parallel(n_jobs=n_jobs)(jobs)
+    
+    paths = {}
+    for p, penalty in enumerate(penalties):
+        coef_path, intercepts, _ = outputs[p]
+        start = len(penalties) + p * len(folds)
+        cv_scores = np.vstack(outputs[start:start + len(folds)])
+        mean_scores = cv_scores.mean(axis=0)
+        paths[penalty] = {
+            'coef_path': coef_path,
+            'intercepts': intercepts,
+            'cv_scores': cv_scores,
+            'mean_cv_score': mean_scores,
+            'best_C': float(Cs[np.argmax(mean_scores)])
+        }
+    return {'Cs': Cs, 'paths': paths}
+
+
+def run_regularization_path(df, Cs=None, n_splits=5, n_jobs=None, store=DEFAULT_STORE):
+    """Compute L1/L2 regularization paths and report the best C per penalty"""
+    
+    print("\n[PATH] Warm-started L1/L2 regularization paths...")
+    X, _ = engineer_features(df, store=store)
+    y = create_binary_target(df)
     
-    # 3. Random Forest - Different hyperparameters to capture non-linearities
-    print("Training Random Forest...")
-    rf = RandomForestClassifier(
-        n_estimators=200, 
-        max_depth=15, 
-        min_samples_split=10,
-        min_samples_leaf=5,
-        max_features='sqrt',
-        random_state=42, 
-        n_jobs=-1,
-        class_weight='balanced'  # Handle class imbalance
+    def compute():
+        return regularization_path(X.values, y.values, Cs=Cs, n_splits=n_splits, n_jobs=n_jobs)
+    
+    start = time.perf_counter()
+    if store is None:
+        path = compute()
+    else:
+        key = store.key(hash_frame(X), hash_frame(y), repr(Cs), n_splits, sklearn.__version__,
+                        code_hash(regularization_path, _warm_path, _warm_path_fold, make_cv_folds, evaluate_models))
+        path = store.get_or_compute('regularization_paths', key, compute)
+    elapsed = time.perf_counter() - start
+    path['feature_names'] = X.columns.tolist()
+    
+    for penalty, info in path['paths'].items():
+        print(f"  {penalty.upper()}: best C = {info['best_C']:.4g} "
+              f"(CV ROC-AUC {info['mean_cv_score'].max():.3f}), "
+              f"{int((np.abs(info['coef_path']) > 1e-8).sum(axis=1)[0])} non-zero coefficients at C = {path['Cs'][0]:.0e}")
+    print(f"  {len(path['Cs'])} C values x {len(path['paths'])} penalties x {n_splits + 1} fits in {elapsed:.2f}s")
+    
+    return path
+
+
+def _permuted_scores(models, X, y, column, repeats, random_state):
+    """ROC-AUC of every model with one column permuted, for a block of repeats
+    
+    All repeats are stacked into one matrix so each model predicts once per block, and
+    evaluate_models scores every (model, repeat) row in one batched pass. Each
+    (column, repeat) permutation has its own seed, so results don't depend on how
+    repeats are split across tasks. Returns (n_models, len(repeats)).
+    """
+    n = len(X)
+    X_permuted = np.tile(X, (len(repeats), 1))
+    for i, repeat in enumerate(repeats):
+        rng = np.random.default_rng([random_state, column, repeat])
+        X_permuted[i * n:(i + 1) * n, column] = X[rng.permutation(n), column]
+    probabilities = np.vstack([model.predict_proba(X_permuted)[:, 1].reshape(len(repeats), n) for model in models])
+    return evaluate_models(y, probabilities)['roc_auc'].reshape(len(models), len(repeats))
+
+
+def permutation_importance(models, X, y, n_repeats=10, repeats_per_task=5, n_jobs=None, random_state=42):
+    """Permutation importance (drop in ROC-AUC) of every feature for every model
+    
+    Each model's unpermuted prediction is computed once and shared by all features and
+    repeats. The (feature, block of repeats) tasks run in parallel, and every model is
+    scored on the same permutations.
+    
+    Returns base_scores {model: ROC-AUC} plus importances {model: (n_features,
+    n_repeats)} and their per-feature mean/std.
+    """
+    X, y = np.asarray(X, dtype=float), np.asarray(y)
+    names = list(models)
+    base = evaluate_models(y, np.vstack([models[name].predict_proba(X)[:, 1] for name in names]))['roc_auc']
+    
+    blocks = [list(range(start, min(start + repeats_per_task, n_repeats)))
+              for start in range(0, n_repeats, repeats_per_task)]
+    tasks = [(column, block) for column in range(X.shape[1]) for block in blocks]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_permuted_scores)([models[name] for name in names], X, y, column, block, random_state)
+        for column, block in tasks
     )
-    rf.fit(X_train, y_train)
-    rf_pred = rf.predict(X_test)
-    rf_pred_proba = rf.predict_proba(X_test)[:, 1]
-    
-    results['Random Forest'] = {
-        'model': rf,
-        'predictions': rf_pred,
-        'probabilities': rf_pred_proba,
-        'true_labels': y_test,
-        'accuracy': accuracy_score(y_test, rf_pred),
-        'precision': precision_score(y_test, rf_pred, zero_division=0),
-        'recall': recall_score(y_test, rf_pred, zero_division=0),
-        'f1': f1_score(y_test, rf_pred, zero_division=0),
-        'roc_auc': roc_auc_score(y_test, rf_pred_proba),
-        'confusion_matrix': confusion_matrix(y_test, rf_pred),
-        'feature_importances': rf.feature_importances_
+    
+    permuted = np.empty((len(names), X.shape[1], n_repeats))
+    for (column, block), block_scores in zip(tasks, scores):
+        permuted[:, column, block] = block_scores
+    importances = base[:, np.newaxis, np.newaxis] - permuted
+    return {
+        'n_repeats': n_repeats,
+        'base_scores': {name: float(base[i]) for i, name in enumerate(names)},
+        'importances': {name: importances[i] for i, name in enumerate(names)},
+        'importances_mean': {name: importances[i].mean(axis=1) for i, name in enumerate(names)},
+        'importances_std': {name: importances[i].std(axis=1) for i, name in enumerate(names)}
     }
+
+
+def run_permutation_importance(results, X_test, y_test, feature_names, models_key='', n_repeats=10,
+                               n_jobs=None, store=DEFAULT_STORE):
+    """Permutation importance of every trained model on the held-out test set
     
-    return results
+    Cached in the artifact store under models_key (which must identify the fitted
+    models, e.g. the results manifest), the test data and the importance code.
+    """
+    print("\n[IMPORTANCE] Permutation importance on the test set...")
+    models = {name: entry['model'] for name, entry in results.items()}
+    
+    def compute():
+        return permutation_importance(models, X_test, y_test, n_repeats=n_repeats, n_jobs=n_jobs)
+    
+    if store is None:
+        importance = compute()
+    else:
+        key = store.key(models_key, hash_array(X_test), hash_frame(pd.Series(y_test)), n_repeats,
+                        code_hash(permutation_importance, _permuted_scores, evaluate_models))
+        importance = store.get_or_compute('permutation_importance', key, compute)
+    importance['feature_names'] = list(feature_names)
+    
+    for name, means in importance['importances_mean'].items():
+        top = np.argsort(means)[::-1][:3]
+        print(f"  {name}: " + ", ".join(f"{feature_names[i]} ({means[i]:+.3f})" for i in top))
+    return importance
+
+
+def _forest_contributions(forest, X):
+    """Decision-path feature contributions of a random forest, per sample (Saabas)
+    
+    Walking a tree from the root, every split moves the node's positive-class fraction
+    from the parent's value to the child's; that change is credited to the split
+    feature. Each tree's per-node credits form a sparse (nodes x features) matrix, so
+    one sparse product with the tree's decision-path indicator gives every sample's
+    contributions. Returns the bias (mean root value) and an (n_samples, n_features)
+    array; bias + contributions.sum(axis=1) reproduces predict_proba(X)[:, 1].
+    """
+    contributions = np.zeros((len(X), forest.n_features_in_))
+    bias = 0.0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1)
+        internal = np.flatnonzero(tree.children_left >= 0)
+        children = np.concatenate([tree.children_left[internal], tree.children_right[internal]])
+        parents = np.concatenate([internal, internal])
+        credits = sparse.csr_matrix((value[children] - value[parents], (children, tree.feature[parents])),
+                                    shape=(tree.node_count, forest.n_features_in_))
+        contributions += (estimator.decision_path(X) @ credits).toarray()
+        bias += value[0]
+    n_trees = len(forest.estimators_)
+    return bias / n_trees, contributions / n_trees
 
 
-def run_ml_analysis(df):
-    """Run complete ML analysis pipeline"""
+def explain_predictions(results, X):
+    """Per-sample feature contributions for every model that supports them
+    
+    X is the scaled feature matrix. Logistic models get coefficient x scaled feature
+    (log-odds, bias = intercept); the random forest gets decision-path contributions
+    (probability, bias = mean root value). In both cases bias plus the row sum is the
+    model's output in those units. Other models are skipped.
+    
+    Returns {model: {'units', 'bias', 'contributions' (n_samples, n_features)}}.
+    """
+    explanations = {}
+    for name, entry in results.items():
+        model = entry['model']
+        if isinstance(model, LogisticRegression):
+            explanations[name] = {'units': 'log-odds', 'bias': float(model.intercept_[0]),
+                                  'contributions': X * model.coef_[0]}
+        elif isinstance(model, RandomForestClassifier):
+            bias, contributions = _forest_contributions(model, X)
+            explanations[name] = {'units': 'probability', 'bias': float(bias), 'contributions': contributions}
+    return explanations
+
+
+def run_county_explanations(df, results, scaler, feature_names, models_key='', store=DEFAULT_STORE):
+    """Feature contributions of every model for every county, computed in bulk once
+    
+    Cached in the artifact store under models_key (which must identify the fitted
+    models), the county inputs and the explanation code, so the dashboard's county
+    detail panel only ever looks rows up.
+    """
+    print("\n[EXPLAIN] Per-county feature contributions...")
+    
+    def compute():
+        X, _ = engineer_features(df, store=store)
+        explanations = explain_predictions(results, scaler.transform(X[feature_names].to_numpy(dtype=float)))
+        return {'county_fips': df['county_fips'].to_numpy(), 'feature_names': list(feature_names),
+                'models': explanations}
+    
+    if store is None:
+        explanations = compute()
+    else:
+        key = store.key(models_key, hash_frame(df[['county_fips', 'state_name', 'mobility_score']]),
+                        code_hash(explain_predictions, _forest_contributions, engineer_features))
+        explanations = store.get_or_compute('explanations', key, compute)
+    print(f"  {len(explanations['county_fips'])} counties x {len(explanations['models'])} models "
+          f"({', '.join(explanations['models'])})")
+    return explanations
+
+
+# Search space for the Random Forest successive-halving search
+RF_SEARCH_SPACE = {
+    'max_depth': [5, 8, 10, 15, 20, None],
+    'min_samples_split': [2, 5, 10, 20],
+    'min_samples_leaf': [1, 2, 5, 10, 20],
+    'max_features': ['sqrt', 0.5, None],
+    'class_weight': ['balanced', None]
+}
+
+
+def _fit_rf_candidate(params, n_estimators, data_fraction, X, y, train_idx, test_idx, seed, deadline):
+    """Fit one forest candidate on a stratified subsample of a training fold and score it"""
+    if time.time() > deadline:
+        return float('nan'), 0.0
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    # Stratified subsample: keep the same fraction of each class
+    subsample = np.concatenate([
+        rng.choice(cls_idx, size=max(1, int(round(len(cls_idx) * data_fraction))), replace=False)
+        for cls_idx in (train_idx[y[train_idx] == 0], train_idx[y[train_idx] == 1])
+    ])
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[subsample])
+    X_test = scaler.transform(X[test_idx])
+    rf = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=1, **params)
+    rf.fit(X_train, y[subsample])
+    score = evaluate_models(y[test_idx], rf.predict_proba(X_test)[:, 1])['roc_auc'][0]
+    return float(score), time.perf_counter() - start
+
+
+def successive_halving_rf(X, y, n_candidates=27, eta=3, max_trees=200, min_trees=8, min_fraction=0.1,
+                          n_splits=3, time_budget=60.0, n_jobs=None, random_state=42):
+    """Successive-halving search over Random Forest hyperparameters
+    
+    Each rung scores the surviving candidates on the cached CV folds, growing the tree
+    count and training-data fraction together by a factor of eta, then keeps the top
+    1/eta. All (candidate, fold) fits in a rung run in parallel. The search stops early
+    once time_budget seconds have elapsed and returns the best configuration so far.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y).astype(int)
+    rng = np.random.default_rng(random_state)
+    folds = make_cv_folds(y, n_splits=n_splits)
+    deadline = time.time() + time_budget
+    
+    candidates = [
+        {name: values[rng.integers(len(values))] for name, values in RF_SEARCH_SPACE.items()}
+        for _ in range(n_candidates)
+    ]
+    n_rungs = int(np.floor(np.log(n_candidates) / np.log(eta))) + 1
+    alive = list(range(n_candidates))
+    history = []
+    
+    for rung in range(n_rungs):
+        scale = float(eta) ** (rung - n_rungs + 1)
+        n_estimators = max(min_trees, int(round(max_trees * scale)))
+        data_fraction = max(min_fraction, scale)
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_rf_candidate)(candidates[c], n_estimators, data_fraction, X, y,
+                                       train_idx, test_idx, random_state + f, deadline)
+            for c in alive for f, (_, train_idx, test_idx) in enumerate(folds)
+        )
+        scores = np.array([score for score, _ in outputs]).reshape(len(alive), len(folds))
+        fit_times = np.array([fit_time for _, fit_time in outputs]).reshape(len(alive), len(folds))
+        for i, c in enumerate(alive):
+            history.append({
+                'rung': rung,
+                'candidate': c,
+                **{name: candidates[c][name] for name in RF_SEARCH_SPACE},
+                'n_estimators': n_estimators,
+                'data_fraction': data_fraction,
+                'mean_roc_auc': float(np.nanmean(scores[i])) if not np.isnan(scores[i]).all() else float('nan'),
+                'std_roc_auc': float(np.nanstd(scores[i])) if not np.isnan(scores[i]).all() else float('nan'),
+                'folds_scored': int((~np.isnan(scores[i])).sum()),
+                'fit_time': float(fit_times[i].sum())
+            })
+        
+        # Rank by mean score; unfinished candidates (budget hit mid-rung) sort last
+        mean_scores = np.array([h['mean_roc_auc'] for h in history[-len(alive):]])
+        ranked = [alive[i] for i in np.argsort(-np.nan_to_num(mean_scores, nan=-np.inf), kind='stable')]
+        if time.time() > deadline:
+            alive = ranked[:1]
+            break
+        alive = ranked[:max(1, len(alive) // eta)]
+    
+    history = pd.DataFrame(history)
+    best = alive[0]
+    best_row = history[history['candidate'] == best].iloc[-1]
+    return {
+        'best_params': {**candidates[best], 'n_estimators': max_trees},
+        'best_score': float(best_row['mean_roc_auc']),
+        'best_rung': int(best_row['rung']),
+        'history': history,
+        'completed': bool(best_row['rung'] == n_rungs - 1 and best_row['folds_scored'] == len(folds)),
+        'time_budget': time_budget
+    }
+
+
+def run_rf_search(df, time_budget=60.0, n_jobs=None):
+    """Budgeted successive-halving search for the Random Forest configuration"""
+    
+    print(f"\n[SEARCH] Random Forest successive halving (budget {time_budget:.0f}s)...")
+    X, _ = engineer_features(df)
+    y = create_binary_target(df)
+    
+    start = time.perf_counter()
+    search = successive_halving_rf(X.values, y.values, time_budget=time_budget, n_jobs=n_jobs)
+    elapsed = time.perf_counter() - start
+    search['elapsed'] = elapsed
+    
+    history = search['history']
+    for rung, group in history.groupby('rung'):
+        print(f"  Rung {rung}: {len(group)} candidates, {group['n_estimators'].iloc[0]} trees, "
+              f"{group['data_fraction'].iloc[0]:.0%} of data, best ROC-AUC {group['mean_roc_auc'].max():.3f}")
+    status = 'completed' if search['completed'] else 'stopped at budget'
+    print(f"  Search {status} in {elapsed:.1f}s; best CV ROC-AUC {search['best_score']:.3f}")
+    print(f"  Best params: {search['best_params']}")
+    
+    return search
+
+
+def run_ml_analysis(df, rf_params=None, store=DEFAULT_STORE):
+    """Run complete ML analysis pipeline
+    
+    Features, split indices, fitted models and the evaluation summary are reused from
+    the artifact store when their inputs are unchanged. Pass store=None to recompute
+    everything.
+    """
     
     print("="*60)
     print("MACHINE LEARNING ANALYSIS")
@@ -199,14 +1049,17 @@ def run_ml_analysis(df):
     
     # Feature Engineering
     print("\n[STEP 1] Feature Engineering...")
-    X, df_with_regions = engineer_features(df)
+    reused_before = store.stats['reused'] if store is not None else 0
+    with run_report.stage('feature engineering'):
+        X, df_with_regions = engineer_features(df, store=store)
     feature_names = X.columns.tolist()
     print(f"  Created {len(feature_names)} features")
     print(f"  Features: {', '.join(feature_names[:5])}...")
     
     # Create target
     print("\n[STEP 2] Creating binary target (Double Disadvantage)...")
-    y = create_binary_target(df)
+    with run_report.stage('target'):
+        y = create_binary_target(df)
     target_dist = pd.Series(y).value_counts().to_dict()
     print(f"  Target distribution: {target_dist}")
     print(f"  Double Disadvantage (1): {target_dist.get(1, 0)} counties ({target_dist.get(1, 0)/len(y)*100:.1f}%)")
@@ -215,56 +1068,498 @@ def run_ml_analysis(df):
     print(f"  Hypothesis: Low mobility patterns predict double disadvantage counties")
     
     # Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+    with run_report.stage('split'):
+        if store is None:
+            train_idx, test_idx = holdout_split(y)
+            split_key = ''
+        else:
+            split_key = store.key(hash_frame(y), 0.2, 42, code_hash(holdout_split), sklearn.__version__)
+            train_idx, test_idx = store.get_or_compute('splits', split_key, lambda: holdout_split(y))
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
     
     # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
+    with run_report.stage('scaling'):
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
     
     print(f"\n[STEP 3-5] Training models...")
     print(f"  Training set: {X_train.shape[0]} samples")
     print(f"  Test set: {X_test.shape[0]} samples")
     
     # Train all models
-    results = train_models(X_train_scaled, X_test_scaled, y_train, y_test, scaler)
+    data_key = store.key(hash_frame(X), split_key) if store is not None else ''
+    results = train_models(X_train_scaled, X_test_scaled, y_train, y_test, scaler, rf_params=rf_params,
+                           store=store, data_key=data_key)
+    if store is not None:
+        print(f"  Artifact store: reused {store.stats['reused'] - reused_before} cached artifacts")
     
     # Print summary
+    print("\n" + "="*60)
+    print("MODEL PERFORMANCE SUMMARY")
+    print("="*60)
+    print("(95% bootstrap confidence intervals over test-set resamples)")
+    for model_name, metrics in results.items():
+        ci = metrics['confidence_intervals']
+        print(f"\n{model_name}:")
+        print(f"  Accuracy:  {metrics['accuracy']:.3f}  [{ci['accuracy'][0]:.3f}, {ci['accuracy'][1]:.3f}]")
+        print(f"  Precision: {metrics['precision']:.3f}  [{ci['precision'][0]:.3f}, {ci['precision'][1]:.3f}]")
+        print(f"  Recall:    {metrics['recall']:.3f}  [{ci['recall'][0]:.3f}, {ci['recall'][1]:.3f}]")
+        print(f"  F1-Score:  {metrics['f1']:.3f}  [{ci['f1'][0]:.3f}, {ci['f1'][1]:.3f}]")
+        print(f"  ROC-AUC:   {metrics['roc_auc']:.3f}  [{ci['roc_auc'][0]:.3f}, {ci['roc_auc'][1]:.3f}]")
+    
+    return results, feature_names, X_test_scaled, y_test, scaler
+
+
+# =============================================================================
+# OUT-OF-CORE TRAINING
+# =============================================================================
+# For datasets too large to hold in memory (tracts x cohorts): features are streamed
+# once into memory-mapped .npy matrices, and every later pass (target, scaler, SGD
+# epochs, evaluation) reads them chunk by chunk, so peak memory is set by chunk_size.
+
+def _chunk_slices(n, chunk_size):
+    return [slice(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+
+def _clean_chunk(chunk):
+    """Same cleaning as the dashboard: infinities are missing, rows without scores dropped"""
+    chunk = chunk.replace([np.inf, -np.inf], np.nan)
+    return chunk.dropna(subset=['mobility_score', 'ai_exposure'])
+
+
+def _streamed_order_statistic(values, k, chunk_size, bins=1024):
+    """k-th smallest (0-based) value of a 1-D, possibly memory-mapped, array
+    
+    Histograms narrow a [low, high] bracket around the k-th value until the values
+    inside fit in one chunk (or the bracket is a few ulps wide, i.e. heavy ties), and
+    those are then selected exactly.
+    """
+    chunks = _chunk_slices(len(values), chunk_size)
+    low = min(values[chunk].min() for chunk in chunks)
+    high = max(values[chunk].max() for chunk in chunks)
+    while True:
+        below = sum(np.count_nonzero(values[chunk] < low) for chunk in chunks)
+        if high - low <= bins * np.spacing(max(abs(low), abs(high))):
+            break
+        counts = np.zeros(bins, dtype=np.int64)
+        for chunk in chunks:
+            chunk_counts, edges = np.histogram(values[chunk], bins=bins, range=(low, high))
+            counts += chunk_counts
+        if counts.sum() <= chunk_size:
+            break
+        j = np.searchsorted(np.cumsum(counts), k - below, side='right')
+        low, high = edges[j], edges[j + 1]
+    inside = np.concatenate([values[chunk][(values[chunk] >= low) & (values[chunk] <= high)] for chunk in chunks])
+    return np.partition(inside, k - below)[k - below]
+
+
+def streamed_median(values, chunk_size=50_000):
+    """Exact median of a (memory-mapped) array in bounded memory, as Series.median"""
+    n = len(values)
+    return float(np.mean([_streamed_order_statistic(values, k, chunk_size) for k in sorted({(n - 1) // 2, n // 2})]))
+
+
+def open_feature_matrix(directory):
+    """Memory-map a feature matrix written by write_feature_matrix"""
+    with open(os.path.join(directory, 'features.json')) as f:
+        meta = json.load(f)
+    return {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+            for name in ('X', 'y', 'inputs')} | meta
+
+
+def write_feature_matrix(data, directory, chunk_size=50_000):
+    """Stream a dataset into memory-mapped feature and target matrices on disk
+    
+    data is a DataFrame or the path of a CSV file with state_name, mobility_score and
+    ai_exposure. It is read in chunk_size chunks:
+    1. accumulate the per-state mobility aggregates and count the rows;
+    2. engineer features for each chunk and write them to X.npy (rows x features),
+       and the target inputs to inputs.npy;
+    3. compute the medians of the target inputs from inputs.npy and write the Double
+       Disadvantage target (as create_binary_target) to y.npy.
+    Rows are cleaned as in the dashboard. The state aggregates are saved with the
+    matrix, for scoring new data against them. Returns open_feature_matrix(directory).
+    """
+    columns = ['state_name', 'mobility_score', 'ai_exposure']
+    os.makedirs(directory, exist_ok=True)
+    
+    state_stats, n = StateMobilityStats(), 0
+    for chunk in _iter_chunks(data, columns, chunk_size):
+        chunk = _clean_chunk(chunk)
+        state_stats.update(chunk)
+        n += len(chunk)
+    
+    X, start = None, 0
+    inputs = np.lib.format.open_memmap(os.path.join(directory, 'inputs.npy'), mode='w+', dtype=float, shape=(n, 2))
+    for chunk in _iter_chunks(data, columns, chunk_size):
+        chunk = _clean_chunk(chunk)
+        features, _ = engineer_features(chunk, store=None, state_stats=state_stats)
+        if X is None:
+            feature_names = features.columns.tolist()
+            X = np.lib.format.open_memmap(os.path.join(directory, 'X.npy'), mode='w+', dtype=float,
+                                          shape=(n, len(feature_names)))
+        X[start:start + len(chunk)] = features.to_numpy(dtype=float)
+        inputs[start:start + len(chunk)] = chunk[['mobility_score', 'ai_exposure']].to_numpy(dtype=float)
+        start += len(chunk)
+    X.flush()
+    
+    mobility_median = streamed_median(inputs[:, 0], chunk_size)
+    ai_median = streamed_median(inputs[:, 1], chunk_size)
+    y = np.lib.format.open_memmap(os.path.join(directory, 'y.npy'), mode='w+', dtype=np.int8, shape=(n,))
+    for chunk in _chunk_slices(n, chunk_size):
+        y[chunk] = (inputs[chunk, 0] < mobility_median) & (inputs[chunk, 1] > ai_median)
+    y.flush()
+    inputs.flush()
+    
+    with open(os.path.join(directory, 'features.json'), 'w') as f:
+        json.dump({'feature_names': feature_names, 'mobility_median': mobility_median, 'ai_median': ai_median,
+                   'state_stats': state_stats.stats.reset_index().to_dict('list')}, f)
+    return open_feature_matrix(directory)
+
+
+def incremental_models(n_train, random_state=42):
+    """partial_fit counterparts of the registered logistic models, keyed by display name
+    
+    Each LogisticRegression in the registry becomes an averaged SGD log-loss classifier
+    with the same penalty; C maps to alpha = 1 / (C * n_train), which gives both the
+    same objective. Models without an incremental solver (the tree ensembles) are
+    skipped.
+    """
+    models = {}
+    for name, model in build_models().items():
+        if not isinstance(model, LogisticRegression):
+            continue
+        penalty = model.get_params()['penalty']
+        models[name] = SGDClassifier(
+            loss='log_loss',
+            penalty=penalty,
+            alpha=1.0 / (model.get_params()['C'] * n_train) if penalty is not None else 1e-4,
+            average=True,
+            random_state=random_state
+        )
+    return models
+
+
+def run_ml_analysis_out_of_core(data, directory, chunk_size=50_000, n_epochs=10, test_size=0.2, random_state=42):
+    """Out-of-core variant of run_ml_analysis for the linear models
+    
+    Writes the memory-mapped feature matrix to directory (write_feature_matrix), then
+    makes chunked passes over it:
+    1. a seeded Bernoulli train/test split, drawn row by row, so it doesn't depend on
+       chunk_size (unlike holdout_split it is not stratified);
+    2. StandardScaler statistics via partial_fit on the training rows;
+    3. n_epochs of SGD (incremental_models) over the training rows, chunks and rows
+       within a chunk shuffled every epoch;
+    4. scale the test rows into X_test.npy and predict them with every model.
+    Peak memory is bounded by chunk_size plus the (test rows x models) predictions.
+    
+    Returns the same (results, feature_names, X_test_scaled, y_test, scaler) as
+    run_ml_analysis, with X_test_scaled memory-mapped.
+    """
+    
+    print("="*60)
+    print("MACHINE LEARNING ANALYSIS (OUT-OF-CORE)")
+    print("="*60)
+    
+    print(f"\n[STEP 1] Streaming features to {directory} ({chunk_size} rows per chunk)...")
+    matrix = write_feature_matrix(data, directory, chunk_size=chunk_size)
+    X, y, feature_names = matrix['X'], matrix['y'], matrix['feature_names']
+    chunks = _chunk_slices(len(X), chunk_size)
+    print(f"  {X.shape[0]} rows x {len(feature_names)} features")
+    
+    print("\n[STEP 2] Splitting and fitting the scaler...")
+    rng = np.random.default_rng(random_state)
+    is_test = np.lib.format.open_memmap(os.path.join(directory, 'is_test.npy'), mode='w+', dtype=bool, shape=(len(X),))
+    scaler = StandardScaler()
+    for chunk in chunks:
+        is_test[chunk] = rng.random(chunk.stop - chunk.start) < test_size
+        scaler.partial_fit(X[chunk][~is_test[chunk]])
+    n_test = int(sum(np.count_nonzero(is_test[chunk]) for chunk in chunks))
+    print(f"  Training set: {len(X) - n_test} samples")
+    print(f"  Test set: {n_test} samples")
+    
+    print(f"\n[STEP 3-5] Training linear models with partial_fit ({n_epochs} epochs)...")
+    models = incremental_models(len(X) - n_test, random_state=random_state)
+    for epoch in range(n_epochs):
+        for c in rng.permutation(len(chunks)):
+            train = ~is_test[chunks[c]]
+            X_chunk, y_chunk = scaler.transform(X[chunks[c]][train]), y[chunks[c]][train]
+            order = rng.permutation(len(y_chunk))
+            for model in models.values():
+                model.partial_fit(X_chunk[order], y_chunk[order], classes=[0, 1])
+    
+    X_test = np.lib.format.open_memmap(os.path.join(directory, 'X_test.npy'), mode='w+', dtype=float,
+                                       shape=(n_test, len(feature_names)))
+    y_test = np.empty(n_test, dtype=int)
+    probabilities = np.empty((len(models), n_test))
+    start = 0
+    for chunk in chunks:
+        test = is_test[chunk]
+        end = start + np.count_nonzero(test)
+        X_test[start:end] = scaler.transform(X[chunk][test])
+        y_test[start:end] = y[chunk][test]
+        for m, model in enumerate(models.values()):
+            probabilities[m, start:end] = model.predict_proba(X_test[start:end])[:, 1]
+        start = end
+    X_test.flush()
+    
+    summary = _summarize_models(list(models), probabilities, y_test)
+    results = {name: {'model': model, **summary[name], 'coefficients': model.coef_[0]}
+               for name, model in models.items()}
+    
     print("\n" + "="*60)
     print("MODEL PERFORMANCE SUMMARY")
     print("="*60)
     for model_name, metrics in results.items():
         print(f"\n{model_name}:")
         print(f"  Accuracy:  {metrics['accuracy']:.3f}")
-        print(f"  Precision: {metrics['precision']:.3f}")
-        print(f"  Recall:    {metrics['recall']:.3f}")
         print(f"  F1-Score:  {metrics['f1']:.3f}")
         print(f"  ROC-AUC:   {metrics['roc_auc']:.3f}")
     
-    return results, feature_names, X_test_scaled, y_test, scaler
+    return results, feature_names, X_test, y_test, scaler
+
+
+def build_ml_results(df, rf_params=None, rf_search=None, store=DEFAULT_STORE, progress=None):
+    """Build the complete ML results dict the dashboard loads (the ml_results bundle)
+    
+    Every stage goes through the artifact store, so only stages whose inputs changed
+    are recomputed, and the store is pruned to its size and age limits afterwards
+    (ArtifactStore.prune). progress, if given, is called as progress(stage,
+    fraction_done) before each stage and once more with ('Done', 1.0). Each stage is
+    also timed in the active run report, if one is recording (see run_report).
+    """
+    stages = ['Training models', 'Scoring all counties', 'Explaining county predictions',
+              'Computing permutation importance', 'Cross-validating models', 'Cross-validating by state',
+              'Computing regularization paths']
+    
+    def step(stage):
+        if progress is not None:
+            progress(stage, stages.index(stage) / len(stages))
+        return run_report.stage(stage)
+    
+    manifest = results_manifest(df, rf_params)
+    run_report.annotate(n_counties=len(df), manifest=_to_builtin(manifest),
+                        compute_budget=compute_budget.current_allocation()['thread'])
+    with step('Training models'):
+        results, feature_names, X_test, y_test, scaler = run_ml_analysis(df, rf_params=rf_params, store=store)
+    # State aggregates of the training counties, for featurizing new data the same way
+    state_stats = StateMobilityStats.from_frame(df).stats
+    with step('Scoring all counties'):
+        county_scores = score_counties(df, {'results': results, 'scaler': scaler, 'feature_names': feature_names,
+                                            'state_stats': state_stats, 'manifest': manifest}, store=store)
+    with step('Explaining county predictions'):
+        explanations = run_county_explanations(df, results, scaler, feature_names,
+                                               models_key=repr(sorted(manifest.items())), store=store)
+    with step('Computing permutation importance'):
+        importance = run_permutation_importance(results, X_test, y_test, feature_names,
+                                                models_key=repr(sorted(manifest.items())), store=store)
+    with step('Cross-validating models'):
+        cross_validation = run_cross_validation(df, rf_params=rf_params, store=store)
+    with step('Cross-validating by state'):
+        spatial_cross_validation = run_spatial_cross_validation(df, rf_params=rf_params, store=store)
+    with step('Computing regularization paths'):
+        regularization_path = run_regularization_path(df, store=store)
+    if store is not None:
+        # Every stage has now touched its artifacts, so pruning drops only older runs' ones
+        removed, freed = store.prune()
+        if removed:
+            print(f"\n[CACHE] Pruned {removed} unused artifacts ({freed / 2**20:.1f} MB)")
+    if progress is not None:
+        progress('Done', 1.0)
+    return {
+        'results': results,
+        'feature_names': feature_names,
+        'state_stats': state_stats,
+        'X_test': X_test,
+        'y_test': y_test,
+        'scaler': scaler,
+        'county_scores': county_scores,
+        'explanations': explanations,
+        'permutation_importance': importance,
+        'cross_validation': cross_validation,
+        'spatial_cross_validation': spatial_cross_validation,
+        'regularization_path': regularization_path,
+        'rf_search': rf_search,
+        'manifest': manifest
+    }
+
+
+def _to_builtin(value):
+    """Convert NumPy scalars/arrays (recursively) to JSON-serializable Python values"""
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _to_builtin(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def build_ml_summary(ml_results):
+    """Compact, JSON-serializable view of ml_results for the dashboard
+    
+    Holds only what the charts draw: metrics, confusion matrices, the downsampled ROC
+    and precision-recall curves, threshold tables, permutation importances, the
+    stratified and leave-states-out CV summaries and the regularization paths. No
+    fitted models or county-level arrays (a threshold table has one entry per distinct
+    test-set score), so it loads in milliseconds without scikit-learn.
+    """
+    models = {}
+    for model_name, metrics in ml_results['results'].items():
+        roc, pr = metrics['curves']['roc'], metrics['curves']['pr']
+        models[model_name] = {
+            'accuracy': metrics['accuracy'],
+            'precision': metrics['precision'],
+            'recall': metrics['recall'],
+            'f1': metrics['f1'],
+            'roc_auc': metrics['roc_auc'],
+            'confusion_matrix': metrics['confusion_matrix'],
+            'roc': {'fpr': roc['fpr'], 'tpr': roc['tpr']},
+            'pr': {'recall': pr['recall'], 'precision': pr['precision']},
+            'threshold_table': metrics['threshold_table'],
+            'confidence_intervals': metrics['confidence_intervals']
+        }
+    
+    summary = {
+        'manifest': ml_results.get('manifest'),
+        'feature_names': ml_results['feature_names'],
+        'models': models
+    }
+    cv = ml_results.get('cross_validation')
+    if cv is not None:
+        summary['cross_validation'] = {
+            'n_splits': cv['n_splits'],
+            'n_repeats': cv['n_repeats'],
+            'metrics': {
+                model_name: {metric: {'mean': row[(metric, 'mean')], 'std': row[(metric, 'std')]}
+                             for metric in ['accuracy', 'precision', 'recall', 'f1', 'roc_auc']}
+                for model_name, row in cv['summary'].iterrows()
+            }
+        }
+    spatial_cv = ml_results.get('spatial_cross_validation')
+    if spatial_cv is not None:
+        summary['spatial_cross_validation'] = {
+            'n_splits': spatial_cv['n_splits'],
+            'n_states': spatial_cv['n_states'],
+            'held_out_states': spatial_cv['held_out_states'],
+            'metrics': {
+                model_name: {metric: {'mean': row[(metric, 'mean')], 'std': row[(metric, 'std')]}
+                             for metric in ['accuracy', 'precision', 'recall', 'f1', 'roc_auc']}
+                for model_name, row in spatial_cv['summary'].iterrows()
+            }
+        }
+    importance = ml_results.get('permutation_importance')
+    if importance is not None:
+        summary['permutation_importance'] = {
+            'feature_names': importance['feature_names'],
+            'n_repeats': importance['n_repeats'],
+            'models': {name: {'mean': importance['importances_mean'][name], 'std': importance['importances_std'][name]}
+                       for name in importance['importances_mean']}
+        }
+    path = ml_results.get('regularization_path')
+    if path is not None:
+        summary['regularization_path'] = path
+    return _to_builtin(summary)
+
+
+def save_ml_results(ml_results, output_dir):
+    """Write the full results (ml_results/ bundle) and the dashboard summary (ml_summary.json)
+    
+    The bundle is pickle-free (see results_io): models are stored as plain arrays and
+    load memory-mapped without scikit-learn.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    with run_report.stage('Serialization'):
+        with run_report.stage('results bundle'):
+            results_path = save_results(ml_results, os.path.join(output_dir, 'ml_results'))
+        summary_path = os.path.join(output_dir, 'ml_summary.json')
+        # Write through a temporary file so readers never see a half-written summary
+        with run_report.stage('summary'):
+            tmp_path = f'{summary_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(build_ml_summary(ml_results), f)
+            os.replace(tmp_path, summary_path)
+    return results_path, summary_path
 
 
 if __name__ == "__main__":
-    # Load data
-    import os
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--search-rf', action='store_true',
+                        help='tune the Random Forest with successive halving before training')
+    parser.add_argument('--search-budget', type=float, default=60.0,
+                        help='wall-clock budget in seconds for --search-rf (default: 60)')
+    parser.add_argument('--score', metavar='CSV',
+                        help='score a CSV (id column, state_name, mobility_score) with the saved models '
+                             'instead of training')
+    parser.add_argument('--id-column', default='county_fips', help='id column of the --score CSV')
+    parser.add_argument('--output', help='output CSV for --score (default: <CSV stem>_scores.csv)')
+    parser.add_argument('--out-of-core', metavar='CSV',
+                        help='train the linear models on a CSV too large for memory (state_name, mobility_score, '
+                             'ai_exposure), streaming it in chunks; writes <CSV stem>_features/ and '
+                             '<CSV stem>_ml_results/')
+    parser.add_argument('--chunk-size', type=int, default=50_000,
+                        help='rows per chunk for --score and --out-of-core (default: 50000)')
+    args = parser.parse_args()
+    
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(script_dir, '..', '..', 'data', 'processed', 'merged_clean.csv')
+    output_dir = os.path.join(script_dir, '..', 'data', 'processed')
+    
+    if args.score:
+        from results_io import load_results
+        scores = score_dataset(args.score, load_results(os.path.join(output_dir, 'ml_results')),
+                               id_column=args.id_column, chunk_size=args.chunk_size)
+        output_path = args.output or f'{os.path.splitext(args.score)[0]}_scores.csv'
+        scores.to_csv(output_path, index=False)
+        print(f"✓ Scored {len(scores)} rows with {len(scores.columns) - 1} models -> {output_path}")
+        raise SystemExit(0)
+    
+    if args.out_of_core:
+        stem = os.path.splitext(args.out_of_core)[0]
+        results, feature_names, X_test, y_test, scaler = run_ml_analysis_out_of_core(
+            args.out_of_core, f'{stem}_features', chunk_size=args.chunk_size)
+        state_stats = pd.DataFrame(open_feature_matrix(f'{stem}_features')['state_stats']).set_index('state_name')
+        results_path = save_results({'results': results, 'feature_names': feature_names, 'scaler': scaler,
+                                     'state_stats': state_stats}, f'{stem}_ml_results')
+        print(f"\n✓ Results saved to {results_path}")
+        raise SystemExit(0)
+    
+    # Load data
+    data_path = os.path.join(script_dir, '..', 'data', 'processed', 'merged_clean.csv')
     df = pd.read_csv(data_path)
     
-    # Run analysis
-    results, feature_names, X_test, y_test, scaler = run_ml_analysis(df)
-    
-    # Save results for dashboard
-    output_path = os.path.join(script_dir, '..', '..', 'data', 'processed', 'ml_results.pkl')
-    import pickle
-    with open(output_path, 'wb') as f:
-        pickle.dump({
-            'results': results,
-            'feature_names': feature_names,
-            'X_test': X_test,
-            'y_test': y_test
-        }, f)
-    print(f"\n✓ Results saved to {output_path}")
-
+    # Same cleaning as the dashboard so saved results line up with its counties
+    df['county_fips'] = df['county_fips'].astype(str).str.zfill(5)
+    df = df.replace([np.inf, -np.inf], np.nan)
+    df = df.dropna(subset=['mobility_score', 'ai_exposure'])
+    
+    # Run analysis; an offline run gets every core (see compute_budget)
+    compute_budget.apply('training')
+    with compute_budget.budget('training'), run_report.recording('ml_analysis') as report:
+        if args.search_rf:
+            with run_report.stage('Random Forest search'):
+                rf_search = run_rf_search(df, time_budget=args.search_budget)
+        else:
+            rf_search = None
+        rf_params = rf_search['best_params'] if rf_search else None
+        ml_results = build_ml_results(df, rf_params=rf_params, rf_search=rf_search)
+        
+        # Save results for dashboard
+        results_path, summary_path = save_ml_results(ml_results, output_dir)
+    previous = (run_report.load_history(output_dir) or [None])[-1]
+    report_path = report.write(output_dir)
+    print(f"\n✓ Results saved to {results_path}")
+    print(f"✓ Dashboard summary saved to {summary_path}")
+    print(f"✓ Run report saved to {report_path}")
+    
+    # Stage timings and peak memory, with the change since the previous run
+    comparison = pd.DataFrame(run_report.compare(previous, report.to_dict())).set_index('stage')
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 160,
+                           'display.max_columns', None):
+        print(comparison)
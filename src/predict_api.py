@@ -0,0 +1,172 @@
+"""
+Prediction API
+==============
+JSON prediction endpoint for scoring hypothetical counties from other services.
+
+POST /api/predict with a list of {"state_name", "mobility_score"} records (or
+{"records": [...]}) returns every trained model's predicted Double Disadvantage
+probability for each record. Concurrent requests are coalesced by a MicroBatcher into
+one vectorized predict_proba call per model, so throughput under load is bounded by
+NumPy rather than by per-request overhead. Models are loaded once, from the
+pickle-free results bundle; scikit-learn is optional (large batches use its compiled
+tree traversal when it is installed, see results_io).
+"""
+
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+import pandas as pd
+
+from features import engineer_features
+from scoring import predict_probabilities, training_state_stats
+
+# Largest batch accepted per request, and the coalescing limits of the batcher
+MAX_RECORDS_PER_REQUEST = 10_000
+MAX_BATCH_ROWS = 20_000
+MAX_WAIT_SECONDS = 0.002
+# How long a request waits for its batch, and the Retry-After sent with a 503
+RESULT_TIMEOUT_SECONDS = 10
+RETRY_AFTER_SECONDS = 5
+
+
+class MicroBatcher:
+    """Coalesce concurrent predict calls into one vectorized call
+
+    Callers submit DataFrames; a worker thread drains the queue, waiting at most
+    max_wait seconds for more work once a request arrives (or until max_rows are
+    queued), scores the concatenated rows with one predict(frame) call and hands each
+    caller its slice. predict must return a dict of per-row arrays.
+
+    The worker starts on first use and is restarted in a forked child, so a batcher
+    created before a preforking server forks works in every worker.
+    """
+
+    def __init__(self, predict, max_rows=MAX_BATCH_ROWS, max_wait=MAX_WAIT_SECONDS):
+        self.predict = predict
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.stats = {'requests': 0, 'batches': 0}
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, args=(self._queue,), name='predict-batcher', daemon=True).start()
+            return self._queue
+
+    def submit(self, frame):
+        """Queue frame for scoring and return a Future of its dict of arrays"""
+        future = Future()
+        self._ensure_worker().put((frame, future))
+        return future
+
+    def _run(self, work):
+        while True:
+            batch = [work.get()]
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while rows < self.max_rows:
+                try:
+                    item = work.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            self._score(batch)
+
+    def _score(self, batch):
+        frames = [frame for frame, _ in batch]
+        try:
+            predictions = self.predict(pd.concat(frames, ignore_index=True))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.stats['requests'] += len(batch)
+        self.stats['batches'] += 1
+        offsets = np.cumsum([0] + [len(frame) for frame in frames])
+        for (_, future), start, end in zip(batch, offsets[:-1], offsets[1:]):
+            future.set_result({name: values[start:end] for name, values in predictions.items()})
+
+
+def _parse_records(payload, known_states):
+    """Validate the request body; returns (DataFrame, None) or (None, error message)"""
+    records = payload.get('records') if isinstance(payload, dict) else payload
+    if not isinstance(records, list) or not records:
+        return None, 'expected a non-empty JSON list of {"state_name", "mobility_score"} records'
+    if len(records) > MAX_RECORDS_PER_REQUEST:
+        return None, f'at most {MAX_RECORDS_PER_REQUEST} records per request'
+    states, mobility = [], []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            return None, f'record {i} is not an object'
+        state, score = record.get('state_name'), record.get('mobility_score')
+        if state not in known_states:
+            return None, f'record {i}: unknown state_name {state!r}'
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not math.isfinite(score):
+            return None, f'record {i}: mobility_score must be a finite number'
+        states.append(state)
+        mobility.append(float(score))
+    return pd.DataFrame({'state_name': states, 'mobility_score': mobility}), None
+
+
+def register_predict_api(server, get_ml_results, batcher_options=None, result_timeout=RESULT_TIMEOUT_SECONDS):
+    """Add POST /api/predict to a Flask server
+
+    get_ml_results returns the loaded ML results (None while models are training; it
+    raises RuntimeError while a rebuild swaps the bundle). New records are featurized
+    against the training data's state aggregates stored in the results
+    (training_state_stats), as batch scoring does, and must name one of its states.
+    Requests get a 503 with Retry-After while the models are unavailable, or when
+    their batch is not scored within result_timeout seconds. Returns the MicroBatcher
+    so callers can inspect its stats.
+    """
+    from flask import jsonify, request
+
+    def predict(frame):
+        ml_results = get_ml_results()
+        features, _ = engineer_features(frame, store=None, state_stats=training_state_stats(ml_results))
+        return predict_probabilities(ml_results, features)
+
+    batcher = MicroBatcher(predict, **(batcher_options or {}))
+
+    def unavailable(error):
+        response = jsonify({'error': error})
+        response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+        return response, 503
+
+    @server.route('/api/predict', methods=['POST'])
+    def api_predict():
+        try:
+            ml_results = get_ml_results()
+            if ml_results is None:
+                return unavailable('models are still training; retry shortly')
+            known_states = set(training_state_stats(ml_results).states.dropna())
+            frame, error = _parse_records(request.get_json(silent=True), known_states)
+            if error:
+                return jsonify({'error': error}), 400
+            predictions = batcher.submit(frame).result(timeout=result_timeout)
+        except FutureTimeout:
+            return unavailable('prediction timed out; retry shortly')
+        except (RuntimeError, OSError):
+            # A manifest mismatch or a bundle version removed mid-load: a rebuild is swapping it
+            return unavailable('models are being reloaded; retry shortly')
+        return jsonify({
+            'models': list(predictions),
+            'predictions': [
+                {'state_name': state, 'mobility_score': score,
+                 'probabilities': {name: float(values[i]) for name, values in predictions.items()}}
+                for i, (state, score) in enumerate(zip(frame['state_name'], frame['mobility_score']))
+            ]
+        })
+
+    return batcher
@@ -0,0 +1,573 @@
+"""
+ML Results Serialization
+========================
+Versioned, pickle-free on-disk format for the ML results dict.
+
+A results bundle is a directory holding a JSON manifest (schema version, data/code
+manifest, feature names, headline metrics and the structure of the results dict) and
+one .npy file per numeric array. Arrays are memory-mapped on load, and the numeric
+columns of DataFrames and Series are views on them; text columns (county FIPS, state
+names) are copied into pandas strings. Fitted scikit-learn models are exported to
+plain arrays (linear-model coefficients, tree node arrays) wrapped in small NumPy
+predictors, so loading a bundle and scoring with it does not require scikit-learn.
+When scikit-learn is installed, large batches are scored by its compiled tree
+traversal, rebuilt from the same node arrays.
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+from importlib import metadata
+
+import numpy as np
+import pandas as pd
+
+from artifact_store import file_hash, hash_frame
+
+SCHEMA_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+# A bundle directory holds versions (v-*) and a pointer file naming the current one
+CURRENT_FILE = 'CURRENT'
+
+# Columns of the cleaned county data that the ML results depend on
+ML_INPUT_COLUMNS = ['county_fips', 'state_name', 'mobility_score', 'ai_exposure']
+
+
+def _package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def results_manifest(df, rf_params=None):
+    """Identify the data, code and config an ML results dict was built from"""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    return {
+        'data_hash': hash_frame(df[ML_INPUT_COLUMNS]),
+        'code_hash': file_hash(*(os.path.join(module_dir, name)
+                                 for name in ('ml_analysis.py', 'features.py', 'scoring.py',
+                                              'artifact_store.py', 'results_io.py', 'decision_thresholds.py'))),
+        'sklearn_version': _package_version('scikit-learn'),
+        'rf_params': rf_params
+    }
+
+
+def results_are_current(ml_results, df):
+    """True when ml_results (or its summary) was built from this data with the current ML code"""
+    manifest = (ml_results or {}).get('manifest')
+    if not manifest:
+        return False
+    current = results_manifest(df, manifest.get('rf_params'))
+    return all(manifest.get(field) == current[field] for field in ('data_hash', 'code_hash'))
+
+
+# =============================================================================
+# ARRAY-BACKED PREDICTORS
+# =============================================================================
+
+def _expit(x):
+    from scipy.special import expit
+    return expit(x)
+
+
+class ScalerArrays:
+    """StandardScaler as mean/scale arrays"""
+
+    def __init__(self, mean, scale):
+        self.mean = mean
+        self.scale = scale
+
+    def transform(self, X):
+        X = np.array(X, dtype=float)
+        X -= self.mean
+        X /= self.scale
+        return X
+
+    def arrays(self):
+        return {'mean': self.mean, 'scale': self.scale}
+
+
+class LinearModelArrays:
+    """Binary logistic model as a coefficient vector and intercept"""
+
+    def __init__(self, coef, intercept):
+        self.coef = coef
+        self.intercept = intercept
+
+    @property
+    def coef_(self):
+        return np.asarray(self.coef).reshape(1, -1)
+
+    def predict_proba(self, X):
+        decision = (np.asarray(X, dtype=float) @ self.coef_.T + self.intercept).ravel()
+        p1 = _expit(decision)
+        return np.column_stack([1 - p1, p1])
+
+    def arrays(self):
+        return {'coef': self.coef, 'intercept': self.intercept}
+
+
+class _FlatTrees:
+    """Level-by-level traversal of many trees stored as flat node arrays
+
+    Every (tree, sample) pair of a batch starts at its tree's root and all pairs
+    advance one level per step with a single vectorized gather/compare across all
+    trees at once. Pairs that reach a leaf drop out of the active set, so work shrinks
+    as the traversal deepens. Children are packed as [left, right] pairs so one gather
+    picks the next node.
+
+    That wins for the small batches the dashboard and /api/predict mostly send, but it
+    costs several NumPy passes per node visit, about twice scikit-learn's compiled
+    traversal on thousands of rows. Batches of compiled_min_rows or more therefore go
+    through scikit-learn's own tree objects, rebuilt from the node arrays on first use
+    (no pickle involved), when scikit-learn is importable.
+    """
+
+    # Samples traversed together; bounds the (n_trees, rows) working arrays
+    chunk_rows = 512
+    # Batch size from which scikit-learn's compiled traversal is faster
+    compiled_min_rows = 512
+    _compiled = None
+
+    def _flatten(self, feature, threshold, left, right, tree_offsets, missing_go_to_left=None):
+        self._is_leaf = np.asarray(left) < 0
+        self._roots = np.asarray(tree_offsets[:-1], dtype=np.intp)
+        self._feature = np.where(self._is_leaf, 0, feature).astype(np.intp)
+        self._threshold = np.asarray(threshold, dtype=float)
+        self._children = np.column_stack([left, right]).astype(np.intp).ravel()
+        self._missing_go_to_left = None if missing_go_to_left is None else np.asarray(missing_go_to_left)
+
+    def _compiled_trees(self, n_samples):
+        """scikit-learn tree objects for a batch this large, or None to traverse in NumPy"""
+        if n_samples < self.compiled_min_rows:
+            return None
+        if self._compiled is None:
+            try:
+                self._compiled = self._build_compiled()
+            except ImportError:
+                self._compiled = False
+        return self._compiled or None
+
+    def _tree_slices(self):
+        """(start, stop, left, right) of every tree, children renumbered to the tree (-1 at leaves)"""
+        for start, stop in zip(self._roots, self.tree_offsets[1:]):
+            left = np.asarray(self.left[start:stop])
+            right = np.asarray(self.right[start:stop])
+            yield start, stop, np.where(left >= 0, left - start, -1), np.where(right >= 0, right - start, -1)
+
+    def _leaves(self, X):
+        """(n_trees, n_samples) leaf node index of every sample in every tree"""
+        n_samples, n_features = X.shape
+        X_flat = X.ravel()
+        node = np.repeat(self._roots, n_samples)
+        row_offsets = np.tile(np.arange(n_samples, dtype=np.intp) * n_features, len(self._roots))
+        active = np.flatnonzero(~self._is_leaf[node])
+        while len(active):
+            current = node[active]
+            x = X_flat[row_offsets[active] + self._feature[current]]
+            go_left = x <= self._threshold[current]
+            if self._missing_go_to_left is not None:
+                go_left |= np.isnan(x) & self._missing_go_to_left[current]
+            node[active] = current = self._children[2 * current + ~go_left]
+            active = active[~self._is_leaf[current]]
+        return node.reshape(len(self._roots), n_samples)
+
+    def _accumulate(self, X, value, initial=None):
+        """Sum the leaf values over trees in tree order (one chunk of rows at a time)
+
+        Reducing the (n_trees, rows) leaf values over axis 0 adds the trees one after
+        another, the same order and rounding as scikit-learn's per-tree accumulation.
+        """
+        X = np.ascontiguousarray(X)
+        parts = []
+        for start in range(0, len(X), self.chunk_rows):
+            leaf_values = value[self._leaves(X[start:start + self.chunk_rows])]
+            if initial is not None:
+                leaf_values = np.concatenate([np.broadcast_to(initial, (1,) + leaf_values.shape[1:]), leaf_values])
+            parts.append(np.add.reduce(leaf_values, axis=0))
+        return np.concatenate(parts) if parts else np.zeros((0,) + value.shape[1:])
+
+
+class ForestArrays(_FlatTrees):
+    """Random Forest as flat node arrays concatenated across trees
+
+    Child indices are global (-1 marks a leaf) and tree t owns the nodes
+    tree_offsets[t]:tree_offsets[t + 1]. value holds each node's normalized class
+    probabilities, exactly as DecisionTreeClassifier.predict_proba returns them.
+    predict_proba matches RandomForestClassifier.predict_proba bit for bit.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, tree_offsets, feature_importances=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.tree_offsets = tree_offsets
+        self.feature_importances = feature_importances
+        self._flatten(feature, threshold, left, right, tree_offsets)
+        self._value = np.ascontiguousarray(value)
+
+    @property
+    def feature_importances_(self):
+        return self.feature_importances
+
+    def _build_compiled(self):
+        from sklearn.tree._tree import NODE_DTYPE, Tree
+
+        n_features = int(np.max(self.feature, initial=0)) + 1
+        n_classes = np.array([self._value.shape[1]], dtype=np.intp)
+        trees = []
+        for start, stop, left, right in self._tree_slices():
+            nodes = np.zeros(stop - start, dtype=NODE_DTYPE)
+            nodes['left_child'] = left
+            nodes['right_child'] = right
+            nodes['feature'] = np.where(left >= 0, self.feature[start:stop], -2)
+            nodes['threshold'] = np.where(left >= 0, self.threshold[start:stop], -2.0)
+            tree = Tree(n_features, n_classes, 1)
+            tree.__setstate__({'max_depth': 0, 'node_count': stop - start, 'nodes': nodes,
+                               'values': np.ascontiguousarray(self._value[start:stop, np.newaxis, :])})
+            trees.append(tree)
+        return trees
+
+    def predict_proba(self, X):
+        # Trees compare float32 inputs against float64 thresholds, as scikit-learn does
+        X = np.asarray(X, dtype=np.float32)
+        trees = self._compiled_trees(len(X))
+        if trees is None:
+            return self._accumulate(X, self._value) / (len(self.tree_offsets) - 1)
+        total = np.zeros((len(X), self._value.shape[1]))
+        for tree in trees:
+            total += tree.predict(X)
+        return total / len(trees)
+
+    def arrays(self):
+        arrays = {'feature': self.feature, 'threshold': self.threshold, 'left': self.left,
+                  'right': self.right, 'value': self.value, 'tree_offsets': self.tree_offsets}
+        if self.feature_importances is not None:
+            arrays['feature_importances'] = self.feature_importances
+        return arrays
+
+
+class BoostingArrays(_FlatTrees):
+    """Binary histogram gradient boosting as flat node arrays across all iterations
+
+    Raw scores start at the baseline and add each iteration's leaf value in order, as
+    scikit-learn does, so predict_proba matches HistGradientBoostingClassifier.
+    """
+
+    def __init__(self, feature, threshold, missing_go_to_left, left, right, value, tree_offsets, baseline):
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_go_to_left = missing_go_to_left
+        self.left = left
+        self.right = right
+        self.value = value
+        self.tree_offsets = tree_offsets
+        self.baseline = baseline
+        self._flatten(feature, threshold, left, right, tree_offsets, missing_go_to_left)
+        self._value = np.ascontiguousarray(value)
+
+    def _build_compiled(self):
+        from sklearn.ensemble._hist_gradient_boosting.common import PREDICTOR_RECORD_DTYPE
+        from sklearn.ensemble._hist_gradient_boosting.predictor import TreePredictor
+        from sklearn.utils._openmp_helpers import _openmp_effective_n_threads
+
+        no_bitsets = np.zeros((0, 8), dtype=np.uint32)
+        predictors = []
+        for start, stop, left, right in self._tree_slices():
+            nodes = np.zeros(stop - start, dtype=PREDICTOR_RECORD_DTYPE)
+            nodes['value'] = self.value[start:stop]
+            nodes['feature_idx'] = self.feature[start:stop]
+            nodes['num_threshold'] = self.threshold[start:stop]
+            nodes['missing_go_to_left'] = self.missing_go_to_left[start:stop]
+            nodes['is_leaf'] = left < 0
+            nodes['left'] = np.maximum(left, 0)
+            nodes['right'] = np.maximum(right, 0)
+            predictors.append(TreePredictor(nodes, no_bitsets, no_bitsets))
+        return predictors, no_bitsets, np.zeros(0, dtype=np.uint32), _openmp_effective_n_threads()
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=float)
+        compiled = self._compiled_trees(len(X))
+        if compiled is None:
+            raw = self._accumulate(X, self._value, initial=float(self.baseline))
+        else:
+            predictors, known_categories, feature_map, n_threads = compiled
+            raw = np.full(len(X), float(self.baseline))
+            for predictor in predictors:
+                raw += predictor.predict(X, known_categories, feature_map, n_threads)
+        p1 = _expit(raw)
+        return np.column_stack([1 - p1, p1])
+
+    def arrays(self):
+        return {'feature': self.feature, 'threshold': self.threshold,
+                'missing_go_to_left': self.missing_go_to_left, 'left': self.left, 'right': self.right,
+                'value': self.value, 'tree_offsets': self.tree_offsets, 'baseline': self.baseline}
+
+
+PREDICTORS = {cls.__name__: cls for cls in (ScalerArrays, LinearModelArrays, ForestArrays, BoostingArrays)}
+
+
+def _concatenate_trees(trees):
+    """Concatenate per-tree (left, right, ...) arrays, shifting child indices to global ids"""
+    offsets = np.cumsum([0] + [len(tree['left']) for tree in trees])
+    merged = {}
+    for name in trees[0]:
+        parts = []
+        for offset, tree in zip(offsets, trees):
+            part = tree[name]
+            if name in ('left', 'right'):
+                part = np.where(part >= 0, part + offset, -1)
+            parts.append(part)
+        merged[name] = np.concatenate(parts)
+    merged['tree_offsets'] = offsets.astype(np.int64)
+    return merged
+
+
+def export_model(model):
+    """Convert a fitted scikit-learn estimator to its array-backed predictor
+
+    Dispatches on fitted attributes rather than classes, so exporting never imports
+    scikit-learn. Already-exported predictors are returned unchanged.
+    """
+    if type(model).__name__ in PREDICTORS:
+        return model
+    if hasattr(model, 'mean_') and hasattr(model, 'scale_'):
+        return ScalerArrays(np.asarray(model.mean_, dtype=float), np.asarray(model.scale_, dtype=float))
+    if hasattr(model, 'coef_'):
+        return LinearModelArrays(np.asarray(model.coef_[0], dtype=float), float(model.intercept_[0]))
+    if hasattr(model, 'estimators_'):
+        trees = []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            value = tree.value[:, 0, :].astype(float)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            trees.append({
+                'feature': tree.feature.astype(np.int32),
+                'threshold': tree.threshold.astype(float),
+                'left': tree.children_left.astype(np.int32),
+                'right': tree.children_right.astype(np.int32),
+                'value': value / normalizer
+            })
+        return ForestArrays(**_concatenate_trees(trees),
+                            feature_importances=np.asarray(model.feature_importances_, dtype=float))
+    if hasattr(model, '_predictors'):
+        trees = []
+        for predictors_of_iteration in model._predictors:
+            nodes = predictors_of_iteration[0].nodes
+            if nodes['is_categorical'].any():
+                raise ValueError("Categorical splits are not supported by the results format")
+            is_leaf = nodes['is_leaf'].astype(bool)
+            trees.append({
+                'feature': nodes['feature_idx'].astype(np.int32),
+                'threshold': nodes['num_threshold'].astype(float),
+                'missing_go_to_left': nodes['missing_go_to_left'].astype(bool),
+                'left': np.where(is_leaf, -1, nodes['left']).astype(np.int32),
+                'right': np.where(is_leaf, -1, nodes['right']).astype(np.int32),
+                'value': nodes['value'].astype(float)
+            })
+        return BoostingArrays(**_concatenate_trees(trees), baseline=float(np.ravel(model._baseline_prediction)[0]))
+    raise TypeError(f"Don't know how to export {type(model).__name__}")
+
+
+def _is_estimator(value):
+    return hasattr(value, 'get_params') and (hasattr(value, 'predict_proba') or hasattr(value, 'transform'))
+
+
+# =============================================================================
+# ENCODING
+# =============================================================================
+
+class _Writer:
+    """Collects arrays to write while the results dict is encoded to JSON"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.names = set()
+
+    def array(self, array, path):
+        stem = re.sub(r'[^A-Za-z0-9_.-]+', '_', '.'.join(path)) or 'array'
+        name, i = f'{stem}.npy', 1
+        while name in self.names:
+            name, i = f'{stem}.{i}.npy', i + 1
+        self.names.add(name)
+        np.save(os.path.join(self.directory, name), np.ascontiguousarray(array), allow_pickle=False)
+        return {'__array__': name}
+
+
+def _storable(array):
+    """The array in an np.load-able (non-object) dtype, or None if it has none"""
+    if array.dtype.kind in 'biufU':
+        return array
+    if array.dtype.kind == 'O' and all(isinstance(v, str) for v in array.ravel()):
+        return array.astype(str)
+    return None
+
+
+def _scalar(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return {'__float__': repr(value)}
+    return value
+
+
+def _encode(value, path, writer):
+    if value is None or isinstance(value, (bool, int, float, str, np.generic)):
+        return _scalar(value)
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise TypeError(f"Non-string dict keys at {'.'.join(path)}")
+        return {k: _encode(v, path + [k], writer) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(v, path + [str(i)], writer) for i, v in enumerate(value)]}
+    if isinstance(value, list):
+        return [_encode(v, path + [str(i)], writer) for i, v in enumerate(value)]
+    if isinstance(value, pd.Index):
+        return {'__index__': _encode(np.asarray(value), path, writer), 'name': _scalar(value.name)}
+    if isinstance(value, pd.Series):
+        return {'__series__': _encode(value.to_numpy(), path + ['values'], writer),
+                'index': _encode(value.index, path + ['index'], writer),
+                'name': _scalar(value.name)}
+    if isinstance(value, pd.DataFrame):
+        return {'__frame__': [_encode(value[column].to_numpy(), path + [str(i)], writer)
+                              for i, column in enumerate(value.columns)],
+                'columns': [list(c) if isinstance(c, tuple) else c for c in value.columns],
+                'index': _encode(value.index, path + ['index'], writer)}
+    if isinstance(value, np.ndarray):
+        storable = _storable(value)
+        if storable is None:
+            return {'__list__': [_encode(v, path, writer) for v in value.tolist()]}
+        return writer.array(storable, path)
+    if _is_estimator(value) or type(value).__name__ in PREDICTORS:
+        predictor = export_model(value)
+        return {'__model__': type(predictor).__name__,
+                'arrays': {name: _encode(array, path + [name], writer) if isinstance(array, np.ndarray)
+                           else _scalar(array)
+                           for name, array in predictor.arrays().items()}}
+    raise TypeError(f"Cannot serialize {type(value).__name__} at {'.'.join(path)}")
+
+
+def _decode(value, directory, mmap):
+    if isinstance(value, list):
+        return [_decode(v, directory, mmap) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if '__array__' in value:
+        return np.load(os.path.join(directory, value['__array__']), mmap_mode='r' if mmap else None,
+                       allow_pickle=False)
+    if '__float__' in value:
+        return float(value['__float__'])
+    if '__tuple__' in value:
+        return tuple(_decode(v, directory, mmap) for v in value['__tuple__'])
+    if '__list__' in value:
+        return np.array(_decode(value['__list__'], directory, mmap), dtype=object)
+    if '__index__' in value:
+        return pd.Index(_decode(value['__index__'], directory, mmap), name=value['name'])
+    if '__series__' in value:
+        return pd.Series(_decode(value['__series__'], directory, mmap),
+                         index=_decode(value['index'], directory, mmap), name=value['name'], copy=False)
+    if '__frame__' in value:
+        columns = [tuple(c) if isinstance(c, list) else c for c in value['columns']]
+        data = [_decode(v, directory, mmap) for v in value['__frame__']]
+        frame = pd.DataFrame(dict(enumerate(data)), copy=False)
+        frame.columns = pd.MultiIndex.from_tuples(columns) if columns and isinstance(columns[0], tuple) else columns
+        frame.index = _decode(value['index'], directory, mmap)
+        return frame
+    if '__model__' in value:
+        return PREDICTORS[value['__model__']](**{name: _decode(v, directory, mmap)
+                                                 for name, v in value['arrays'].items()})
+    return {k: _decode(v, directory, mmap) for k, v in value.items()}
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+def current_version(directory):
+    """Directory of the current version of a bundle (the bundle itself if unversioned)"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return os.path.join(directory, f.read().strip())
+    except FileNotFoundError:
+        return directory
+
+
+def save_results(ml_results, directory):
+    """Write ml_results as a new version of the bundle at directory (manifest.json + .npy arrays)
+
+    The version is written to a temporary subdirectory, renamed to v-<timestamp>-<pid>
+    when complete, and published by atomically replacing the CURRENT pointer file. The
+    bundle directory itself always exists, so a reader sees either the old or the new
+    version, never a mix or nothing. The previous version is kept for readers that
+    read the pointer just before the swap; older ones (and the files of a bundle
+    written before versioning) are removed.
+    """
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    version = f'v-{time.time_ns()}-{os.getpid()}'
+    tmp_dir = os.path.join(directory, f'.tmp-{version}')
+    os.makedirs(tmp_dir)
+    writer = _Writer(tmp_dir)
+    manifest = {
+        'schema_version': SCHEMA_VERSION,
+        'manifest': _encode(ml_results.get('manifest'), ['manifest'], writer),
+        'feature_names': list(ml_results.get('feature_names', [])),
+        'metrics': {
+            model_name: {metric: _scalar(entry.get(metric))
+                         for metric in ('accuracy', 'precision', 'recall', 'f1', 'roc_auc')}
+            for model_name, entry in ml_results.get('results', {}).items()
+        },
+        'content': _encode({k: v for k, v in ml_results.items() if k != 'manifest'}, [], writer)
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_dir, os.path.join(directory, version))
+
+    previous = os.path.basename(current_version(directory))
+    pointer_tmp = os.path.join(directory, f'.{CURRENT_FILE}-{version}')
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(directory, CURRENT_FILE))
+
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith('v-') and name not in (version, previous):
+            shutil.rmtree(path, ignore_errors=True)
+        elif name == MANIFEST_FILE or name.endswith('.npy'):
+            os.remove(path)
+    return directory
+
+
+def read_manifest(directory):
+    """Read and version-check the manifest.json of a bundle's current version"""
+    with open(os.path.join(current_version(directory), MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    version = manifest.get('schema_version')
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported ML results schema version {version} (expected {SCHEMA_VERSION}); "
+                         "re-run src/ml_analysis.py")
+    return manifest
+
+
+def load_results(directory, mmap=True):
+    """Load a bundle's current version; arrays are memory-mapped (read-only) unless mmap=False
+
+    If the version is removed while it loads (two saves during one load), the load
+    restarts from the new current version.
+    """
+    while True:
+        version = current_version(directory)
+        try:
+            manifest = read_manifest(version)
+            ml_results = _decode(manifest['content'], version, mmap)
+            ml_results['manifest'] = _decode(manifest['manifest'], version, mmap)
+            return ml_results
+        except FileNotFoundError:
+            if current_version(directory) == version:
+                raise
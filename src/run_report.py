@@ -0,0 +1,235 @@
+"""
+Run Report
+==========
+Per-stage timing and memory instrumentation for the ML pipeline.
+
+A RunReport records, for every stage opened with stage(name) while it is recording,
+the wall-clock and CPU time and the process memory (RSS) at entry, at exit and at its
+peak. Peaks come from a background thread that samples RSS every few milliseconds,
+so allocations freed before the stage ends still count. Stages nest: a stage opened
+inside another is recorded as 'outer/inner'.
+
+The active report is per thread (like compute_budget's joblib budget), so the
+pipeline code calls the module-level stage() without passing a report around, and
+stage() is a no-op when nothing is recording. Pure standard library, so the
+dashboard can use it without scikit-learn.
+
+    with recording('ml_analysis') as report:
+        ...  # code that opens stage('Feature engineering') etc.
+    report.write(directory)
+
+write() saves ml_run_report.json next to the artifacts and appends the report to
+ml_run_history.jsonl, which compare() reads to show per-stage changes between runs.
+"""
+
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+REPORT_FILE = 'ml_run_report.json'
+HISTORY_FILE = 'ml_run_history.jsonl'
+SAMPLE_INTERVAL = 0.005
+
+_local = threading.local()
+_MB = 1024 * 1024
+
+
+def rss_bytes():
+    """Resident set size of this process in bytes (Linux), else its peak RSS so far"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # bytes on macOS, KiB elsewhere
+
+
+class RunReport:
+    """Timings and memory of the stages of one pipeline run
+
+    stages is a list of dicts in the order the stages started, each with 'stage'
+    (the nested name), 'depth', 'wall_s', 'cpu_s', 'rss_start_mb', 'rss_end_mb',
+    'peak_rss_mb' and any fields passed to stage() or set with annotate(). info holds
+    run-level fields (see annotate).
+    """
+
+    def __init__(self, name, sample_interval=SAMPLE_INTERVAL):
+        self.name = name
+        self.sample_interval = sample_interval
+        self.stages = []
+        self.info = {}
+        self._open = []
+        self._lock = threading.Lock()
+        self._started = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._peak = rss_bytes()
+        self._rss_start = self._peak
+        self._sampler = None
+        self._stop = threading.Event()
+        self._totals = None
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            rss = rss_bytes()
+            with self._lock:
+                self._peak = max(self._peak, rss)
+                for record in self._open:
+                    record['_peak'] = max(record['_peak'], rss)
+
+    def start_sampling(self):
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample, name='run-report-sampler', daemon=True)
+            self._sampler.start()
+
+    def stop_sampling(self):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def finish(self):
+        """Stop sampling and fix the run's total wall and CPU time"""
+        self.stop_sampling()
+        self._totals = (time.perf_counter() - self._start, time.process_time() - self._cpu_start)
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Time the enclosed block as stage name (nested under any open stage)"""
+        rss = rss_bytes()
+        with self._lock:
+            record = {'stage': '/'.join([r['stage'] for r in self._open[-1:]] + [name]),
+                      'depth': len(self._open), **fields, '_peak': rss}
+            self.stages.append(record)
+            self._open.append(record)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            wall, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+            end = rss_bytes()
+            with self._lock:
+                self._open = [r for r in self._open if r is not record]
+                peak = max(record.pop('_peak'), end)
+                self._peak = max(self._peak, peak)
+                record.update(wall_s=round(wall, 6), cpu_s=round(cpu, 6), rss_start_mb=round(rss / _MB, 2),
+                              rss_end_mb=round(end / _MB, 2), peak_rss_mb=round(peak / _MB, 2))
+
+    def annotate(self, **fields):
+        """Add run-level fields to the report (JSON-serializable values)"""
+        self.info.update(fields)
+
+    def to_dict(self):
+        with self._lock:
+            peak = max(self._peak, rss_bytes())
+            stages = [{k: v for k, v in record.items() if k != '_peak'} for record in self.stages]
+        wall, cpu = self._totals or (time.perf_counter() - self._start, time.process_time() - self._cpu_start)
+        return {
+            'name': self.name,
+            'started_at': self._started.isoformat(timespec='seconds'),
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'rss_start_mb': round(self._rss_start / _MB, 2),
+            'peak_rss_mb': round(peak / _MB, 2),
+            'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                            'cpus': os.cpu_count()},
+            'info': self.info,
+            'stages': stages
+        }
+
+    def write(self, directory):
+        """Write ml_run_report.json into directory and append it to ml_run_history.jsonl
+
+        Returns the report path.
+        """
+        report = self.to_dict()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, REPORT_FILE)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=1)
+        os.replace(tmp_path, path)
+        with open(os.path.join(directory, HISTORY_FILE), 'a') as f:
+            f.write(json.dumps(report) + '\n')
+        return path
+
+
+@contextmanager
+def recording(name, sample_interval=SAMPLE_INTERVAL):
+    """Make a new RunReport the calling thread's active report for the enclosed block"""
+    report = RunReport(name, sample_interval)
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(report)
+    report.start_sampling()
+    try:
+        yield report
+    finally:
+        report.finish()
+        stack.pop()
+
+
+def current():
+    """The calling thread's active RunReport, or None"""
+    stack = getattr(_local, 'stack', [])
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def stage(name, **fields):
+    """Record the enclosed block as a stage of the active report (no-op without one)
+
+    Yields the stage record (a dict, or None when nothing is recording) so callers
+    can add fields known only inside the block, e.g. whether an artifact was cached.
+    """
+    report = current()
+    if report is None:
+        yield None
+        return
+    with report.stage(name, **fields) as record:
+        yield record
+
+
+def annotate(**fields):
+    """Add run-level fields to the active report (no-op without one)"""
+    report = current()
+    if report is not None:
+        report.annotate(**fields)
+
+
+def load_history(directory):
+    """Every report appended to directory's ml_run_history.jsonl, oldest first"""
+    path = os.path.join(directory, HISTORY_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(previous, current, max_depth=1):
+    """Per-stage wall time and peak RSS of two reports, with the change between them
+
+    Returns a list of dicts (stage, cached, wall_s, wall_change, peak_rss_mb,
+    peak_change) for the stages of current up to max_depth; wall_change is relative,
+    peak_change in MB, and both are None for stages previous does not have.
+    """
+    before = {record['stage']: record for record in (previous or {}).get('stages', [])}
+    rows = []
+    for record in current['stages']:
+        if record['depth'] > max_depth:
+            continue
+        old = before.get(record['stage'])
+        rows.append({
+            'stage': record['stage'],
+            'cached': record.get('cached'),
+            'wall_s': record['wall_s'],
+            'wall_change': record['wall_s'] / old['wall_s'] - 1 if old and old['wall_s'] else None,
+            'peak_rss_mb': record['peak_rss_mb'],
+            'peak_change': record['peak_rss_mb'] - old['peak_rss_mb'] if old else None
+        })
+    return rows
@@ -0,0 +1,95 @@
+"""
+Scoring
+=======
+Apply trained models to new data: batch scoring of whole datasets (all counties,
+tracts, any CSV) in bounded memory, and the vectorized per-batch prediction used by
+the prediction API. Works with freshly built ML results and with results loaded from
+the pickle-free bundle, and does not require scikit-learn (results_io uses its
+compiled trees for large batches when it is installed).
+"""
+
+import pandas as pd
+
+from artifact_store import code_hash, hash_frame
+from features import DEFAULT_STORE, StateMobilityStats, engineer_features
+
+# Numeric input columns; everything else (ids, state names) is read from CSV as text
+NUMERIC_COLUMNS = ('mobility_score', 'ai_exposure')
+
+
+def predict_probabilities(ml_results, features):
+    """Positive-class probability of every model for a feature DataFrame
+
+    Returns a dict mapping model name to an array of probabilities.
+    """
+    X = ml_results['scaler'].transform(features[ml_results['feature_names']].to_numpy(dtype=float))
+    return {name: entry['model'].predict_proba(X)[:, 1] for name, entry in ml_results['results'].items()}
+
+
+def training_state_stats(ml_results):
+    """StateMobilityStats of the data the models were trained on
+
+    Stored in the results as the 'state_stats' table, so new rows are featurized
+    against the same state aggregates the models saw in training.
+    """
+    return StateMobilityStats.from_table(ml_results['state_stats'])
+
+
+def _iter_chunks(data, columns, chunk_size):
+    """Chunks of a DataFrame, or of a CSV file streamed from disk"""
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size][columns]
+    else:
+        yield from pd.read_csv(data, usecols=columns, chunksize=chunk_size,
+                               dtype={column: str for column in columns if column not in NUMERIC_COLUMNS})
+
+
+def score_dataset(data, ml_results, id_column='county_fips', chunk_size=50_000, state_stats=None):
+    """Predicted Double Disadvantage probability of every row from every trained model
+
+    data is a DataFrame or the path of a CSV file with id_column, state_name and
+    mobility_score (counties, tracts, or any other geography). It is read in
+    chunk_size chunks, and engineer_features, the stored scaler and every model run on
+    each chunk. Peak memory is bounded by chunk_size plus the (rows x models) output.
+
+    The state_mobility_mean/std features come from state_stats, by default the
+    training data's (training_state_stats), as in the prediction API: the features
+    then mean what they meant in training, whatever part or level of geography data
+    covers. Rows from states without training counties get a NaN state mean (NaN
+    from the linear models, meaningless tree scores). Pass a StateMobilityStats
+    built from data to use its own aggregates.
+
+    Returns a DataFrame of id_column plus one probability column per model.
+    """
+    columns = [id_column, 'state_name', 'mobility_score']
+    if state_stats is None:
+        state_stats = training_state_stats(ml_results)
+
+    scored = []
+    for chunk in _iter_chunks(data, columns, chunk_size):
+        features, _ = engineer_features(chunk, store=None, state_stats=state_stats)
+        probabilities = predict_probabilities(ml_results, features)
+        scored.append(pd.DataFrame({id_column: chunk[id_column].to_numpy(), **probabilities}))
+    if not scored:
+        return pd.DataFrame(columns=[id_column, *ml_results['results']])
+    return pd.concat(scored, ignore_index=True)
+
+
+def score_counties(df, ml_results, store=DEFAULT_STORE, chunk_size=50_000):
+    """score_dataset over the county data, cached in the artifact store under 'scores'
+
+    Keyed by the county inputs, the manifest of the models (data, code and config they
+    were built from) and the scoring code.
+    """
+    def compute():
+        return score_dataset(df, ml_results, chunk_size=chunk_size)
+
+    if store is None:
+        return compute()
+    manifest = ml_results.get('manifest') or {}
+    key = store.key(hash_frame(df[['county_fips', 'state_name', 'mobility_score']]),
+                    repr(sorted(manifest.items())),
+                    code_hash(score_dataset, predict_probabilities, engineer_features, StateMobilityStats,
+                              training_state_stats, _iter_chunks))
+    return store.get_or_compute('scores', key, compute)
@@ -0,0 +1,195 @@
+"""
+Target Sweep
+============
+Train the model suite over many Double Disadvantage target definitions in one job:
+quantile cutoffs, birth cohorts (1978-1992) and race/gender subgroups of the
+Opportunity Insights mobility estimates.
+
+Targets that share a mobility series share its feature matrix (engineered once,
+cached in the artifact store), and every (target, model) fit is scheduled on a
+process pool. The result is one comparison table with a row per (target, model).
+
+Usage:
+    python src/target_sweep.py [--trends CSV] [--cohorts 1978 1992] [--races pooled black ...]
+                               [--genders pooled male female] [--quantiles 0.25 0.5]
+                               [--models NAME ...] [--n-jobs N]
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+import compute_budget
+from artifact_store import code_hash, hash_array
+from ml_analysis import (DEFAULT_STORE, MODEL_REGISTRY, _fit_fold, build_models, create_binary_target,
+                         engineer_features, evaluate_models, holdout_split, model_config_hash)
+
+# Opportunity Insights County Trends columns: mean household income rank of children
+# from 25th-percentile parents, by race, gender and birth cohort
+MOBILITY_COLUMN = re.compile(r'^kfr_(?P<race>[a-z]+)_(?P<gender>[a-z]+)_p25_(?P<cohort>\d{4})$')
+COHORTS = tuple(range(1978, 1993))
+
+
+def load_sweep_data(county_data, trends_path=None):
+    """County data with every available mobility series as a column
+
+    county_data is the cleaned county DataFrame (mobility_score is the 1992 pooled
+    series). With trends_path, the County Trends Estimates CSV is joined on
+    county_fips, adding its kfr_<race>_<gender>_p25_<cohort> columns.
+    """
+    df = county_data.assign(kfr_pooled_pooled_p25_1992=county_data['mobility_score'])
+    if trends_path is None:
+        return df
+    header = pd.read_csv(trends_path, nrows=0).columns
+    columns = [column for column in header if MOBILITY_COLUMN.match(column)]
+    trends = pd.read_csv(trends_path, usecols=['county_fips', *columns], dtype={'county_fips': str})
+    trends['county_fips'] = trends['county_fips'].str.zfill(5)
+    trends = trends.replace([np.inf, -np.inf], np.nan)
+    return df.drop(columns=[c for c in columns if c in df.columns]).merge(trends, on='county_fips', how='left')
+
+
+def sweep_targets(df, quantiles=(0.5,), cohorts=COHORTS, races=None, genders=None):
+    """Target definitions for every available (series, quantile) combination
+
+    A quantile q means the bottom q of mobility and the top q of AI exposure (0.5
+    reproduces create_binary_target). races/genders of None keep every subgroup
+    present in df. Returns a list of dicts.
+    """
+    targets = []
+    for column in df.columns:
+        match = MOBILITY_COLUMN.match(column)
+        if match is None:
+            continue
+        race, gender, cohort = match['race'], match['gender'], int(match['cohort'])
+        if cohort not in cohorts or (races and race not in races) or (genders and gender not in genders):
+            continue
+        for q in quantiles:
+            targets.append({
+                'target': f'{race}/{gender}/{cohort}/q{q:g}',
+                'mobility_column': column,
+                'race': race,
+                'gender': gender,
+                'cohort': cohort,
+                'quantile': q
+            })
+    return sorted(targets, key=lambda t: (t['race'], t['gender'], t['cohort'], t['quantile']))
+
+
+def _target_frame(df, column):
+    """County rows with this mobility series as mobility_score (rows without it dropped)"""
+    frame = df[['county_fips', 'state_name', 'ai_exposure']].assign(mobility_score=df[column])
+    return frame.dropna(subset=['mobility_score', 'ai_exposure']).reset_index(drop=True)
+
+
+def run_target_sweep(df, targets, model_names=None, n_jobs=None, store=DEFAULT_STORE):
+    """Train and evaluate the model suite on every target; returns the comparison table
+
+    Features are engineered once per mobility series and shared by all of its quantile
+    targets. Each target gets its own stratified holdout split (as in run_ml_analysis)
+    and every (target, model) fit runs as one job on a process pool (n_jobs=None uses
+    the current compute budget's workers). Results are
+    cached per target in the artifact store, so re-running a grown sweep only fits the
+    new targets.
+    """
+    models = build_models(names=model_names)
+    for model in models.values():
+        # Parallelism lives at the (target, model) level, so each fit stays single-threaded
+        if 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=1)
+    model_hashes = [model_config_hash(model) for model in models.values()]
+    code = code_hash(run_target_sweep, _fit_fold, create_binary_target, holdout_split, evaluate_models)
+
+    features, pending, rows = {}, [], {}
+    for target in targets:
+        column = target['mobility_column']
+        if column not in features:
+            frame = _target_frame(df, column)
+            X, _ = engineer_features(frame, store=store)
+            features[column] = (frame, X.to_numpy(dtype=float))
+        frame, X = features[column]
+        y = create_binary_target(frame, target['quantile'], 1 - target['quantile']).to_numpy()
+        key = store.key(hash_array(X), hash_array(y), *model_hashes, code) if store is not None else None
+        if key is not None and store.exists('target_sweep', key):
+            rows[target['target']] = store.load('target_sweep', key)
+            store.stats['reused'] += 1
+        else:
+            pending.append((target, X, y, key))
+
+    print(f"[SWEEP] {len(targets)} targets x {len(models)} models: "
+          f"{len(targets) - len(pending)} cached, {len(pending) * len(models)} fits to run")
+    splits = [holdout_split(y) for _, _, y, _ in pending]
+    probabilities = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(model, X, y, train_idx, test_idx)
+        for (_, X, y, _), (train_idx, test_idx) in zip(pending, splits)
+        for model in models.values()
+    )
+
+    for i, ((target, X, y, key), (_, test_idx)) in enumerate(zip(pending, splits)):
+        evaluation = evaluate_models(y[test_idx], np.vstack(probabilities[i * len(models):(i + 1) * len(models)]))
+        target_rows = [{
+            'model': model_name,
+            'n_counties': len(y),
+            'prevalence': float(y.mean()),
+            'accuracy': float(evaluation['accuracy'][m, 0]),
+            'precision': float(evaluation['precision'][m, 0]),
+            'recall': float(evaluation['recall'][m, 0]),
+            'f1': float(evaluation['f1'][m, 0]),
+            'roc_auc': float(evaluation['roc_auc'][m])
+        } for m, model_name in enumerate(models)]
+        if key is not None:
+            store.save('target_sweep', key, target_rows)
+            store.stats['computed'] += 1
+        rows[target['target']] = target_rows
+
+    table = pd.DataFrame([
+        {**{k: target[k] for k in ('target', 'race', 'gender', 'cohort', 'quantile')}, **row}
+        for target in targets for row in rows[target['target']]
+    ])
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the model suite over many target definitions")
+    parser.add_argument('--trends', help='County Trends Estimates CSV with the kfr_<race>_<gender>_p25_<cohort> '
+                                         'columns (default: data/raw/County Trends Estimates.csv if present)')
+    parser.add_argument('--cohorts', nargs=2, type=int, default=[COHORTS[0], COHORTS[-1]], metavar=('FIRST', 'LAST'),
+                        help='birth cohort range (default: 1978 1992)')
+    parser.add_argument('--races', nargs='+', help='race subgroups (default: all)')
+    parser.add_argument('--genders', nargs='+', help='gender subgroups (default: all)')
+    parser.add_argument('--quantiles', nargs='+', type=float, default=[0.25, 0.5],
+                        help='bottom-mobility / top-AI-exposure quantile cutoffs (default: 0.25 0.5)')
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_REGISTRY), help='models to train (default: all)')
+    parser.add_argument('--n-jobs', type=int, help='worker processes (default: the training compute budget, all cores)')
+    parser.add_argument('--output', help='comparison table CSV (default: data/processed/target_sweep.csv)')
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(script_dir, '..', 'data')
+    county_data = pd.read_csv(os.path.join(data_dir, 'processed', 'merged_clean.csv'))
+    # Same cleaning as the dashboard
+    county_data['county_fips'] = county_data['county_fips'].astype(str).str.zfill(5)
+    county_data = county_data.replace([np.inf, -np.inf], np.nan)
+    county_data = county_data.dropna(subset=['mobility_score', 'ai_exposure'])
+
+    trends_path = args.trends or os.path.join(data_dir, 'raw', 'County Trends Estimates.csv')
+    if not os.path.exists(trends_path):
+        print(f"No County Trends file at {trends_path}; sweeping the 1992 pooled series only")
+        trends_path = None
+    df = load_sweep_data(county_data, trends_path)
+    targets = sweep_targets(df, quantiles=args.quantiles, cohorts=range(args.cohorts[0], args.cohorts[1] + 1),
+                            races=args.races, genders=args.genders)
+
+    compute_budget.apply('training')
+    with compute_budget.budget('training'):
+        table = run_target_sweep(df, targets, model_names=args.models, n_jobs=args.n_jobs)
+    output_path = args.output or os.path.join(data_dir, 'processed', 'target_sweep.csv')
+    table.to_csv(output_path, index=False)
+
+    with pd.option_context('display.float_format', '{:.3f}'.format, 'display.width', 160,
+                           'display.max_columns', None, 'display.max_rows', 200):
+        print(table.pivot_table(index='target', columns='model', values='roc_auc', sort=False))
+    print(f"\n✓ {len(table)} (target, model) results saved to {output_path}")